@@ -0,0 +1,6 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试 - 合成文档语料生成器和解析、提取、导出及端到端批处理的基准
+"""
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+运行基准测试
+
+用法: python -m benchmarks -o results.json [--quick] [--only 模式] [--corpus-dir 目录] [--seed N] [--file-scale 比例]
+      [--repeat N] [--aslr]
+      [--baseline benchmarks/baseline.json [--threshold 0.25]]
+
+在Linux上默认关闭地址空间随机化后重新执行本进程，各次运行的内存布局一致，见harness.disable_address_randomization。
+"""
+
+import argparse
+import fnmatch
+import os
+import sys
+import tempfile
+
+from benchmarks import compare
+from benchmarks.harness import address_randomization, disable_address_randomization, save_results
+from benchmarks.suite import BENCHMARKS, BenchmarkContext
+
+
+def build_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="运行性能基准并保存为JSON")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="结果文件")
+    parser.add_argument("--quick", action="store_true", help="减少语料规模和轮数，用于快速检查")
+    parser.add_argument("--only", action="append", default=[],
+                        help="只运行名称匹配的基准（通配符，可多次指定），如 parse.* 或 batch")
+    parser.add_argument("--corpus-dir", help="语料目录，默认使用临时目录；指定后语料可在多次运行间复用")
+    parser.add_argument("--seed", type=int, default=0, help="语料随机种子")
+    parser.add_argument("-j", "--workers", type=int, help="端到端基准的并行进程数，默认min(4, CPU数)")
+    parser.add_argument("--file-scale", type=float,
+                        help="大文件列表基准（20万和100万路径）的规模比例，默认1，--quick时为0.05")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="依次运行选中的基准N遍，合并各遍的轮次后取中位数，生成基线时减少机器负载波动的影响")
+    parser.add_argument("--aslr", action="store_true",
+                        help="保留地址空间随机化，默认在Linux上关闭后重新执行，减少不同进程之间的差异")
+    parser.add_argument("--baseline", help="运行后与基线比较，有指标退化超过阈值时退出码为1")
+    compare.add_arguments(parser)
+    return parser
+
+
+def _group_selected(group, patterns):
+    """分组中是否可能有匹配的基准，只比较模式的第一段"""
+    return not patterns or any(fnmatch.fnmatch(group, pattern.split(".")[0]) for pattern in patterns)
+
+
+def run(args, corpus_dir, work_dir):
+    """运行选中的基准并保存结果"""
+    context = BenchmarkContext(corpus_dir, work_dir, args.seed, args.quick, args.workers, args.file_scale)
+    merged = {}  # 基准名称 -> 合并各遍后的结果，保持第一遍的顺序
+    for _ in range(max(1, args.repeat)):
+        for group, func in BENCHMARKS:
+            if not _group_selected(group, args.only):
+                continue
+            print(f"运行 {group} ...", file=sys.stderr, flush=True)
+            for result in func(context):
+                if not compare.selected(result.name, args.only):
+                    continue
+                if result.name in merged:
+                    merged[result.name].merge(result)
+                else:
+                    merged[result.name] = result
+                data = result.to_dict()
+                print(f"  {result.name:<36} 中位数 {data['median'] * 1000:9.1f} ms  "
+                      f"{data['throughput']:10.1f} {result.unit}/s  p95 {data['latency_p95'] * 1000:8.2f} ms")
+
+    results = list(merged.values())
+    if not results:
+        print("没有匹配的基准", file=sys.stderr)
+        return 2
+
+    config = context.config()
+    config["repeat"] = max(1, args.repeat)
+    data = save_results(args.output, results, config)
+    print(f"结果已保存: {args.output}")
+    if args.baseline:
+        return compare.check(args.baseline, data, args)
+    return 0
+
+
+def _reexec_with_fixed_layout():
+    """关闭地址空间随机化后用原来的命令行重新执行，已经关闭或无法关闭时直接返回"""
+    if address_randomization() and disable_address_randomization():
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(sys.executable, [sys.executable, *sys.orig_argv[1:]])
+
+
+def main(argv=None):
+    """命令行入口，返回进程退出码；从命令行运行（argv为None）时先按需关闭地址空间随机化"""
+    args = build_parser().parse_args(argv)
+    if argv is None and not args.aslr:
+        _reexec_with_fixed_layout()
+    with tempfile.TemporaryDirectory(prefix="wordextractor_bench_") as work_dir:
+        corpus_dir = args.corpus_dir or os.path.join(work_dir, "corpus")
+        return run(args, corpus_dir, work_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
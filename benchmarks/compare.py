@@ -0,0 +1,292 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能回归检查 - 将基准结果与提交在仓库中的基线比较，超过阈值时以非零退出码失败
+
+用法: python -m benchmarks.compare 结果.json [--baseline benchmarks/baseline.json] [--threshold 0.25] [--only 模式]
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import sys
+
+# 默认基线文件
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# 默认检查的基准分组
+DEFAULT_GROUPS = ("parse", "extract", "export")
+
+# 检查的指标及方向，True表示数值越大越好；内存比较单个基准运行期间的峰值增长，
+# 进程的绝对峰值取决于之前运行了哪些基准，不参与比较
+METRICS = {
+    "throughput": True,
+    "latency_p50": False,
+    "latency_p95": False,
+    "peak_rss_delta": False,
+}
+
+# 默认允许的退化比例
+DEFAULT_THRESHOLD = 0.25
+
+# 分组的默认阈值，优先于DEFAULT_THRESHOLD。提取和导出按批计时并按主机速度校正（见harness.timed_batches），
+# 关闭地址空间随机化后不同进程之间相差约15%；不能关闭的平台上微秒级的调用受内存布局影响，
+# 仍可相差1.5倍，放宽到50%
+GROUP_THRESHOLDS = {
+    "extract": 0.5,
+    "export": 0.5,
+}
+
+# 阈值必须能发现的变慢倍数，见insensitive
+DETECTABLE_SLOWDOWN = 2.0
+
+# 延迟低于此值（秒）时不检查，计时精度和调度抖动会让极短的延迟比例失真
+LATENCY_FLOOR = 0.0005
+
+# 延迟样本少于此数时不检查p95，此时p95就是最大值
+P95_MIN_SAMPLES = 20
+
+# 内存峰值增长低于此值（字节）时不检查，分配器缓存和页面粒度会让很小的增长比例失真
+MEMORY_FLOOR = 8 * 1024 * 1024
+
+# 结果中影响可比性的配置项，不一致时比较没有意义
+COMPARABLE_CONFIG = ("seed", "quick", "rounds")
+
+
+class Comparison:
+    """单个基准单个指标的比较结果"""
+
+    def __init__(self, name, metric, baseline, current, threshold):
+        self.name = name
+        self.metric = metric
+        self.baseline = baseline
+        self.current = current
+        self.threshold = threshold
+
+    @property
+    def change(self):
+        """退化比例，正数表示变差（吞吐量下降或延迟、内存上升）"""
+        if not self.baseline or not self.current:
+            return 0.0
+        if METRICS[self.metric]:
+            return self.baseline / self.current - 1
+        return self.current / self.baseline - 1
+
+    @property
+    def regressed(self):
+        """是否超过阈值"""
+        return self.change > self.threshold
+
+    def format(self):
+        """格式化为一行文本"""
+        status = "退化" if self.regressed else "正常"
+        return (f"{status}  {self.name:<36} {self.metric:<12} {_format_value(self.metric, self.baseline):>12} -> "
+                f"{_format_value(self.metric, self.current):>12}  {self.change:+7.1%} (阈值 {self.threshold:.0%})")
+
+
+def _format_value(metric, value):
+    """按指标格式化数值"""
+    if value is None:
+        return "-"
+    if metric == "throughput":
+        return f"{value:.1f}/s"
+    if metric == "peak_rss_delta":
+        return f"{value / 1024 / 1024:.1f} MB"
+    return f"{value * 1000:.2f} ms"
+
+
+def load_results(file_path):
+    """读取基准结果文件"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _normalized(value):
+    """经过JSON往返后的值，刚生成的结果中的元组与读取的列表可以直接比较"""
+    return json.loads(json.dumps(value))
+
+
+def config_mismatches(baseline, current):
+    """返回不一致的配置项，包括两次运行都用到的语料规格，以及是否按主机速度校正不一致的基准"""
+    mismatches = [key for key in COMPARABLE_CONFIG
+                  if baseline["config"].get(key) != current["config"].get(key)]
+    mismatches.extend(f"{name}.normalized" for name, result in baseline["results"].items()
+                      if name in current["results"]
+                      and result.get("normalized", False) != current["results"][name].get("normalized", False))
+    baseline_corpora = baseline["config"].get("corpora", {})
+    current_corpora = current["config"].get("corpora", {})
+    mismatches.extend(f"corpora.{profile}" for profile in baseline_corpora
+                      if profile in current_corpora
+                      and _normalized(baseline_corpora[profile]) != _normalized(current_corpora[profile]))
+    return mismatches
+
+
+def selected(name, patterns):
+    """基准名称是否匹配，模式也匹配以其开头的名称（batch 匹配 batch.end_to_end.j1），没有模式时全部匹配"""
+    return not patterns or any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(name, pattern + ".*")
+                               for pattern in patterns)
+
+
+def compare(baseline, current, threshold=None, metric_thresholds=None, groups=DEFAULT_GROUPS, only=None):
+    """比较两个结果，返回 (比较列表, 基线中有而当前结果中缺少的基准名称)
+
+    只比较基线中属于groups且匹配only模式（见selected）的基准，未选中的基准不算缺少；
+    metric_thresholds可为单个指标或 "基准名称模式:指标" 指定阈值，未指定threshold时按分组的默认阈值。
+    """
+    metric_thresholds = metric_thresholds or {}
+    comparisons = []
+    missing = []
+    for name, baseline_result in baseline["results"].items():
+        group = baseline_result.get("group")
+        if (groups and group not in groups) or not selected(name, only):
+            continue
+        current_result = current["results"].get(name)
+        if current_result is None:
+            missing.append(name)
+            continue
+
+        for metric in METRICS:
+            base_value = baseline_result.get(metric)
+            value = current_result.get(metric)
+            if base_value is None or value is None:
+                continue
+            if metric.startswith("latency") and max(base_value, value) < LATENCY_FLOOR:
+                continue
+            if metric == "latency_p95" and min(baseline_result.get("latency_samples", P95_MIN_SAMPLES),
+                                               current_result.get("latency_samples", P95_MIN_SAMPLES)) < P95_MIN_SAMPLES:
+                continue
+            if metric == "peak_rss_delta" and max(base_value, value) < MEMORY_FLOOR:
+                continue
+            default = threshold if threshold is not None else GROUP_THRESHOLDS.get(group, DEFAULT_THRESHOLD)
+            comparisons.append(Comparison(name, metric, base_value, value,
+                                          _threshold_for(name, metric, default, metric_thresholds)))
+    return comparisons, missing
+
+
+def slowed_down(results, factor):
+    """把结果中的耗时放大factor倍（吞吐量相应降低），内存不变"""
+    slowed = {}
+    for name, result in results["results"].items():
+        result = dict(result)
+        for metric, higher_is_better in METRICS.items():
+            if metric != "peak_rss_delta" and result.get(metric) is not None:
+                result[metric] = result[metric] / factor if higher_is_better else result[metric] * factor
+        slowed[name] = result
+    return {**results, "results": slowed}
+
+
+def insensitive(baseline, threshold=None, metric_thresholds=None, groups=DEFAULT_GROUPS, only=None,
+                factor=DETECTABLE_SLOWDOWN):
+    """返回按当前阈值发现不了factor倍变慢的基准名称
+
+    用基线构造每个基准都慢factor倍的结果再比较，没有任何指标超过阈值的基准说明阈值过宽
+    （或全部指标都低于比较的下限），真实的变慢也不会被报告。
+    """
+    comparisons, _ = compare(baseline, slowed_down(baseline, factor), threshold, metric_thresholds, groups, only)
+    flagged = {comparison.name for comparison in comparisons if comparison.regressed}
+    names = []
+    for name, result in baseline["results"].items():
+        if (groups and result.get("group") not in groups) or not selected(name, only):
+            continue
+        if name not in flagged:
+            names.append(name)
+    return names
+
+
+def _threshold_for(name, metric, default, metric_thresholds):
+    """按 "模式:指标"、指标、默认值的优先级查找阈值"""
+    for key, value in metric_thresholds.items():
+        pattern, _, key_metric = key.rpartition(":")
+        if pattern and key_metric == metric and fnmatch.fnmatch(name, pattern):
+            return value
+    return metric_thresholds.get(metric, default)
+
+
+def _parse_metric_threshold(text):
+    """解析 --metric-threshold 参数，如 peak_rss_delta=0.5 或 parse.*:latency_p95=0.4"""
+    key, sep, value = text.partition("=")
+    metric = key.rpartition(":")[2]
+    if not sep or metric not in METRICS:
+        raise argparse.ArgumentTypeError(f"格式应为 [基准模式:]指标=比例，指标为 {', '.join(METRICS)}")
+    try:
+        return key, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的比例: {value}")
+
+
+def add_arguments(parser):
+    """添加回归检查的参数，python -m benchmarks 共用"""
+    parser.add_argument("--threshold", type=float,
+                        help=f"允许的退化比例，默认{DEFAULT_THRESHOLD}（即25%%），extract和export分组见GROUP_THRESHOLDS；"
+                             f"必须能发现{DETECTABLE_SLOWDOWN:g}倍的变慢")
+    parser.add_argument("--metric-threshold", action="append", default=[], type=_parse_metric_threshold,
+                        help="单独指定某个指标的阈值，如 peak_rss_delta=0.5 或 parse.*:latency_p95=0.4，可多次指定")
+    parser.add_argument("--groups", default=",".join(DEFAULT_GROUPS),
+                        help=f"检查的基准分组，逗号分隔，默认{','.join(DEFAULT_GROUPS)}")
+
+
+def check(baseline_path, current, args, out=sys.stdout):
+    """与基线比较并打印报告，返回退出码：0通过，1有退化或缺少基准，2无法比较或阈值过宽
+
+    args.only为基准名称模式时只检查选中的基准（python -m benchmarks --only 与之共用）。
+    """
+    try:
+        baseline = load_results(baseline_path)
+    except (OSError, ValueError) as e:
+        print(f"无法读取基线 {baseline_path}: {e}", file=sys.stderr)
+        return 2
+
+    mismatches = config_mismatches(baseline, current)
+    if mismatches:
+        print(f"与基线的运行配置不一致，无法比较: {', '.join(mismatches)}", file=sys.stderr)
+        return 2
+
+    base_env = baseline.get("environment", {})
+    current_env = current.get("environment", {})
+    for key in sorted(set(base_env) | set(current_env)):
+        if key != "timestamp" and base_env.get(key) != current_env.get(key):
+            print(f"环境差异 {key}: {base_env.get(key)} -> {current_env.get(key)}", file=out)
+
+    groups = tuple(group.strip() for group in args.groups.split(",") if group.strip())
+    blind = insensitive(baseline, args.threshold, dict(args.metric_threshold), groups, args.only)
+    if blind:
+        print(f"阈值过宽，发现不了{DETECTABLE_SLOWDOWN:g}倍的变慢: {', '.join(blind)}", file=sys.stderr)
+        return 2
+
+    comparisons, missing = compare(baseline, current, args.threshold, dict(args.metric_threshold), groups,
+                                   args.only)
+    for comparison in comparisons:
+        print(comparison.format(), file=out)
+    for name in missing:
+        print(f"缺少  {name}", file=out)
+
+    regressions = [comparison for comparison in comparisons if comparison.regressed]
+    if regressions or missing:
+        print(f"性能回归检查失败: {len(regressions)} 项退化，{len(missing)} 个基准缺少结果", file=out)
+        return 1
+    print(f"性能回归检查通过: {len(comparisons)} 项指标", file=out)
+    return 0
+
+
+def main(argv=None):
+    """命令行入口，返回进程退出码"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description="与基线比较基准结果")
+    parser.add_argument("results", help="python -m benchmarks 生成的结果文件")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线文件，默认benchmarks/baseline.json")
+    parser.add_argument("--only", action="append", default=[],
+                        help="只检查名称匹配的基准（通配符，可多次指定），未选中的基准不算缺少")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        current = load_results(args.results)
+    except (OSError, ValueError) as e:
+        print(f"无法读取结果 {args.results}: {e}", file=sys.stderr)
+        return 2
+    return check(args.baseline, current, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
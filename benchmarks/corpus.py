@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+合成语料生成器 - 按固定随机种子生成可复现的.docx文档
+
+直接写出WordprocessingML，不依赖python-docx，可以生成合并单元格、书签和内容控件。
+同样的规格和种子在任何机器上生成的文件逐字节相同。
+
+用法: python -m benchmarks.corpus 输出目录 [--profile medium] [--documents 50] [--seed 0]
+"""
+
+import argparse
+import io
+import os
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+# 固定的zip条目时间，保证输出逐字节相同
+_ZIP_DATE = (2024, 1, 1, 0, 0, 0)
+
+_WORDS = ["合同", "项目", "金额", "日期", "甲方", "乙方", "负责人", "地址", "电话", "备注",
+          "审核", "编号", "部门", "预算", "结算", "交付", "验收", "付款", "违约", "条款",
+          "the", "report", "value", "total", "status", "invoice", "quarter", "summary"]
+
+_FIELDS = [
+    ("合同编号", lambda rng, i: f"HT-{2020 + i % 5}-{rng.randrange(1000):03d}"),
+    ("签订日期", lambda rng, i: f"{2020 + i % 5}年{rng.randrange(1, 13)}月{rng.randrange(1, 29)}日"),
+    ("合同金额", lambda rng, i: f"{rng.randrange(1000, 10_000_000):,}.00元"),
+    ("联系电话", lambda rng, i: f"1{rng.randrange(3, 10)}{rng.randrange(10 ** 8, 10 ** 9)}"),
+    ("负责人", lambda rng, i: rng.choice(["张三", "李四", "王五", "赵六", "钱七"])),
+]
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Default Extension="png" ContentType="image/png"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>
+<Override PartName="/docProps/app.xml" ContentType="application/vnd.openxmlformats-officedocument.extended-properties+xml"/>
+</Types>"""
+
+_PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>
+<Relationship Id="rId3" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/extended-properties" Target="docProps/app.xml"/>
+</Relationships>"""
+
+_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{}</Relationships>"""
+
+_IMAGE_REL = ('<Relationship Id="rIdPad" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+              'relationships/image" Target="media/image1.png"/>')
+
+_CORE = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" \
+xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" \
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">
+<dc:title>{title}</dc:title><dc:creator>{creator}</dc:creator><cp:lastModifiedBy>{creator}</cp:lastModifiedBy>
+<cp:revision>{revision}</cp:revision>
+<dcterms:created xsi:type="dcterms:W3CDTF">{created}</dcterms:created>
+<dcterms:modified xsi:type="dcterms:W3CDTF">{modified}</dcterms:modified>
+</cp:coreProperties>"""
+
+_APP = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">
+<Application>WordExtractor benchmark corpus</Application><Pages>{pages}</Pages><Words>{words}</Words>
+<Paragraphs>{paragraphs}</Paragraphs></Properties>"""
+
+_DOCUMENT = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" \
+xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><w:body>{body}\
+<w:sectPr><w:pgSz w:w="11906" w:h="16838"/></w:sectPr></w:body></w:document>"""
+
+
+class CorpusSpec:
+    """语料规格
+
+    target_size为单个文件的目标大小（字节），正文不足时以一张不可压缩的图片填充；
+    merged_cells为表格中参与合并的单元格比例（横向和纵向合并各占一半）。
+    """
+
+    def __init__(self, name="medium", documents=20, paragraphs=200, words_per_paragraph=(4, 40),
+                 tables=2, table_rows=20, table_cols=5, merged_cells=0.1, bookmarks=5,
+                 content_controls=5, target_size=0, seed=0):
+        self.name = name
+        self.documents = documents
+        self.paragraphs = paragraphs
+        self.words_per_paragraph = tuple(words_per_paragraph)
+        self.tables = tables
+        self.table_rows = table_rows
+        self.table_cols = table_cols
+        self.merged_cells = merged_cells
+        self.bookmarks = bookmarks
+        self.content_controls = content_controls
+        self.target_size = target_size
+        self.seed = seed
+
+    def to_dict(self):
+        """转换为字典，写入基准结果中"""
+        return dict(vars(self))
+
+    def scaled(self, documents):
+        """相同文档结构、不同文档数的规格"""
+        data = self.to_dict()
+        data["documents"] = documents
+        return CorpusSpec(**data)
+
+
+# 预置的语料规格
+PROFILES = {
+    "small": CorpusSpec("small", documents=40, paragraphs=30, tables=1, table_rows=5, table_cols=3,
+                        bookmarks=2, content_controls=1),
+    "medium": CorpusSpec("medium", documents=20, paragraphs=300, tables=3, table_rows=20, table_cols=5),
+    "large": CorpusSpec("large", documents=5, paragraphs=3000, tables=10, table_rows=100, table_cols=8,
+                        bookmarks=50, content_controls=30, target_size=2 * 1024 * 1024),
+    "tables": CorpusSpec("tables", documents=10, paragraphs=20, tables=30, table_rows=60, table_cols=10,
+                         merged_cells=0.25, bookmarks=0, content_controls=0),
+}
+
+
+def _text(rng, spec):
+    """随机段落文本"""
+    low, high = spec.words_per_paragraph
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(low, high)))
+
+
+def _run(text):
+    """文本片段"""
+    return f'<w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _paragraph(content):
+    """段落"""
+    return f"<w:p>{content}</w:p>"
+
+
+def _table(rng, spec, table_index):
+    """表格，部分单元格横向或纵向合并"""
+    rows, cols = spec.table_rows, spec.table_cols
+    grid = "".join('<w:gridCol w:w="1500"/>' for _ in range(cols))
+    vmerge_cols = set()  # 纵向合并正在延续的列
+    parts = [f'<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>']
+    for r in range(rows):
+        parts.append("<w:tr>")
+        c = 0
+        while c < cols:
+            text = f"T{table_index}R{r}C{c}" if r == 0 else _text(rng, spec)[:30]
+            props = ""
+            span = 1
+            if c in vmerge_cols:
+                # 延续上一行的纵向合并
+                vmerge_cols.discard(c)
+                props = '<w:vMerge/>'
+                text = ""
+            elif r > 0 and rng.random() < spec.merged_cells:
+                if rng.random() < 0.5 and c + 1 < cols and c + 1 not in vmerge_cols:
+                    span = 2
+                    props = '<w:gridSpan w:val="2"/>'
+                elif r + 1 < rows:
+                    vmerge_cols.add(c)
+                    props = '<w:vMerge w:val="restart"/>'
+            tc_props = f"<w:tcPr>{props}</w:tcPr>" if props else ""
+            parts.append(f"<w:tc>{tc_props}{_paragraph(_run(text) if text else '')}</w:tc>")
+            c += span
+        parts.append("</w:tr>")
+    parts.append("</w:tbl>")
+    return "".join(parts)
+
+
+def build_document(spec, index):
+    """生成第index个文档的内容，返回 (文件名, docx字节)"""
+    rng = random.Random(f"{spec.seed}:{spec.name}:{index}")
+    body = []
+
+    # 标题和字段行，方便基准中的正则规则命中
+    body.append(_paragraph(_run(f"{spec.name} 测试文档 {index}")))
+    for label, value in _FIELDS:
+        body.append(_paragraph(_run(f"{label}: {value(rng, index)}")))
+
+    # 正文段落，书签和内容控件均匀分布在正文中
+    bookmark_at = set(rng.sample(range(spec.paragraphs), min(spec.bookmarks, spec.paragraphs)))
+    control_at = set(rng.sample(range(spec.paragraphs), min(spec.content_controls, spec.paragraphs)))
+    table_at = {spec.paragraphs * (t + 1) // (spec.tables + 1): t for t in range(spec.tables)}
+    words = 0
+    bookmark_id = 0
+    for p in range(spec.paragraphs):
+        if p in table_at:
+            body.append(_table(rng, spec, table_at[p]))
+
+        text = _text(rng, spec)
+        words += text.count(" ") + 1
+        if p in bookmark_at:
+            content = (f'<w:bookmarkStart w:id="{bookmark_id}" w:name="书签{bookmark_id}"/>'
+                       f'{_run(text)}<w:bookmarkEnd w:id="{bookmark_id}"/>')
+            bookmark_id += 1
+        else:
+            content = _run(text)
+
+        if p in control_at:
+            body.append(f'<w:sdt><w:sdtPr><w:alias w:val="控件{p}"/><w:tag w:val="field{p}"/></w:sdtPr>'
+                        f'<w:sdtContent>{_paragraph(content)}</w:sdtContent></w:sdt>')
+        else:
+            body.append(_paragraph(content))
+
+    # 没有正文段落时表格放在末尾
+    for p, t in table_at.items():
+        if p >= spec.paragraphs:
+            body.append(_table(rng, spec, t))
+
+    parts = {
+        "[Content_Types].xml": _CONTENT_TYPES,
+        "_rels/.rels": _PACKAGE_RELS,
+        "docProps/core.xml": _CORE.format(
+            title=escape(f"{spec.name} 测试文档 {index}"), creator=rng.choice(["张三", "李四", "王五"]),
+            revision=rng.randint(1, 20), created=f"2023-{index % 12 + 1:02d}-01T08:00:00Z",
+            modified=f"2024-{index % 12 + 1:02d}-15T18:30:00Z"),
+        "docProps/app.xml": _APP.format(pages=max(1, spec.paragraphs // 30), words=words,
+                                        paragraphs=spec.paragraphs + len(_FIELDS) + 1),
+        "word/document.xml": _DOCUMENT.format(body="".join(body)),
+    }
+
+    data = _zip(parts, rels="")
+    if spec.target_size and len(data) < spec.target_size:
+        # 用不可压缩的图片数据补足到目标大小
+        parts["word/media/image1.png"] = rng.randbytes(spec.target_size - len(data))
+        data = _zip(parts, rels=_IMAGE_REL)
+
+    return f"{spec.name}_{index:05d}.docx", data
+
+
+def _zip(parts, rels):
+    """按固定顺序和时间打包"""
+    parts = dict(parts)
+    parts["word/_rels/document.xml.rels"] = _DOCUMENT_RELS.format(rels)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name in sorted(parts):
+            info = zipfile.ZipInfo(name, _ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            content = parts[name]
+            archive.writestr(info, content.encode("utf-8") if isinstance(content, str) else content)
+    return buffer.getvalue()
+
+
+def generate_corpus(directory, spec):
+    """在目录中生成语料，已存在且大小相同的文件不重写，返回文件路径列表"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index in range(spec.documents):
+        name, data = build_document(spec, index)
+        path = os.path.join(directory, name)
+        if not (os.path.exists(path) and os.path.getsize(path) == len(data)):
+            with open(path, "wb") as f:
+                f.write(data)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.corpus", description="生成合成.docx语料")
+    parser.add_argument("directory", help="输出目录")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="medium", help="预置规格")
+    parser.add_argument("--documents", type=int, help="文档数")
+    parser.add_argument("--paragraphs", type=int, help="每个文档的段落数")
+    parser.add_argument("--tables", type=int, help="每个文档的表格数")
+    parser.add_argument("--table-rows", type=int, help="表格行数")
+    parser.add_argument("--table-cols", type=int, help="表格列数")
+    parser.add_argument("--merged-cells", type=float, help="合并单元格比例（0-1）")
+    parser.add_argument("--bookmarks", type=int, help="每个文档的书签数")
+    parser.add_argument("--content-controls", type=int, help="每个文档的内容控件数")
+    parser.add_argument("--target-size", type=int, help="单个文件的目标大小（字节）")
+    parser.add_argument("--seed", type=int, help="随机种子")
+    args = parser.parse_args(argv)
+
+    data = PROFILES[args.profile].to_dict()
+    for key in data:
+        value = getattr(args, key, None)
+        if value is not None and key != "name":
+            data[key] = value
+    spec = CorpusSpec(**data)
+
+    paths = generate_corpus(args.directory, spec)
+    total = sum(os.path.getsize(path) for path in paths)
+    print(f"已生成 {len(paths)} 个文档，共 {total / 1024 / 1024:.1f} MB: {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
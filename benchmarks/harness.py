@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准测试框架 - 重复测量、统计分位数和内存峰值，结果写为JSON
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+
+from utils.stage_timer import MemoryProbe, process_peak_rss
+
+
+def _load_malloc_trim():
+    """glibc的malloc_trim，其它C库上为None"""
+    try:
+        return ctypes.CDLL(ctypes.util.find_library("c")).malloc_trim
+    except (OSError, AttributeError, TypeError):
+        return None
+
+
+_malloc_trim = _load_malloc_trim()
+
+# personality(2)中关闭地址空间随机化的标志
+ADDR_NO_RANDOMIZE = 0x0040000
+
+
+def _personality():
+    """Linux的personality函数，其它平台上为None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        personality = ctypes.CDLL(None, use_errno=True).personality
+    except (OSError, AttributeError):
+        return None
+    personality.argtypes = [ctypes.c_ulong]
+    return personality
+
+
+def address_randomization():
+    """当前进程是否启用了地址空间随机化，无法判断时返回None"""
+    personality = _personality()
+    if personality is None:
+        return None
+    current = personality(0xffffffff)
+    return None if current == -1 else not current & ADDR_NO_RANDOMIZE
+
+
+def disable_address_randomization():
+    """为之后执行的程序关闭地址空间随机化（与 setarch -R 相同），返回是否成功
+
+    当前进程的内存布局不变，需要随后用exec重新执行。每个进程随机的内存布局会让微秒级的调用
+    在不同进程之间相差1.5倍，关闭后各进程的布局一致。
+    """
+    personality = _personality()
+    if personality is None:
+        return False
+    current = personality(0xffffffff)
+    return current != -1 and personality(current | ADDR_NO_RANDOMIZE) != -1
+
+
+def release_memory():
+    """垃圾回收并尽可能把空闲内存归还给系统
+
+    glibc会保留已释放的内存供之后复用，不归还时后续各轮的分配落在已有的常驻内存中，
+    测得的峰值增长接近0，不能反映单轮实际需要的内存。
+    """
+    gc.collect()
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+# 主机速度校正的参考负载：固定次数的纯Python循环。共享或限频的机器上CPU速度在秒级的时间内变化，
+# 同一段代码的耗时可相差1.5倍，而与相邻的参考负载的耗时之比基本不变
+REFERENCE_ITERATIONS = 20000
+REFERENCE_SECONDS = 0.001  # 校正后的时间以参考负载耗时此值的机器为准
+
+
+def reference_time():
+    """运行一次参考负载，返回耗时（秒）"""
+    started = time.perf_counter()
+    total = 0
+    for i in range(REFERENCE_ITERATIONS):
+        total += i * i
+    return time.perf_counter() - started
+
+
+def normalized(elapsed, before, after):
+    """按前后两次参考负载的平均耗时校正一段耗时"""
+    return elapsed / ((before + after) / 2) * REFERENCE_SECONDS
+
+
+def timed_batches(batches, func):
+    """对每批项目逐个调用func，返回每批按主机速度校正后的耗时列表
+
+    每批前后各运行一次参考负载（相邻两批共用中间的一次），批越短，与参考负载所处的主机速度越一致。
+    """
+    latency = []
+    before = reference_time()
+    for batch in batches:
+        started = time.perf_counter()
+        for item in batch:
+            func(item)
+        elapsed = time.perf_counter() - started
+        after = reference_time()
+        latency.append(normalized(elapsed, before, after))
+        before = after
+    return latency
+
+
+def percentile(samples, q):
+    """分位数，q取0-100，使用最近秩法"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class BenchmarkResult:
+    """单个基准的测量结果
+
+    samples是每轮的耗时（秒），items是每轮处理的项目数（文档、行、文件等），
+    用于计算吞吐量；latency是单个项目的耗时分布（秒），没有时按每轮平均值计算。
+    """
+
+    def __init__(self, name, group, samples, items=1, unit="次", latency=None, peak_rss_delta=0,
+                 peak_rss=None, extra=None):
+        self.name = name
+        self.group = group
+        self.samples = list(samples)
+        self.items = items
+        self.unit = unit
+        self.latency = list(latency) if latency else [sample / max(1, items) for sample in self.samples]
+        self.peak_rss_delta = peak_rss_delta
+        self.peak_rss = peak_rss
+        self.extra = extra or {}
+
+    def merge(self, other):
+        """合并同一基准另一次运行的结果，用于多次运行取中位数
+
+        对方每轮的项目数不同时（如按耗时校准重复次数的提取基准）按项目数换算耗时；
+        内存峰值增量取较大值。
+        """
+        scale = self.items / other.items if other.items else 1.0
+        self.samples.extend(sample * scale for sample in other.samples)
+        self.latency.extend(other.latency)
+        self.peak_rss_delta = max(self.peak_rss_delta, other.peak_rss_delta)
+        if other.peak_rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, other.peak_rss)
+
+    @property
+    def median(self):
+        """每轮耗时的中位数（秒）"""
+        return statistics.median(self.samples)
+
+    @property
+    def throughput(self):
+        """按中位数计算的吞吐量（项目/秒）"""
+        return self.items / self.median if self.median > 0 else 0.0
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "group": self.group,
+            "rounds": len(self.samples),
+            "items": self.items,
+            "unit": self.unit,
+            "mean": statistics.fmean(self.samples),
+            "median": self.median,
+            "min": min(self.samples),
+            "max": max(self.samples),
+            "stdev": statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0,
+            "throughput": self.throughput,
+            "latency_p50": percentile(self.latency, 50),
+            "latency_p95": percentile(self.latency, 95),
+            "latency_p99": percentile(self.latency, 99),
+            "latency_samples": len(self.latency),
+            "peak_rss": self.peak_rss,
+            "peak_rss_delta": self.peak_rss_delta,
+            **self.extra,
+        }
+
+
+def measure(name, group, func, items=1, unit="次", rounds=5, warmup=1, setup=None, latency=None, extra=None,
+            normalize=False):
+    """重复运行func并返回BenchmarkResult
+
+    setup在每轮之前调用且不计时，其返回值作为func的参数；func可以返回单个项目的耗时列表，
+    用于计算延迟分位数。每轮之前执行一次垃圾回收，减少上一轮遗留对象的干扰。
+    normalize为True时按主机速度校正耗时（见timed_batches）：func返回timed_batches的结果时每轮耗时
+    取各批之和，否则按该轮前后的参考负载校正。
+    计时轮之后另外运行一轮不计时的内存轮：先归还空闲内存（见release_memory），再测量常驻内存峰值
+    相对该轮开始时的增长作为peak_rss_delta，归还内存后的缺页不会影响计时轮；
+    peak_rss是整个进程到此为止的峰值，受之前运行的基准影响，只作参考。
+    """
+    for _ in range(warmup):
+        func(setup()) if setup else func()
+
+    samples = []
+    item_latency = []
+    for _ in range(rounds):
+        argument = setup() if setup else None
+        gc.collect()
+        before = reference_time() if normalize else None
+        started = time.perf_counter()
+        returned = func(argument) if setup else func()
+        elapsed = time.perf_counter() - started
+        if isinstance(returned, list):
+            item_latency.extend(returned)
+        if normalize:
+            elapsed = sum(returned) if isinstance(returned, list) else normalized(elapsed, before, reference_time())
+        samples.append(elapsed)
+
+    argument = setup() if setup else None
+    release_memory()
+    memory = MemoryProbe()
+    func(argument) if setup else func()
+    memory_delta = memory.delta()
+    memory.close()
+
+    if normalize:
+        extra = {**(extra or {}), "normalized": True}
+    return BenchmarkResult(name, group, samples, items, unit, item_latency or latency,
+                           memory_delta, process_peak_rss(), extra)
+
+
+def environment():
+    """运行环境信息，比较结果时用于判断是否可比"""
+    info = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "aslr": address_randomization(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    for package in ("python-docx", "openpyxl", "lxml", "PyQt6"):
+        try:
+            info[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            info[package] = None
+    return info
+
+
+def save_results(file_path, results, config):
+    """保存为JSON文件"""
+    data = {
+        "environment": environment(),
+        "config": config,
+        "results": {result.name: result.to_dict() for result in results},
+    }
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return data
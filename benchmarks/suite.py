@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+基准用例 - 文档加载、各提取方法、Excel导出、文件列表和端到端批处理
+"""
+
+import os
+import tracemalloc
+
+from PyQt6.QtCore import Qt
+
+from benchmarks.corpus import PROFILES, CorpusSpec, generate_corpus
+from benchmarks.harness import measure, timed_batches
+from models.extraction_rule import ExtractionMode, ExtractionRule
+from models.file_model import FileTableModel
+from models.task_model import BatchExtractionWorker, ExtractionTask
+from utils.docx_parser import DocxParser
+from utils.excel_exporter import ExcelExporter
+
+# 已注册的基准: (分组, 函数)，按注册顺序运行
+BENCHMARKS = []
+
+
+def benchmark(group):
+    """注册基准的装饰器，函数接收BenchmarkContext并返回BenchmarkResult列表，结果名称以分组开头"""
+    def decorator(func):
+        BENCHMARKS.append((group, func))
+        return func
+    return decorator
+
+
+class BenchmarkContext:
+    """基准运行上下文，负责生成和缓存语料"""
+
+    # 快速模式下大文件列表基准的默认规模比例
+    QUICK_FILE_SCALE = 0.05
+
+    def __init__(self, corpus_dir, work_dir, seed=0, quick=False, workers=None, file_scale=None):
+        self.corpus_dir = corpus_dir
+        self.work_dir = work_dir
+        self.seed = seed
+        self.quick = quick
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        # 大文件列表基准的规模比例，未指定时完整运行为1，快速模式为QUICK_FILE_SCALE
+        self.file_scale = file_scale if file_scale is not None else self.QUICK_FILE_SCALE if quick else 1.0
+        self.rounds = 3 if quick else 7
+        self.warmup = 1
+        self._corpora = {}
+
+    def spec(self, profile):
+        """按种子和快速模式调整后的语料规格"""
+        data = PROFILES[profile].to_dict()
+        data["seed"] = self.seed
+        if self.quick:
+            data["documents"] = max(2, data["documents"] // 4)
+        return CorpusSpec(**data)
+
+    def file_count(self, count):
+        """按file_scale调整后的大文件列表规模"""
+        return max(1, int(count * self.file_scale))
+
+    def corpus(self, profile):
+        """返回语料文件路径列表，首次使用时生成"""
+        if profile not in self._corpora:
+            spec = self.spec(profile)
+            directory = os.path.join(self.corpus_dir, f"{profile}_{spec.seed}_{spec.documents}")
+            self._corpora[profile] = generate_corpus(directory, spec)
+        return self._corpora[profile]
+
+    def config(self):
+        """写入结果文件的运行配置"""
+        return {
+            "seed": self.seed,
+            "quick": self.quick,
+            "rounds": self.rounds,
+            "warmup": self.warmup,
+            "workers": self.workers,
+            "file_scale": self.file_scale,
+            "corpora": {profile: self.spec(profile).to_dict() for profile in self._corpora},
+        }
+
+    def run(self, func, name, group, **kwargs):
+        """按上下文的轮数调用measure"""
+        return measure(name, group, func, rounds=self.rounds, warmup=self.warmup, **kwargs)
+
+
+@benchmark("parse")
+def bench_parse_load(context):
+    """各规格语料的文档加载（打开、解析XML、提取段落和表格）"""
+    results = []
+    for profile in PROFILES:
+        paths = context.corpus(profile)
+        size = sum(os.path.getsize(path) for path in paths)
+        results.append(context.run(
+            lambda paths=paths: timed_batches([[path] for path in paths], DocxParser),
+            f"parse.load.{profile}", "parse", items=len(paths), unit="文档",
+            extra={"bytes": size}, normalize=True))
+    return results
+
+
+# 提取方法、参数和每批的调用次数，表格索引等与corpus生成的结构对应。单次调用只需微秒级，
+# 计时抖动和调度会让单次的耗时比例失真，每个计时样本是一批调用（校正后约5毫秒）；
+# 每批的调用次数固定，不按耗时校准，调用次数不同时单次调用的耗时也会不同
+EXTRACT_CALLS = {
+    "extract_with_regex": ((r"合同编号: (HT-\d{4}-\d{3})", 1), 200),
+    "extract_by_position": ((0, 200), 1000),
+    "extract_by_bookmark": (("书签0",), 100),
+    "extract_table_cell": ((0, 1, 2), 20000),
+    "extract_table_column": ((0, 1, True), 3000),
+    "extract_table_row": ((0, 1), 15000),
+    "extract_table": ((0, True), 20000),
+}
+
+# 提取基准每轮的批数
+EXTRACT_BATCHES = 40
+
+
+@benchmark("extract")
+def bench_extract(context):
+    """在已加载的medium语料上调用各extract_*方法，不包含加载时间"""
+    loaded = [DocxParser(path) for path in context.corpus("medium")]
+    results = []
+    for method, (args, calls) in EXTRACT_CALLS.items():
+        def call(parser, method=method, args=args):
+            return getattr(parser, method)(*args)
+
+        batch = [loaded[i % len(loaded)] for i in range(calls)]
+        batches = [batch] * EXTRACT_BATCHES
+        results.append(context.run(
+            lambda batches=batches, call=call: timed_batches(batches, call),
+            f"extract.{method}", "extract", items=EXTRACT_BATCHES, unit="批",
+            extra={"calls_per_batch": calls}, normalize=True))
+    return results
+
+
+# 导出基准的规模，add_row每个计时样本是EXPORT_BATCH行，save每轮保存EXPORT_SAVES次
+EXPORT_ROWS = 2000
+EXPORT_COLUMNS = 10
+EXPORT_BATCH = 50
+EXPORT_SAVES = 8
+
+
+def _export_rows(count):
+    """导出基准使用的行数据"""
+    headers = [f"字段{c}" for c in range(EXPORT_COLUMNS)]
+    return [{header: f"第{r}行{header}的值" for header in headers} for r in range(count)]
+
+
+def _new_exporter(context):
+    """创建输出到工作目录的导出器"""
+    exporter = ExcelExporter()
+    exporter.set_output_file(os.path.join(context.work_dir, "export_bench.xlsx"))
+    return exporter
+
+
+@benchmark("export")
+def bench_export(context):
+    """ExcelExporter.add_row和save"""
+    count = EXPORT_ROWS // 4 if context.quick else EXPORT_ROWS
+    rows = _export_rows(count)
+    batches = [rows[start:start + EXPORT_BATCH] for start in range(0, count, EXPORT_BATCH)]
+
+    def add_rows(exporter):
+        return timed_batches(batches, exporter.add_row)
+
+    def filled_exporter():
+        exporter = _new_exporter(context)
+        add_rows(exporter)
+        return exporter
+
+    extra = {"columns": EXPORT_COLUMNS, "rows": count}
+    return [
+        context.run(add_rows, "export.add_row", "export", items=len(batches), unit="批",
+                    setup=lambda: _new_exporter(context), extra={**extra, "rows_per_batch": EXPORT_BATCH},
+                    normalize=True),
+        context.run(lambda exporter: timed_batches([[exporter]] * EXPORT_SAVES, ExcelExporter.save),
+                    "export.save", "export", items=EXPORT_SAVES, unit="次", setup=filled_exporter, extra=extra,
+                    normalize=True),
+    ]
+
+
+# 文件列表基准的文件数，路径不需要真实存在
+FILE_LIST_SIZE = 20000
+
+
+@benchmark("files")
+def bench_files(context):
+    """FileTableModel.add_files，一次添加和分批添加（每批含已存在的重复路径）"""
+    count = FILE_LIST_SIZE // 4 if context.quick else FILE_LIST_SIZE
+    paths = [os.path.join(context.corpus_dir, f"目录{i % 50}", f"文档_{i:06d}.docx") for i in range(count)]
+    batch = 1000
+
+    def add_batches(model):
+        for start in range(0, count, batch):
+            # 每批与上一批重叠一半，覆盖去重路径
+            model.add_files(paths[max(0, start - batch // 2):start + batch])
+
+    return [
+        context.run(lambda model: model.add_files(paths), "files.add_files", "files", items=count,
+                    unit="文件", setup=FileTableModel),
+        context.run(add_batches, "files.add_files.batched", "files", items=count, unit="文件",
+                    setup=FileTableModel, extra={"batch": batch}),
+    ]
+
+
+# 大文件列表基准的规模：路径索引的批量添加和按需加载列表的首次绘制
+FILE_INDEX_SIZE = 200000
+LAZY_LIST_SIZE = 1000000
+
+# 首次绘制读取的行数，约为一屏
+FIRST_PAINT_ROWS = 50
+
+
+def _file_paths(context, count):
+    """文件列表基准使用的路径，不需要真实存在"""
+    return [os.path.join(context.corpus_dir, f"目录{i % 50}", f"文档_{i:07d}.docx") for i in range(count)]
+
+
+def _first_paint(model):
+    """模拟视图首次绘制：读取第一屏各行各列的显示文本"""
+    for row in range(min(FIRST_PAINT_ROWS, model.rowCount())):
+        for column in range(model.columnCount()):
+            model.data(model.index(row, column), Qt.ItemDataRole.DisplayRole)
+
+
+def _retained_bytes(paths):
+    """添加全部路径后模型保留的Python内存（字节），用tracemalloc单独测量一次，不计入耗时"""
+    tracemalloc.start()
+    try:
+        model = FileTableModel()
+        model.add_files(paths)
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del model
+    return retained
+
+
+@benchmark("files")
+def bench_large_files(context):
+    """大文件列表：20万路径的批量添加（路径索引去重），百万路径从开始分批添加到首次绘制的耗时和内存"""
+    index_count = context.file_count(FILE_INDEX_SIZE)
+    index_paths = _file_paths(context, index_count)
+    lazy_count = context.file_count(LAZY_LIST_SIZE)
+    lazy_paths = _file_paths(context, lazy_count)
+
+    def add_and_paint(model):
+        # 与FileManager.add_files相同：第一批加入后即返回事件循环绘制，其余的批次在之后加入
+        next(model.add_files_in_chunks(lazy_paths))
+        _first_paint(model)
+
+    retained = _retained_bytes(lazy_paths)
+    return [
+        context.run(lambda model: model.add_files(index_paths), "files.add_files.large", "files",
+                    items=index_count, unit="文件", setup=FileTableModel),
+        context.run(add_and_paint, "files.first_paint", "files", items=min(lazy_count, FileTableModel.ADD_CHUNK),
+                    unit="文件", setup=FileTableModel,
+                    extra={"rows": FIRST_PAINT_ROWS, "files": lazy_count, "chunk": FileTableModel.ADD_CHUNK,
+                           "retained_bytes": retained, "bytes_per_file": retained / lazy_count}),
+    ]
+
+
+def benchmark_rules():
+    """端到端基准使用的规则，覆盖正则、书签和表格提取"""
+    return [
+        ExtractionRule("合同编号", ExtractionMode.REGEX, {"pattern": r"合同编号: (HT-\d{4}-\d{3})", "group": 1}),
+        ExtractionRule("签订日期", ExtractionMode.REGEX, {"pattern": r"签订日期: (\S+)", "group": 1}),
+        ExtractionRule("合同金额", ExtractionMode.REGEX, {"pattern": r"合同金额: (\S+)", "group": 1}),
+        ExtractionRule("书签", ExtractionMode.BOOKMARK, {"bookmark_name": "书签0"}),
+        ExtractionRule("单元格", ExtractionMode.TABLE_CELL, {"table_index": 0, "row_index": 1, "column_index": 2}),
+        ExtractionRule("表格行", ExtractionMode.TABLE_ROW, {"table_index": 0, "row_index": 1}),
+    ]
+
+
+@benchmark("batch")
+def bench_batch(context):
+    """端到端批处理：加载、提取、写入Excel并保存，分别用单进程和多进程"""
+    paths = context.corpus("medium")
+    rules = benchmark_rules()
+    output_file = os.path.join(context.work_dir, "batch_bench.xlsx")
+
+    def run_batch(tasks, workers):
+        BatchExtractionWorker(tasks, output_file, False, True, workers).run()
+        return [task.processing_time for task in tasks]
+
+    results = []
+    for workers in sorted({1, context.workers}):
+        results.append(context.run(
+            lambda tasks, workers=workers: run_batch(tasks, workers),
+            f"batch.end_to_end.j{workers}", "batch", items=len(paths), unit="文档",
+            setup=lambda: [ExtractionTask(path, rules) for path in paths],
+            extra={"workers": workers, "rules": len(rules)}))
+    return results
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+命令行批处理 - 不启动界面，直接对文件或目录运行提取规则
+
+用法: python main.py batch 文件或目录... -r 规则.json -o 输出.xlsx [选项]
+      python main.py batch 文件或目录... -t 模板.json -o 输出.xlsx [选项]
+"""
+
+import argparse
+import os
+import sys
+
+from models.extraction_rule import ExtractionRuleModel
+from models.template_router import TemplateRouter
+from models.file_model import DirectoryScanWorker
+from models.task_model import BatchExtractionWorker, ExtractionTask, TaskStatus
+from utils.chrome_trace import ChromeTrace
+from utils.memory_budget import format_size, parse_size
+from utils.profiler import ProfileMode
+from utils.stage_timer import MemoryMode, Stage
+
+
+def build_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="main.py batch", description="批量提取Word文档数据到Excel")
+    parser.add_argument("inputs", nargs="+", help="Word文档或包含文档的目录")
+    rules_group = parser.add_mutually_exclusive_group(required=True)
+    rules_group.add_argument("-r", "--rules", help="规则文件（从界面导出的JSON）")
+    rules_group.add_argument("-t", "--templates",
+                             help="模板文件（JSON），按各模板的特征为每个文档选择规则集，结果按模板写入不同的工作表")
+    parser.add_argument("-o", "--output", required=True, help="输出Excel文件")
+    parser.add_argument("--append", action="store_true", help="追加到现有输出文件")
+    parser.add_argument("--file-info", action="store_true", help="输出中添加文件名和路径字段")
+    parser.add_argument("--no-recursive", action="store_true", help="不扫描子目录")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="并行提取的进程数，默认1")
+    parser.add_argument("--profile", choices=[ProfileMode.DETERMINISTIC, ProfileMode.SAMPLING],
+                        help="在性能分析器下运行，结果保存在输出文件旁")
+    parser.add_argument("--trace", action="store_true",
+                        help="在输出文件旁保存Chrome Trace格式的时间线")
+    parser.add_argument("--memory-budget", type=_size, metavar="大小",
+                        help="内存预算，如 512M、2G（无单位按MB），预计超出的文档跳过，并行时限制同时处理的文档")
+    parser.add_argument("--memory-mode", choices=list(MemoryMode.NAMES), default=MemoryMode.OFF,
+                        help="单个文档内存峰值的测量方式，默认off（不测量）；rss为常驻内存，"
+                             "rss-sampled在无法重置峰值的平台上采样，tracemalloc更精确但更慢")
+    return parser
+
+
+def _size(text):
+    """argparse的大小参数类型"""
+    try:
+        return parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def ensure_std_streams():
+    """打包为窗口程序时标准输出和标准错误为None
+
+    从命令提示符启动时连接到父进程的控制台，否则丢弃输出，保证批处理的进度和结果输出不会失败。
+    """
+    if sys.stdout is not None and sys.stderr is not None:
+        return
+
+    target = os.devnull
+    if os.name == "nt":
+        import ctypes
+
+        attach_parent_process = -1
+        if ctypes.windll.kernel32.AttachConsole(attach_parent_process):
+            target = "CONOUT$"
+
+    if sys.stdout is None:
+        sys.stdout = open(target, "w", errors="replace")
+    if sys.stderr is None:
+        sys.stderr = open(target, "w", errors="replace")
+
+
+def collect_files(inputs, recursive=True):
+    """展开输入的文件和目录，保持输入顺序并去除重复"""
+    files = []
+    seen = set()
+    for path in inputs:
+        if os.path.isdir(path):
+            found = sorted(found_path for found_path, _ in DirectoryScanWorker(path, recursive).scan())
+        elif os.path.isfile(path):
+            found = [path]
+        else:
+            print(f"跳过不存在的路径: {path}", file=sys.stderr)
+            continue
+
+        for file_path in found:
+            key = os.path.normcase(os.path.abspath(file_path))
+            if key not in seen:
+                seen.add(key)
+                files.append(file_path)
+    return files
+
+
+def main(argv=None):
+    """命令行入口，返回进程退出码"""
+    ensure_std_streams()
+    args = build_parser().parse_args(argv)
+
+    router = None
+    if args.templates:
+        try:
+            router = TemplateRouter.load(args.templates)
+        except (OSError, ValueError) as e:
+            print(f"无法加载模板文件 {args.templates}: {e}", file=sys.stderr)
+            return 2
+        if not router.templates:
+            print("模板文件中没有模板", file=sys.stderr)
+            return 2
+        rules = []
+    else:
+        rule_model = ExtractionRuleModel()
+        if not rule_model.load_from_json(args.rules):
+            print(f"无法加载规则文件: {args.rules}", file=sys.stderr)
+            return 2
+        rules = rule_model.get_enabled_rules()
+        if not rules:
+            print("规则文件中没有启用的规则", file=sys.stderr)
+            return 2
+
+    files = collect_files(args.inputs, not args.no_recursive)
+    if not files:
+        print("没有找到Word文档", file=sys.stderr)
+        return 2
+
+    output_file = args.output if args.output.lower().endswith(".xlsx") else args.output + ".xlsx"
+    tasks = [ExtractionTask(path, rules) for path in files]
+    worker = BatchExtractionWorker(tasks, output_file, args.append, not args.file_info,
+                                   args.workers, profile_mode=args.profile, trace=args.trace,
+                                   memory_budget=args.memory_budget, memory_mode=args.memory_mode, router=router)
+
+    errors = []
+    worker.signals.progress.connect(
+        lambda current, total: print(f"\r处理中... {current}/{total}", end="", file=sys.stderr, flush=True))
+    worker.signals.error.connect(errors.append)
+
+    # 在当前线程中同步运行
+    worker.run()
+    print(file=sys.stderr)
+
+    if errors:
+        for error in errors:
+            print(error, file=sys.stderr)
+        return 1
+
+    completed = sum(1 for task in tasks if task.status == TaskStatus.COMPLETED)
+    skipped = sum(1 for task in tasks if task.status == TaskStatus.SKIPPED)
+    print(f"处理完成: {completed}/{len(tasks)} 个文件成功，输出: {output_file}")
+    if router is not None:
+        counts = {template.name: 0 for template in router.templates}
+        for task in tasks:
+            if task.status == TaskStatus.COMPLETED:
+                counts[task.template] += 1
+        print("模板: " + "，".join(f"{name} {count} 个" for name, count in counts.items()))
+    if skipped:
+        print(f"跳过: {skipped} 个文件（路径不匹配或没有匹配的模板）")
+    for task in tasks:
+        if task.status == TaskStatus.FAILED:
+            print(f"  失败: {task.file_path}: {task.error}")
+
+    summary = worker.timing_summary()
+    if summary.total > 0:
+        parts = [f"{Stage.display_name(stage)} {seconds:.2f}s"
+                 for stage, seconds in sorted(summary.grouped().items(), key=lambda item: item[1], reverse=True)]
+        print("耗时分布: " + "，".join(parts))
+    if summary.max_memory_delta or summary.process_peak_rss:
+        parts = []
+        if summary.max_memory_delta:
+            parts.append(f"单文件最高 {format_size(summary.max_memory_delta)}（{summary.max_memory_file}）")
+        if summary.process_peak_rss:
+            parts.append(f"主进程 {format_size(summary.process_peak_rss)}")
+        if summary.over_budget:
+            parts.append(f"超出预算跳过 {summary.over_budget} 个")
+        if summary.deferred:
+            parts.append(f"因预算推迟 {summary.deferred} 个")
+        print("内存峰值: " + "，".join(parts))
+
+    if worker.profiler is not None:
+        print(f"性能分析结果: {worker.profiler.output_path(output_file)}")
+    if worker.trace is not None:
+        print(f"时间线: {ChromeTrace.output_path(output_file)}")
+
+    return 0 if completed + skipped == len(tasks) else 1
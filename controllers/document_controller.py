@@ -5,10 +5,13 @@
 文档控制器 - 处理文档内容的业务逻辑
 """
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 from PyQt6.QtWidgets import QMessageBox
 
 from models.document_model import DocumentManager
+from models.task_model import apply_rule
+from utils.async_worker import AsyncTaskManager
+from utils.docx_parser import DocxParser
 
 
 class DocumentController(QObject):
@@ -16,10 +19,22 @@ class DocumentController(QObject):
 
     documentLoaded = pyqtSignal(object)  # 加载的文档对象
 
+    REGEX_PREVIEW_DELAY = 300  # 输入停止后多久开始匹配（毫秒）
+    REGEX_MAX_MATCHES = 1000  # 实时预览最多高亮的匹配数
+    REGEX_TIME_BUDGET = 0.5  # 单次匹配的时间上限（秒）
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
         self.document_manager = DocumentManager()
+        self.async_manager = AsyncTaskManager()
+
+        # 正则实时预览的防抖定时器
+        self._regex_pattern = ""
+        self.regex_timer = QTimer(self)
+        self.regex_timer.setSingleShot(True)
+        self.regex_timer.setInterval(self.REGEX_PREVIEW_DELAY)
+        self.regex_timer.timeout.connect(self._run_regex_preview)
 
         self._connect_signals()
 
@@ -39,6 +54,18 @@ class DocumentController(QObject):
         # 异步加载文档
         self.document_manager.load_document(file_path)
 
+        # 在后台预先解析相邻文件，继续浏览时可以直接从缓存显示
+        count = self._prefetch_count()
+        if count > 0:
+            self.document_manager.prefetch(self.main_window.file_list_widget.get_neighbour_files(count))
+
+    def _prefetch_count(self):
+        """从配置中读取预取的相邻文件数"""
+        config_manager = getattr(self.main_window.app, "config_manager", None)
+        if config_manager is None:
+            return 0
+        return config_manager.get_value("preview/prefetch_neighbours", 1)
+
     def _on_document_loaded(self, document):
         """文档加载完成回调"""
         if not document:
@@ -53,6 +80,39 @@ class DocumentController(QObject):
         # 发送文档加载信号
         self.documentLoaded.emit(document)
 
+        # 正在编辑正则规则时在新文档上重新匹配
+        if self._regex_pattern:
+            self.regex_timer.start()
+
+    def preview_regex(self, pattern):
+        """在当前文档中实时高亮正则表达式的匹配，空字符串清除高亮"""
+        self._regex_pattern = pattern
+        if not pattern:
+            self.regex_timer.stop()
+            self.async_manager.stop_task("regex_preview")
+            self.main_window.document_viewer.set_regex_matches(None)
+            return
+
+        self.regex_timer.start()
+
+    def _run_regex_preview(self):
+        """防抖结束，在后台线程中匹配当前文档"""
+        document = self.get_current_document()
+        pattern = self._regex_pattern
+        if not pattern or not document or not document.is_loaded:
+            return
+
+        # 同ID的新匹配会取消仍在进行的旧匹配，旧结果不会发出
+        signals = self.async_manager.run_task(
+            "regex_preview", document.find_regex_matches, pattern,
+            self.REGEX_MAX_MATCHES, self.REGEX_TIME_BUDGET, cancel_token=None)
+        signals.result.connect(lambda matches, d=document: self._on_regex_matched(d, matches))
+
+    def _on_regex_matched(self, document, matches):
+        """匹配完成，仍是当前文档和当前输入时显示高亮"""
+        if document is self.get_current_document() and matches.pattern == self._regex_pattern:
+            self.main_window.document_viewer.set_regex_matches(matches)
+
     def _on_load_error(self, error):
         """文档加载错误回调"""
         self.main_window.status_bar.showMessage(f"加载文档失败: {error}")
@@ -68,10 +128,7 @@ class DocumentController(QObject):
         return self.document_manager.get_current_document()
 
     def test_rule_on_document(self, rule):
-        """在当前文档上测试规则"""
-        from utils.docx_parser import DocxParser
-        from views.rule_test_dialog import RuleTestDialog
-
+        """在当前文档上测试规则，解析和提取在后台线程中进行"""
         document = self.get_current_document()
         if not document or not document.is_loaded:
             QMessageBox.warning(
@@ -81,58 +138,32 @@ class DocumentController(QObject):
             )
             return
 
-        try:
-            # 创建文档解析器
-            parser = DocxParser(document.file_path)
-
-            # 应用规则提取数据
-            from models.extraction_rule import ExtractionMode
-
-            result = None
-
-            if rule.rule_type == ExtractionMode.REGEX:
-                pattern = rule.config.get("pattern", "")
-                group = rule.config.get("group", 0)
-                result = parser.extract_with_regex(pattern, group)
+        self.main_window.status_bar.showMessage(f"正在测试规则: {rule.field_name}")
 
-            elif rule.rule_type == ExtractionMode.POSITION:
-                start_index = rule.config.get("start_index", 0)
-                end_index = rule.config.get("end_index")
-                result = parser.extract_by_position(start_index, end_index)
+        # 同ID的新测试会取代尚未完成的旧测试
+        signals = self.async_manager.run_task("rule_test", _apply_rule_to_file, document.file_path, rule,
+                                              cancel_token=None)
+        signals.result.connect(lambda result: self._on_rule_tested(rule, result))
+        signals.error.connect(self._on_rule_test_error)
 
-            elif rule.rule_type == ExtractionMode.BOOKMARK:
-                bookmark_name = rule.config.get("bookmark_name", "")
-                result = parser.extract_by_bookmark(bookmark_name)
-
-            elif rule.rule_type == ExtractionMode.TABLE_CELL:
-                table_index = rule.config.get("table_index", 0)
-                row_index = rule.config.get("row_index", 0)
-                col_index = rule.config.get("column_index", 0)
-                result = parser.extract_table_cell(table_index, row_index, col_index)
-
-            elif rule.rule_type == ExtractionMode.TABLE_COLUMN:
-                table_index = rule.config.get("table_index", 0)
-                col_index = rule.config.get("column_index", 0)
-                has_header = rule.config.get("has_header", True)
-                result = parser.extract_table_column(table_index, col_index, has_header)
+    def _on_rule_tested(self, rule, result):
+        """规则测试完成，显示测试结果对话框"""
+        from views.rule_test_dialog import RuleTestDialog
 
-            elif rule.rule_type == ExtractionMode.TABLE_ROW:
-                table_index = rule.config.get("table_index", 0)
-                row_index = rule.config.get("row_index", 0)
-                result = parser.extract_table_row(table_index, row_index)
+        self.main_window.status_bar.showMessage(f"规则测试完成: {rule.field_name}")
+        dialog = RuleTestDialog(rule, result, self.main_window)
+        dialog.exec()
 
-            elif rule.rule_type == ExtractionMode.TABLE_FULL:
-                table_index = rule.config.get("table_index", 0)
-                has_header = rule.config.get("has_header", True)
-                result = parser.extract_table(table_index, has_header)
+    def _on_rule_test_error(self, error):
+        """规则测试出错"""
+        self.main_window.status_bar.showMessage("规则测试失败")
+        QMessageBox.warning(
+            self.main_window,
+            "测试失败",
+            f"规则测试失败: {error}"
+        )
 
-            # 显示测试结果对话框
-            dialog = RuleTestDialog(rule, result, self.main_window)
-            dialog.exec()
 
-        except Exception as e:
-            QMessageBox.warning(
-                self.main_window,
-                "测试失败",
-                f"规则测试失败: {str(e)}"
-            )
+def _apply_rule_to_file(file_path, rule, cancel_token=None):
+    """解析文档并应用单条规则"""
+    return apply_rule(DocxParser(file_path, cancel_token), rule)
@@ -18,6 +18,18 @@ class FileController(QObject):
         super().__init__(parent)
         self.main_window = parent
 
+        self._apply_scan_patterns()
+
+    def _apply_scan_patterns(self):
+        """从配置中读取目录扫描的包含/排除模式"""
+        config_manager = getattr(self.main_window.app, "config_manager", None)
+        if config_manager is None:
+            return
+
+        file_manager = self.main_window.file_list_widget.file_manager
+        file_manager.include_patterns = config_manager.get_value("files/include_patterns", ["*.docx"])
+        file_manager.exclude_patterns = config_manager.get_value("files/exclude_patterns", [])
+
     def open_files(self):
         """打开文件对话框并添加文件"""
         file_dialog = QFileDialog(self.main_window)
@@ -53,11 +65,4 @@ class FileController(QObject):
             )
 
             recursive = reply == QMessageBox.StandardButton.Yes
-            count = self.main_window.file_list_widget.file_manager.scan_directory(dir_path, recursive)
-
-            if count == 0:
-                QMessageBox.information(
-                    self.main_window,
-                    "没有文件",
-                    "所选目录中未找到Word文档(.docx文件)。"
-                )
+            self.main_window.file_list_widget.scan_directory(dir_path, recursive)
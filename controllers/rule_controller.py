@@ -5,8 +5,10 @@
 规则控制器 - 处理提取规则的业务逻辑
 """
 
-from PyQt6.QtCore import QObject, pyqtSignal
-from PyQt6.QtWidgets import QFileDialog
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
+from views.corpus_test_dialog import CorpusTestDialog
 
 
 class RuleController(QObject):
@@ -17,6 +19,7 @@ class RuleController(QObject):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        self.corpus_test_dialog = None
 
     def create_new_rule(self):
         """创建新规则"""
@@ -34,6 +37,28 @@ class RuleController(QObject):
         """从表格创建规则"""
         self.main_window.rule_list_widget.create_rule_from_table(table_index, row_index, col_index)
 
+    def test_rules_on_corpus(self, rules):
+        """在文件列表上试运行规则并统计命中情况"""
+        if not rules:
+            QMessageBox.warning(self.main_window, "无法测试", "没有启用的提取规则")
+            return
+
+        # 同一时间只保留一个测试窗口，关闭旧窗口会停止其测试
+        if self.corpus_test_dialog is not None:
+            self.corpus_test_dialog.close()
+
+        file_paths = self.main_window.file_list_widget.get_all_files()
+        dialog = CorpusTestDialog(rules, file_paths, self.main_window)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.finished.connect(lambda result, d=dialog: self._on_corpus_test_dialog_closed(d))
+        self.corpus_test_dialog = dialog
+        dialog.show()
+
+    def _on_corpus_test_dialog_closed(self, dialog):
+        """测试窗口关闭"""
+        if dialog is self.corpus_test_dialog:
+            self.corpus_test_dialog = None
+
     def import_rules(self):
         """导入规则"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -34,34 +34,27 @@ class TaskController(QObject):
         self.task_manager.allTasksCompleted.connect(self._on_tasks_completed)
         self.task_manager.taskError.connect(self._on_task_error)
 
-        # 任务面板信号
-        self.main_window.task_panel.startProcessing.connect(self.start_processing)
-        self.main_window.task_panel.stopProcessing.connect(self.stop_processing)
-
         # 文件列表面板信号
-        self.task_manager.taskCompleted.connect(self._on_task_item_completed)
-        self.task_manager.taskFailed.connect(self._on_task_item_failed)
-
-    def _on_task_item_completed(self, index, task):
-        """单个任务完成时更新文件状态"""
-        self._update_file_status(task.file_path, True)
-
-    def _on_task_item_failed(self, index, error):
-        """单个任务失败时更新文件状态"""
-        if index < len(self.task_manager.tasks):
-            task = self.task_manager.tasks[index]
-            self._update_file_status(task.file_path, False, error)
-
-    def _update_file_status(self, file_path, is_success, error=""):
-        """更新文件列表中的文件状态"""
-        self.main_window.file_list_widget.update_file_status(file_path, is_success, error)
+        self.task_manager.tasksUpdated.connect(self._on_tasks_updated)
+
+    def _on_tasks_updated(self, updates):
+        """一批任务完成或失败时批量更新文件状态"""
+        tasks = self.task_manager.tasks
+        statuses = [
+            (tasks[index].file_path, success, error)
+            for index, success, error in updates
+            if index < len(tasks)
+        ]
+        self.main_window.file_list_widget.update_file_statuses(statuses)
 
     def update_rules(self, rules):
         """更新规则列表"""
         self.current_rules = rules
 
-    def start_processing(self, output_file, append_mode, skip_file_info=False):
+    def start_processing(self, output_file, append_mode, skip_file_info=False, options=None):
         """开始处理任务"""
+        options = options or {}
+
         # 获取文件列表
         files = self.main_window.file_list_widget.get_all_files()
         if not files:
@@ -74,12 +67,50 @@ class TaskController(QObject):
             self.main_window.status_bar.showMessage("没有启用的提取规则")
             return
 
-        # 创建任务
-        tasks = self.task_manager.create_tasks(files, rules)
+        # 创建任务，附带已知的文件大小用于并行调度时的成本估算（未读取的由调度器自行获取）
+        file_sizes = self.main_window.file_list_widget.file_manager.model.known_sizes()
+        tasks = self.task_manager.create_tasks(files, rules, file_sizes)
 
         # 开始处理
         self.main_window.status_bar.showMessage("开始处理任务...")
-        self.task_manager.start_processing(output_file, append_mode, skip_file_info)
+        self.task_manager.start_processing(output_file, append_mode, skip_file_info,
+                                           options.get("max_workers", 1),
+                                           profile_mode=options.get("profile_mode"),
+                                           trace=options.get("trace", False),
+                                           memory_budget=options.get("memory_budget"),
+                                           memory_mode=options.get("memory_mode"))
+
+    def retry_failed(self, output_file, skip_file_info=False, options=None):
+        """只重新处理上一批次中失败或被取消的文件"""
+        options = options or {}
+
+        rules = self.main_window.rule_list_widget.get_enabled_rules()
+        if not rules:
+            self.main_window.status_bar.showMessage("没有启用的提取规则")
+            self.main_window.task_panel.processing_failed("没有启用的提取规则")
+            return
+
+        tasks = self.task_manager.create_retry_tasks(rules)
+        if not tasks:
+            self.main_window.status_bar.showMessage("没有需要重试的文件")
+            self.main_window.task_panel.set_retry_count(0)
+            return
+
+        self.main_window.status_bar.showMessage(f"开始重试 {len(tasks)} 个文件...")
+        self.task_manager.start_processing(output_file, True, skip_file_info,
+                                           options.get("max_workers", 1), reuse_output=True,
+                                           profile_mode=options.get("profile_mode"),
+                                           trace=options.get("trace", False),
+                                           memory_budget=options.get("memory_budget"),
+                                           memory_mode=options.get("memory_mode"))
+
+    def pause_processing(self, paused):
+        """暂停或继续处理任务"""
+        if paused:
+            if self.task_manager.pause_processing():
+                self.main_window.status_bar.showMessage("处理已暂停")
+        elif self.task_manager.resume_processing():
+            self.main_window.status_bar.showMessage("继续处理...")
 
     def stop_processing(self):
         """停止处理任务"""
@@ -103,9 +134,15 @@ class TaskController(QObject):
         self.processingFinished.emit()
         self.main_window.status_bar.showMessage("任务处理完成")
 
+        self.main_window.task_panel.set_retry_count(stats["failed"] + stats["canceled"])
+        self.main_window.task_panel.set_stage_summary(self.task_manager.get_stage_summary())
+        self.main_window.task_panel.set_slow_report(self.task_manager.slow_report)
+        if self.task_manager.rule_profile is not None:
+            self.main_window.rule_list_widget.set_rule_profiles(self.task_manager.rule_profile.by_rule_id())
         self.main_window.task_panel.processing_completed(
             stats["completed"],
-            stats["total"]
+            stats["total"],
+            stats["skipped"]
         )
 
     def _on_task_error(self, error):
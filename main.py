@@ -5,6 +5,7 @@
 Word文档数据提取器 - 主入口文件
 """
 
+import multiprocessing
 import os
 import sys
 
@@ -135,6 +136,15 @@ class Application(QApplication):
 
 
 if __name__ == "__main__":
+    # 打包后的程序需要支持并行提取时创建子进程
+    multiprocessing.freeze_support()
+
+    # 命令行批处理，不启动界面
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from cli import main as cli_main
+
+        sys.exit(cli_main(sys.argv[2:]))
+
     try:
         # 检查是否在Windows系统中运行
         if os.name == 'nt':
@@ -5,12 +5,29 @@
 文档内容模型 - 处理Word文档内容
 """
 
+import bisect
+import html
 import os
 import re
+import time
+from collections import OrderedDict
 
-from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QRunnable, QThreadPool
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, pyqtSignal, pyqtSlot, QRunnable
 from docx import Document
 
+from utils.task_scheduler import Priority, TaskScheduler
+
+
+class RegexMatches:
+    """正则表达式在文档段落上的匹配结果，位置以段落为单位，跨段落的匹配会被拆分"""
+
+    def __init__(self, pattern=""):
+        self.pattern = pattern
+        self.spans = []  # (段落索引, 段内起始位置, 段内结束位置)
+        self.count = 0  # 匹配数
+        self.truncated = False  # 是否因数量或时间限制提前结束
+        self.error = ""
+
 
 class DocumentContent:
     """表示文档内容的类"""
@@ -29,6 +46,10 @@ class DocumentContent:
         # 原始文档对象
         self.document = None
 
+        # 段落合并后的全文及每个段落在全文中的起始位置，首次使用时生成
+        self._joined_text = None
+        self._paragraph_offsets = None
+
         # 加载状态
         self.is_loaded = False
         self.load_error = ""
@@ -51,7 +72,8 @@ class DocumentContent:
             self.created_date = core_props.created or "未知"
             self.last_modified_date = core_props.modified or "未知"
 
-            # 提取段落
+            # 提取段落，空段落也保留，段落索引和合并后的全文与DocxParser一致，
+            # 预览中的正则高亮和按位置提取的结果与实际提取相同
             self.paragraphs = [
                 {
                     "index": i,
@@ -59,7 +81,7 @@ class DocumentContent:
                     "style": p.style.name,
                     "level": p.paragraph_format.alignment
                 }
-                for i, p in enumerate(self.document.paragraphs) if p.text.strip()
+                for i, p in enumerate(self.document.paragraphs)
             ]
 
             # 提取表格
@@ -89,53 +111,125 @@ class DocumentContent:
             return False
 
     def get_table_as_html(self, table_index):
-        """将表格转换为HTML格式以便显示"""
+        """将表格转换为HTML格式以便显示（大表格请使用DocumentTableModel）"""
         if not self.is_loaded or table_index >= len(self.tables):
             return "<p>表格不可用</p>"
 
         table = self.tables[table_index]
 
-        html = "<table border='1' cellpadding='3' style='border-collapse: collapse;'>"
-
+        parts = ["<table border='1' cellpadding='3' style='border-collapse: collapse;'>"]
         for row in table["data"]:
-            html += "<tr>"
-            for cell in row:
-                html += f"<td>{cell['text']}</td>"
-            html += "</tr>"
+            parts.append("<tr>")
+            parts.extend(f"<td>{html.escape(cell['text'])}</td>" for cell in row)
+            parts.append("</tr>")
+        parts.append("</table>")
 
-        html += "</table>"
-        return html
+        return "".join(parts)
 
-    def get_document_html(self):
-        """将文档内容转换为HTML格式以便显示"""
+    def get_header_html(self):
+        """文档标题和元数据部分的HTML"""
         if not self.is_loaded:
-            return f"<p>文档加载失败: {self.load_error}</p>"
-
-        html = f"<h1>{self.title}</h1>"
-        html += f"<p><b>作者:</b> {self.author}</p>"
-        html += f"<p><b>创建日期:</b> {self.created_date}</p>"
-        html += f"<p><b>最后修改:</b> {self.last_modified_date}</p>"
-        html += "<hr/>"
-
-        # 添加段落
-        for para in self.paragraphs:
-            style = ""
+            return f"<p>文档加载失败: {html.escape(self.load_error)}</p>"
+
+        return (
+            f"<h1>{html.escape(str(self.title))}</h1>"
+            f"<p><b>作者:</b> {html.escape(str(self.author))}</p>"
+            f"<p><b>创建日期:</b> {self.created_date}</p>"
+            f"<p><b>最后修改:</b> {self.last_modified_date}</p>"
+            "<hr/>"
+        )
+
+    def get_paragraphs_html(self, start, end):
+        """将指定范围的段落转换为HTML，用于分页加载预览"""
+        parts = []
+        for para in self.paragraphs[start:end]:
+            text = html.escape(para["text"])
+            style = para["style"] or ""
 
             # 根据段落样式应用不同的HTML样式
-            if para["style"].startswith("Heading"):
-                level = int(para["style"].replace("Heading ", "")) if para["style"] != "Heading" else 1
+            if style.startswith("Heading"):
+                level_text = style.replace("Heading", "").strip()
+                level = int(level_text) if level_text.isdigit() else 1
                 if 1 <= level <= 6:
-                    html += f"<h{level}>{para['text']}</h{level}>"
+                    parts.append(f"<h{level}>{text}</h{level}>")
                     continue
 
-            html += f"<p>{para['text']}</p>"
+            parts.append(f"<p>{text}</p>")
+
+        return "".join(parts)
+
+    def get_document_html(self):
+        """将文档内容转换为HTML格式以便显示
+
+        一次生成整个文档，大文档的预览请使用get_header_html和get_paragraphs_html分页加载。
+        """
+        if not self.is_loaded:
+            return self.get_header_html()
+
+        parts = [self.get_header_html(), self.get_paragraphs_html(0, len(self.paragraphs))]
 
         # 添加表格
-        for i, table in enumerate(self.tables):
-            html += f"<h3>表格 {i + 1}</h3>"
-            html += self.get_table_as_html(i)
+        for i in range(len(self.tables)):
+            parts.append(f"<h3>表格 {i + 1}</h3>")
+            parts.append(self.get_table_as_html(i))
+
+        return "".join(parts)
+
+    def get_joined_text(self):
+        """获取以换行合并的段落全文和每个段落的起始位置"""
+        if self._joined_text is None:
+            offsets = []
+            position = 0
+            for para in self.paragraphs:
+                offsets.append(position)
+                position += len(para["text"]) + 1
+            self._paragraph_offsets = offsets
+            self._joined_text = "\n".join(para["text"] for para in self.paragraphs)
+        return self._joined_text, self._paragraph_offsets
+
+    def find_regex_matches(self, pattern, max_matches=1000, time_budget=0.5, cancel_token=None):
+        """在全文上查找正则匹配，用于实时预览
+
+        匹配数超过max_matches或耗时超过time_budget秒时提前结束；
+        每次匹配之间检查取消令牌，新的输入可以立即取代旧的查找。
+        """
+        matches = RegexMatches(pattern)
+        if not self.is_loaded or not pattern:
+            return matches
 
-        return html
+        try:
+            regex = re.compile(pattern)
+        except re.error as e:
+            matches.error = f"正则表达式错误: {str(e)}"
+            return matches
+
+        text, offsets = self.get_joined_text()
+        deadline = time.monotonic() + time_budget
+
+        for match in regex.finditer(text):
+            if cancel_token is not None:
+                cancel_token.check()
+            if matches.count >= max_matches or time.monotonic() > deadline:
+                matches.truncated = True
+                break
+
+            start, end = match.span()
+            if start == end:
+                continue
+
+            # 按段落拆分匹配范围
+            para = bisect.bisect_right(offsets, start) - 1
+            while start < end and para < len(offsets):
+                para_start = offsets[para]
+                para_end = para_start + len(self.paragraphs[para]["text"])
+                if start < para_end:
+                    matches.spans.append((para, start - para_start, min(end, para_end) - para_start))
+                start = para_end + 1
+                para += 1
+
+            matches.count += 1
+
+        return matches
 
     def extract_text_with_regex(self, pattern, group=0):
         """使用正则表达式从文档中提取文本"""
@@ -196,6 +290,77 @@ class DocumentContent:
         return result
 
 
+class DocumentTableModel(QAbstractTableModel):
+    """文档表格模型，配合QTableView只绘制可见的单元格
+
+    行按批次提供给视图，滚动到底部时再加载下一批，几万行的表格也能立即显示。
+    """
+
+    FETCH_BATCH = 1000  # 每次向视图提供的行数
+
+    def __init__(self, table=None, parent=None):
+        super().__init__(parent)
+        self.table = None
+        self._rows = []
+        self._column_count = 0
+        self._visible_count = 0
+        self.set_table(table)
+
+    def set_table(self, table):
+        """设置要显示的表格（DocumentContent.tables中的一项）"""
+        self.beginResetModel()
+        self.table = table
+        self._rows = table["data"] if table else []
+        self._column_count = max((len(row) for row in self._rows), default=0)
+        self._visible_count = min(len(self._rows), self.FETCH_BATCH)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        """返回已提供给视图的行数"""
+        if parent.isValid():
+            return 0
+        return self._visible_count
+
+    def columnCount(self, parent=QModelIndex()):
+        """返回列数"""
+        if parent.isValid():
+            return 0
+        return self._column_count
+
+    def canFetchMore(self, parent=QModelIndex()):
+        """是否还有未提供给视图的行"""
+        if parent.isValid():
+            return False
+        return self._visible_count < len(self._rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        """向视图提供下一批行"""
+        if parent.isValid():
+            return
+        count = min(self.FETCH_BATCH, len(self._rows) - self._visible_count)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._visible_count, self._visible_count + count - 1)
+        self._visible_count += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        """返回单元格数据"""
+        if not index.isValid() or role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            return None
+
+        row = self._rows[index.row()]
+        if index.column() >= len(row):
+            return None
+        return row[index.column()]["text"]
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        """行列号从1开始显示，与规则配置中的索引区分"""
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(section + 1)
+        return None
+
+
 class DocumentLoadWorker(QRunnable):
     """用于异步加载文档的工作线程"""
 
@@ -204,9 +369,11 @@ class DocumentLoadWorker(QRunnable):
         finished = pyqtSignal(DocumentContent)
         error = pyqtSignal(str)
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, key=None):
         super().__init__()
         self.file_path = file_path
+        self.key = key  # 文档管理器中的缓存键
+        self.generation = None  # 对应的预览请求代号，仅作为预取时为None
         self.signals = self.Signals()
 
     @pyqtSlot()
@@ -223,23 +390,110 @@ class DocumentLoadWorker(QRunnable):
 
 
 class DocumentManager(QObject):
-    """文档管理器，处理文档加载与内容管理"""
+    """文档管理器，处理文档加载与内容管理
+
+    每次预览请求分配一个递增的代号，只有最新请求的结果会被发出，
+    被后续请求取代的加载要么在排队时直接移出队列，要么结果被丢弃。
+    已解析的文档保存在一个小的LRU缓存中，相邻文件可以提前在后台解析。
+    """
 
     documentLoaded = pyqtSignal(DocumentContent)
     loadError = pyqtSignal(str)
 
+    CACHE_SIZE = 8  # 缓存的已解析文档数
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_document = None
-        self.thread_pool = QThreadPool()
-        self.thread_pool.setMaxThreadCount(4)  # 限制最大线程数
+        self.scheduler = TaskScheduler.instance()
+
+        self._generation = 0  # 最新预览请求的代号
+        self._load_worker = None  # 最新请求的加载任务
+        self._cache = OrderedDict()  # 缓存键 -> DocumentContent
+        self._in_flight = {}  # 缓存键 -> 正在加载或预取的工作线程
+
+    @staticmethod
+    def cache_key(file_path):
+        """文档缓存键：规范化路径加修改时间和大小，文件被修改后缓存自动失效"""
+        try:
+            stat = os.stat(file_path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = None
+        return os.path.normcase(os.path.abspath(file_path)), version
 
     def load_document(self, file_path):
-        """异步加载文档"""
-        worker = DocumentLoadWorker(file_path)
-        worker.signals.finished.connect(self._on_document_loaded)
-        worker.signals.error.connect(self._on_load_error)
-        self.thread_pool.start(worker)
+        """异步加载文档，取代之前尚未完成的请求"""
+        self._generation += 1
+        key = self.cache_key(file_path)
+
+        # 取消被取代的加载任务：排队中的直接移出队列，已在运行的结果因代号过期被丢弃
+        if self._load_worker is not None and self._load_worker.key != key:
+            if self.scheduler.cancel(self._load_worker):
+                self._in_flight.pop(self._load_worker.key, None)
+        self._load_worker = None
+
+        # 命中缓存时立即显示
+        document = self._cache.get(key)
+        if document is not None:
+            self._cache.move_to_end(key)
+            self._on_document_loaded(document)
+            return
+
+        # 相同文档已在加载或预取中时沿用该任务；仍在排队的预取提升为交互优先级
+        worker = self._in_flight.get(key)
+        if worker is not None and self.scheduler.cancel(worker):
+            worker = None
+        if worker is None:
+            worker = self._start_worker(file_path, key, Priority.INTERACTIVE)
+
+        worker.generation = self._generation
+        self._load_worker = worker
+
+    def prefetch(self, file_paths):
+        """在后台预先解析文件并放入缓存，不影响当前显示的文档"""
+        for file_path in file_paths:
+            key = self.cache_key(file_path)
+            if key in self._cache or key in self._in_flight:
+                continue
+            self._start_worker(file_path, key, Priority.BACKGROUND)
+
+    def _start_worker(self, file_path, key, priority):
+        """提交加载任务"""
+        worker = DocumentLoadWorker(file_path, key)
+        worker.signals.finished.connect(lambda document, w=worker: self._on_worker_finished(w, document))
+        worker.signals.error.connect(lambda error, w=worker: self._on_worker_error(w, error))
+
+        self._in_flight[key] = worker
+        self.scheduler.submit(worker, priority)
+        return worker
+
+    def _on_worker_finished(self, worker, document):
+        """加载任务完成：结果放入缓存，仅当它仍是最新请求时才发出"""
+        if self._in_flight.get(worker.key) is worker:
+            del self._in_flight[worker.key]
+
+        self._cache[worker.key] = document
+        self._cache.move_to_end(worker.key)
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+        if worker.generation == self._generation:
+            self._load_worker = None
+            self._on_document_loaded(document)
+
+    def _on_worker_error(self, worker, error):
+        """加载任务出错：预取和已被取代的请求不提示错误"""
+        if self._in_flight.get(worker.key) is worker:
+            del self._in_flight[worker.key]
+
+        if worker.generation == self._generation:
+            self._load_worker = None
+            self._on_load_error(error)
+
+    def clear_cache(self):
+        """清空已解析文档缓存"""
+        self._cache.clear()
 
     def _on_document_loaded(self, document):
         """文档加载完成回调"""
@@ -13,6 +13,9 @@ from enum import Enum
 from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal, QObject
 from PyQt6.QtGui import QColor, QFont, QIcon
 
+from utils.doc_properties import PROPERTY_NAMES
+from utils.path_rules import PATH_SOURCES
+
 
 class ExtractionMode(Enum):
     """提取模式枚举"""
@@ -23,6 +26,8 @@ class ExtractionMode(Enum):
     TABLE_COLUMN = "表格列"
     TABLE_ROW = "表格行"
     TABLE_FULL = "完整表格"
+    METADATA = "文档属性"
+    FILE_PATH = "文件路径"
 
 
 class ExtractionRule:
@@ -115,6 +120,13 @@ class ExtractionRule:
             table = self.config.get('table_index', 0)
             has_header = self.config.get('has_header', True)
             return f"表格 {table + 1}, " + ("含表头" if has_header else "无表头")
+        elif self.rule_type == ExtractionMode.METADATA:
+            name = self.config.get('property', '')
+            return f"属性: {PROPERTY_NAMES.get(name, name or '未设置')}"
+        elif self.rule_type == ExtractionMode.FILE_PATH:
+            source = PATH_SOURCES.get(self.config.get('source', 'name'), '路径')
+            summary = f"{source}: {self.config.get('pattern', '未设置')}"
+            return summary + ("（不匹配时跳过）" if self.config.get('required') else "")
         else:
             return "未知配置"
 
@@ -127,6 +139,7 @@ class ExtractionRuleModel(QAbstractListModel):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.rules = []
+        self.profiles = {}  # 规则ID -> 最近一次批处理的统计（RuleProfile.to_dict()）
 
     def rowCount(self, parent=QModelIndex()):
         """返回行数"""
@@ -142,7 +155,16 @@ class ExtractionRuleModel(QAbstractListModel):
         if role == Qt.ItemDataRole.DisplayRole:
             return f"{rule.field_name} ({rule.type_name})"
         elif role == Qt.ItemDataRole.ToolTipRole:
-            return f"{rule.field_name}: {rule.get_config_summary()}"
+            tooltip = f"{rule.field_name}: {rule.get_config_summary()}"
+            profile = self.profiles.get(rule.id)
+            if profile:
+                tooltip += (f"\n\n最近一次批处理（{profile['documents']} 个文件）:"
+                            f"\n命中率: {profile['hit_rate']:.1%}"
+                            f"（命中 {profile['hits']}，空结果 {profile['empty']}，错误 {profile['errors']}）"
+                            f"\n总耗时: {profile['total_time']:.3f} 秒"
+                            f"\n单文件平均: {profile['mean_time'] * 1000:.2f} 毫秒，"
+                            f"P95: {profile['p95_time'] * 1000:.2f} 毫秒")
+            return tooltip
         elif role == Qt.ItemDataRole.UserRole:
             return rule
         # 添加文本颜色和字体样式特征表示启用/禁用状态
@@ -242,6 +264,13 @@ class ExtractionRuleModel(QAbstractListModel):
         """获取所有启用的规则"""
         return [rule for rule in self.rules if rule.enabled]
 
+    def set_profiles(self, profiles):
+        """设置各规则最近一次批处理的统计，显示在提示中"""
+        self.profiles = dict(profiles)
+        if self.rules:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.rules) - 1, 0),
+                                  [Qt.ItemDataRole.ToolTipRole])
+
     def clear(self):
         """清空所有规则"""
         self.beginResetModel()
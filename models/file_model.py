@@ -5,40 +5,117 @@
 文件管理模型 - 处理文件列表和文件操作
 """
 
+import bisect
+import fnmatch
 import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 
-from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal, QObject
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal, pyqtSlot, QObject, QRunnable, \
+    QSortFilterProxyModel, QTimer
+
+from utils.package_validator import InvalidPackageError, validate_package
+from utils.task_scheduler import Priority, TaskScheduler
 
 
 class FileItem:
-    """表示单个文件项"""
+    """表示单个文件项
+
+    使用__slots__减少百万级文件列表的内存占用。大小和时间以原始数值保存，
+    在首次访问时才读取文件信息，格式化后的字符串会被缓存。
+    """
+
+    __slots__ = ("path", "file_name", "_stat_loaded", "_size", "_ctime", "_mtime",
+                 "_size_text", "_mtime_text", "is_processed", "processing_status", "error_message")
 
-    def __init__(self, path):
+    UNPROCESSED = "未处理"  # 新加入文件的状态
+
+    def __init__(self, path, stat=None):
         self.path = path
         self.file_name = os.path.basename(path)
-        self.file_ext = os.path.splitext(path)[1].lower()
 
-        # 获取文件基本信息
-        stat = os.stat(path)
-        self.size = stat.st_size
-        self.created_time = datetime.fromtimestamp(stat.st_ctime)
-        self.modified_time = datetime.fromtimestamp(stat.st_mtime)
+        # 文件基本信息（扫描时可直接传入已有的stat结果，否则延迟读取）
+        self._stat_loaded = False
+        self._size = 0
+        self._ctime = 0
+        self._mtime = 0
+        self._size_text = None
+        self._mtime_text = None
+        if stat is not None:
+            self._apply_stat(stat)
 
         # 状态标记
         self.is_processed = False
-        self.processing_status = "未处理"
+        self.processing_status = self.UNPROCESSED
         self.error_message = ""
 
+    def _apply_stat(self, stat):
+        """保存stat结果中的原始数值"""
+        self._size = stat.st_size
+        self._ctime = int(stat.st_ctime)
+        self._mtime = int(stat.st_mtime)
+        self._stat_loaded = True
+
+    def ensure_stat(self):
+        """确保文件信息已读取"""
+        if not self._stat_loaded:
+            try:
+                self._apply_stat(os.stat(self.path))
+            except OSError:
+                # 文件不可访问时按空文件处理，避免反复尝试
+                self._stat_loaded = True
+
+    @property
+    def file_ext(self):
+        """文件扩展名（小写）"""
+        return os.path.splitext(self.path)[1].lower()
+
+    @property
+    def known_size(self):
+        """已读取的文件大小，尚未读取时返回None"""
+        return self._size if self._stat_loaded else None
+
+    @property
+    def size(self):
+        """文件大小（字节）"""
+        self.ensure_stat()
+        return self._size
+
+    @property
+    def created_timestamp(self):
+        """创建时间（整数时间戳）"""
+        self.ensure_stat()
+        return self._ctime
+
+    @property
+    def modified_timestamp(self):
+        """修改时间（整数时间戳）"""
+        self.ensure_stat()
+        return self._mtime
+
+    @property
+    def created_time(self):
+        """创建时间"""
+        return datetime.fromtimestamp(self.created_timestamp)
+
+    @property
+    def modified_time(self):
+        """修改时间"""
+        return datetime.fromtimestamp(self.modified_timestamp)
+
     @property
     def size_formatted(self):
         """格式化文件大小"""
-        kb = self.size / 1024
-        if kb < 1024:
-            return f"{kb:.2f} KB"
-        else:
-            mb = kb / 1024
-            return f"{mb:.2f} MB"
+        if self._size_text is None:
+            kb = self.size / 1024
+            if kb < 1024:
+                self._size_text = f"{kb:.2f} KB"
+            else:
+                mb = kb / 1024
+                self._size_text = f"{mb:.2f} MB"
+        return self._size_text
 
     @property
     def created_time_formatted(self):
@@ -48,31 +125,218 @@ class FileItem:
     @property
     def modified_time_formatted(self):
         """格式化修改时间"""
-        return self.modified_time.strftime("%Y-%m-%d %H:%M:%S")
+        if self._mtime_text is None:
+            self._mtime_text = self.modified_time.strftime("%Y-%m-%d %H:%M:%S")
+        return self._mtime_text
+
+    def set_invalid(self, reason):
+        """标记为预检未通过的无效文档"""
+        self.is_processed = False
+        self.processing_status = "无效文档"
+        self.error_message = reason
 
     def set_processed(self, status=True, error=""):
-        """设置处理状态"""
+        """设置处理状态，status为None表示按规则跳过"""
+        if status is None:
+            self.is_processed = False
+            self.processing_status = "已跳过"
+            self.error_message = error
+            return
+
         self.is_processed = status
         if error:
             self.processing_status = "处理失败"
             self.error_message = error
         else:
-            self.processing_status = "已处理" if status else "未处理"
+            self.processing_status = "已处理" if status else self.UNPROCESSED
 
 
 class FileTableModel(QAbstractTableModel):
-    """文件表格模型，用于在表格视图中显示文件列表"""
+    """文件表格模型，用于在表格视图中显示文件列表
+
+    模型按需向视图提供行：_paths保存全部文件路径，视图只能看到前
+    _visible_count行，滚动到底部时通过fetchMore继续加载。文件项在第一次被读取时才创建，
+    批量添加只需规范化路径和建立索引，百万级列表也不会为视图之外的行创建对象。
+    """
 
     # 列定义
     COLUMNS = ["文件名", "大小", "修改日期", "状态"]
 
+    FETCH_BATCH = 1000  # 每次向视图提供的行数
+    ADD_CHUNK = 20000  # 分批添加时每批的路径数
+
+    # 排序使用原始值（小写文件名、字节数、时间戳）而不是格式化后的字符串
+    SortRole = Qt.ItemDataRole.UserRole + 1
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.files = []  # 文件项列表
+        self._paths = []  # 文件路径列表
+        self._items = []  # 与_paths对应的文件项，尚未创建的为None
+        self._row_index = {}  # 规范化路径 -> 行号
+        self._status_rows = {}  # 处理状态 -> 行号集合，不包括占绝大多数的未处理状态
+        self._visible_count = 0  # 已提供给视图的行数
+
+        # 文件名搜索索引：所有小写文件名以换行连接，配合每行的起始偏移定位
+        self._search_text = None
+        self._search_offsets = None
+
+    @staticmethod
+    def normalize_path(path):
+        """规范化文件路径，用于去重和查找"""
+        return os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def normalize_paths(paths):
+        """批量规范化文件路径，结果与逐个调用normalize_path相同"""
+        return list(map(os.path.normcase, map(os.path.abspath, paths)))
+
+    def _rebuild_index(self, start=0):
+        """从指定行开始重建路径索引和状态索引"""
+        self._invalidate_search_index()
+        if start == 0:
+            self._row_index = {}
+        self._row_index.update(zip(self.normalize_paths(self._paths[start:]), range(start, len(self._paths))))
+
+        self._status_rows = {status: {row for row in rows if row < start}
+                             for status, rows in self._status_rows.items()}
+        for row in range(start, len(self._items)):
+            file_item = self._items[row]
+            if file_item is not None and file_item.processing_status != FileItem.UNPROCESSED:
+                self._status_rows.setdefault(file_item.processing_status, set()).add(row)
+
+    def _item(self, row):
+        """指定行的文件项，第一次访问时创建"""
+        file_item = self._items[row]
+        if file_item is None:
+            file_item = self._items[row] = FileItem(self._paths[row])
+        return file_item
+
+    def _status(self, row):
+        """指定行的处理状态，不为此创建文件项"""
+        file_item = self._items[row]
+        return FileItem.UNPROCESSED if file_item is None else file_item.processing_status
+
+    def _update_item(self, row, update, *args):
+        """调用update(文件项, *args)修改指定行的处理状态，同时维护状态索引"""
+        file_item = self._item(row)
+        old_status = file_item.processing_status
+        update(file_item, *args)
+
+        new_status = file_item.processing_status
+        if new_status != old_status:
+            if old_status != FileItem.UNPROCESSED:
+                self._status_rows[old_status].discard(row)
+            if new_status != FileItem.UNPROCESSED:
+                self._status_rows.setdefault(new_status, set()).add(row)
+
+    def find_row(self, path):
+        """根据文件路径查找行号，不存在时返回-1"""
+        return self._row_index.get(self.normalize_path(path), -1)
+
+    def contains(self, path):
+        """检查文件是否已在列表中"""
+        return self.normalize_path(path) in self._row_index
+
+    def _invalidate_search_index(self):
+        """文件列表变化后使搜索索引失效，下次搜索时重建"""
+        self._search_text = None
+        self._search_offsets = None
+
+    def _ensure_search_index(self):
+        """构建文件名搜索索引"""
+        if self._search_text is not None:
+            return
+
+        names = [os.path.basename(path).lower() for path in self._paths]
+        offsets = []
+        position = 0
+        for name in names:
+            offsets.append(position)
+            position += len(name) + 1
+
+        self._search_text = "\n".join(names)
+        self._search_offsets = offsets
+
+    def match_rows(self, text="", status=None):
+        """查找文件名包含text（不区分大小写）且处理状态为status的行
+
+        没有任何过滤条件时返回None，否则返回行号集合。
+        """
+        rows = None
+
+        needle = text.lower().replace("\n", "")
+        if needle:
+            self._ensure_search_index()
+            haystack = self._search_text
+            offsets = self._search_offsets
+
+            rows = set()
+            start = haystack.find(needle)
+            while start != -1:
+                row = bisect.bisect_right(offsets, start) - 1
+                rows.add(row)
+                # 同一文件名只需匹配一次，直接跳到下一行继续查找
+                next_start = offsets[row + 1] if row + 1 < len(offsets) else len(haystack)
+                start = haystack.find(needle, next_start)
+
+        if status:
+            if status == FileItem.UNPROCESSED:
+                # 未处理状态不建索引，取其余状态的补集
+                status_rows = set(range(len(self._paths))).difference(*self._status_rows.values())
+            else:
+                status_rows = self._status_rows.get(status, set())
+            rows = set(status_rows) if rows is None else rows & status_rows
+
+        return rows
 
     def rowCount(self, parent=QModelIndex()):
-        """返回行数"""
-        return len(self.files)
+        """返回已提供给视图的行数"""
+        if parent.isValid():
+            return 0
+        return self._visible_count
+
+    def file_count(self):
+        """返回文件总数（包括尚未提供给视图的行）"""
+        return len(self._paths)
+
+    def paths(self, start=0):
+        """从start行开始的全部文件路径（包括尚未提供给视图的行）"""
+        return self._paths[start:]
+
+    def known_sizes(self):
+        """已读取过文件信息的文件大小，文件路径 -> 字节数"""
+        return {item.path: item.known_size for item in self._items
+                if item is not None and item.known_size is not None}
+
+    def canFetchMore(self, parent=QModelIndex()):
+        """是否还有未提供给视图的行"""
+        if parent.isValid():
+            return False
+        return self._visible_count < len(self._paths)
+
+    def fetchMore(self, parent=QModelIndex()):
+        """向视图多提供一批行"""
+        if parent.isValid():
+            return
+
+        remaining = len(self._paths) - self._visible_count
+        count = min(self.FETCH_BATCH, remaining)
+        if count <= 0:
+            return
+
+        self.beginInsertRows(QModelIndex(), self._visible_count, self._visible_count + count - 1)
+        self._visible_count += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        """一次性向视图提供所有行"""
+        remaining = len(self._paths) - self._visible_count
+        if remaining <= 0:
+            return
+
+        self.beginInsertRows(QModelIndex(), self._visible_count, len(self._paths) - 1)
+        self._visible_count = len(self._paths)
+        self.endInsertRows()
 
     def columnCount(self, parent=QModelIndex()):
         """返回列数"""
@@ -86,10 +350,11 @@ class FileTableModel(QAbstractTableModel):
 
     def data(self, index, role):
         """单元格数据"""
-        if not index.isValid() or index.row() >= len(self.files):
+        if not index.isValid() or index.row() >= self._visible_count:
             return None
 
-        file_item = self.files[index.row()]
+        # 只有视图实际请求的行才会创建文件项和读取文件信息
+        file_item = self._item(index.row())
 
         if role == Qt.ItemDataRole.DisplayRole:
             if index.column() == 0:  # 文件名
@@ -101,6 +366,9 @@ class FileTableModel(QAbstractTableModel):
             elif index.column() == 3:  # 状态
                 return file_item.processing_status
 
+        elif role == self.SortRole:
+            return self.sort_key(index.row(), index.column())
+
         elif role == Qt.ItemDataRole.ToolTipRole:
             if index.column() == 0:
                 return file_item.path
@@ -109,67 +377,144 @@ class FileTableModel(QAbstractTableModel):
 
         return None
 
+    def sort_key(self, row, column):
+        """指定单元格的排序值"""
+        file_item = self._item(row)
+        if column == 0:
+            return file_item.file_name.lower()
+        elif column == 1:
+            return file_item.size
+        elif column == 2:
+            return file_item.modified_timestamp
+        elif column == 3:
+            return file_item.processing_status
+        return None
+
     def add_file(self, path):
         """添加文件到模型"""
         # 检查文件是否已存在
-        for file in self.files:
-            if file.path == path:
-                return False
+        key = self.normalize_path(path)
+        if key in self._row_index:
+            return False
 
-        row = len(self.files)
-        self.beginInsertRows(QModelIndex(), row, row)
-        self.files.append(FileItem(path))
-        self.endInsertRows()
+        self._insert_paths({key: path})
         return True
 
     def add_files(self, paths):
-        """批量添加文件"""
-        new_files = []
-        for path in paths:
-            # 检查是否为Word文档
-            if not path.lower().endswith('.docx'):
-                continue
+        """批量添加文件，返回实际添加的数量"""
+        # 只保留Word文档，只转换扩展名部分的大小写
+        candidates = [path for path in paths if path[-5:].lower() == ".docx"]
+
+        # 跳过已存在的文件（包括本批次中重复的路径）
+        new_paths = {}
+        for key, path in zip(self.normalize_paths(candidates), candidates):
+            if key not in self._row_index and key not in new_paths:
+                new_paths[key] = path
+
+        self._insert_paths(new_paths)
+        return len(new_paths)
 
-            # 检查文件是否已存在
-            if any(file.path == path for file in self.files):
+    def add_files_in_chunks(self, paths, chunk_size=None):
+        """分批添加文件的生成器，每加入一批产出该批实际添加的数量
+
+        调用方在两批之间返回事件循环，第一批加入后视图即可绘制第一屏，不必等待全部路径建立索引。
+        """
+        chunk_size = chunk_size or self.ADD_CHUNK
+        for start in range(0, len(paths), chunk_size):
+            yield self.add_files(paths[start:start + chunk_size])
+
+    def add_file_items(self, items):
+        """批量添加已创建的文件项，返回实际添加的数量"""
+        new_paths = {}
+        new_items = []
+        for key, item in zip(self.normalize_paths(item.path for item in items), items):
+            if key in self._row_index or key in new_paths:
                 continue
 
-            new_files.append(FileItem(path))
+            new_paths[key] = item.path
+            new_items.append(item)
 
-        if new_files:
-            row = len(self.files)
-            self.beginInsertRows(QModelIndex(), row, row + len(new_files) - 1)
-            self.files.extend(new_files)
-            self.endInsertRows()
+        self._insert_paths(new_paths, new_items)
+        return len(new_paths)
 
-        return len(new_files)
+    def _insert_paths(self, new_paths, new_items=None):
+        """在末尾插入文件并更新路径索引
+
+        new_paths为规范化路径 -> 文件路径，new_items为对应的已创建文件项，为None时在第一次读取时创建。
+        视图中已显示全部行且不足一批时，新行直接显示；其余的行等待fetchMore。
+        """
+        if not new_paths:
+            return
+
+        row = len(self._paths)
+        self._paths.extend(new_paths.values())
+        self._items.extend(new_items if new_items is not None else [None] * len(new_paths))
+        self._invalidate_search_index()
+        self._row_index.update(zip(new_paths, range(row, row + len(new_paths))))
+
+        if self._visible_count == row and row < self.FETCH_BATCH:
+            count = min(len(new_paths), self.FETCH_BATCH - row)
+            self.beginInsertRows(QModelIndex(), row, row + count - 1)
+            self._visible_count += count
+            self.endInsertRows()
 
     def remove_file(self, index):
         """从模型中移除文件"""
         if isinstance(index, QModelIndex):
             index = index.row()
 
-        if 0 <= index < len(self.files):
-            self.beginRemoveRows(QModelIndex(), index, index)
-            self.files.pop(index)
-            self.endRemoveRows()
+        if 0 <= index < len(self._paths):
+            self._remove_range(index, index)
+            self._rebuild_index(index)
             return True
         return False
 
+    def _remove_range(self, start, end):
+        """移除[start, end]范围内的文件项（不重建索引）"""
+        visible_end = min(end, self._visible_count - 1)
+        if start <= visible_end:
+            self.beginRemoveRows(QModelIndex(), start, visible_end)
+
+        for key in self.normalize_paths(self._paths[start:end + 1]):
+            self._row_index.pop(key, None)
+        del self._paths[start:end + 1]
+        del self._items[start:end + 1]
+
+        if start <= visible_end:
+            self._visible_count -= visible_end - start + 1
+            self.endRemoveRows()
+
     def remove_files(self, indices):
         """批量移除文件"""
         # 排序并反转索引，这样可以从后向前移除而不影响其它索引
-        indices = sorted(indices, reverse=True)
+        indices = sorted({i for i in indices if 0 <= i < len(self._paths)}, reverse=True)
+        if not indices:
+            return True
+
+        # 连续的行合并为一次移除，索引在全部移除后统一重建
+        range_end = indices[0]
+        for position, index in enumerate(indices):
+            next_index = indices[position + 1] if position + 1 < len(indices) else None
+            if next_index is not None and next_index == index - 1:
+                continue
 
-        for index in indices:
-            self.remove_file(index)
+            self._remove_range(index, range_end)
 
+            if next_index is not None:
+                range_end = next_index
+
+        self._rebuild_index(indices[-1])
         return True
 
     def clear(self):
         """清空所有文件"""
         self.beginResetModel()
-        self.files.clear()
+        self._paths.clear()
+        self._items.clear()
+        self._row_index.clear()
+        self._status_rows.clear()
+        self._invalidate_search_index()
+        self._visible_count = 0
         self.endResetModel()
 
     def get_file(self, index):
@@ -177,70 +522,496 @@ class FileTableModel(QAbstractTableModel):
         if isinstance(index, QModelIndex):
             index = index.row()
 
-        if 0 <= index < len(self.files):
-            return self.files[index]
+        if 0 <= index < len(self._paths):
+            return self._item(index)
         return None
 
     def update_file_status(self, index, is_processed=True, error=""):
         """更新文件处理状态"""
         file_item = self.get_file(index)
         if file_item:
-            file_item.set_processed(is_processed, error)
-            model_index = self.index(index if isinstance(index, int) else index.row(), 3)
-            self.dataChanged.emit(model_index, model_index, [Qt.ItemDataRole.DisplayRole])
+            row = index if isinstance(index, int) else index.row()
+            self._update_item(row, FileItem.set_processed, is_processed, error)
+            if row < self._visible_count:
+                model_index = self.index(row, 3)
+                self.dataChanged.emit(model_index, model_index, [Qt.ItemDataRole.DisplayRole])
             return True
         return False
 
+    def update_file_statuses(self, statuses):
+        """按文件路径批量更新处理状态
+
+        statuses为(文件路径, 是否成功, 错误信息)列表，是否成功为None表示按规则跳过。连续的行合并为一次
+        dataChanged通知，返回实际更新的文件数。
+        """
+        if not statuses:
+            return 0
+
+        changed_rows = set()
+        for path, is_processed, error in statuses:
+            row = self._row_index.get(self.normalize_path(path))
+            if row is None:
+                continue
+            self._update_item(row, FileItem.set_processed, is_processed, error)
+            changed_rows.add(row)
+
+        # 尚未提供给视图的行无需通知
+        self._emit_status_changed(sorted(row for row in changed_rows if row < self._visible_count))
+        return len(changed_rows)
+
+    def mark_invalid(self, results):
+        """按文件路径把预检未通过的文件标记为无效文档
+
+        results为(文件路径, 原因)列表。预检在后台完成，期间已开始处理的文件保持原状态，
+        返回实际标记的文件数。
+        """
+        changed_rows = set()
+        for path, reason in results:
+            row = self._row_index.get(self.normalize_path(path))
+            if row is None or self._status(row) != FileItem.UNPROCESSED:
+                continue
+            self._update_item(row, FileItem.set_invalid, reason)
+            changed_rows.add(row)
+
+        self._emit_status_changed(sorted(row for row in changed_rows if row < self._visible_count))
+        return len(changed_rows)
+
+    def _emit_status_changed(self, rows):
+        """为排好序的行号按连续区间发送状态列的dataChanged"""
+        roles = [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole]
+        status_column = len(self.COLUMNS) - 1
+
+        range_start = None
+        previous = None
+        for row in rows:
+            if range_start is None:
+                range_start = row
+            elif row != previous + 1:
+                self.dataChanged.emit(self.index(range_start, status_column),
+                                      self.index(previous, status_column), roles)
+                range_start = row
+            previous = row
+
+        if range_start is not None:
+            self.dataChanged.emit(self.index(range_start, status_column),
+                                  self.index(previous, status_column), roles)
+
+
+class FileFilterProxyModel(QSortFilterProxyModel):
+    """文件列表的排序过滤代理模型
+
+    过滤不再逐行比较显示文本，而是一次性从源模型的文件名索引中得到
+    匹配的行号集合，filterAcceptsRow只做集合查找。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.filter_text = ""
+        self.filter_status = None
+        self._accepted_rows = None
+        self.setSortRole(FileTableModel.SortRole)
+
+    def set_filter(self, text="", status=None):
+        """设置文件名和处理状态过滤条件"""
+        self.filter_text = text
+        self.filter_status = status
+        self.refresh_filter()
+
+    def is_filtering(self):
+        """是否设置了过滤条件"""
+        return bool(self.filter_text or self.filter_status)
+
+    def refresh_filter(self):
+        """根据源模型当前内容重新计算匹配的行"""
+        model = self.sourceModel()
+        if model is None:
+            return
+
+        if self.is_filtering():
+            # 过滤结果需要覆盖尚未提供给视图的文件
+            model.fetch_all()
+
+        self._accepted_rows = model.match_rows(self.filter_text, self.filter_status)
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        """判断源模型的行是否显示"""
+        return self._accepted_rows is None or source_row in self._accepted_rows
+
+    def lessThan(self, source_left, source_right):
+        """直接比较源模型的排序值，不经过data()和QVariant转换"""
+        model = self.sourceModel()
+        column = source_left.column()
+        return model.sort_key(source_left.row(), column) < model.sort_key(source_right.row(), column)
+
+
+class DirectoryScanWorker(QRunnable):
+    """在后台线程中增量扫描目录的工作线程
+
+    发现的文件分批立即发送，预检由FileManager在加入列表后交给PackageValidationWorker，
+    扫描本身不等待任何文件读取，stop()在下一个目录项处生效。
+    """
+
+    CHUNK_SIZE = 500  # 每批发送的最大文件数
+    CHUNK_INTERVAL = 0.2  # 两批之间的最长间隔（秒）
+
+    class Signals(QObject):
+        """工作线程信号"""
+        filesFound = pyqtSignal(list)  # 一批新发现的FileItem
+        progress = pyqtSignal(int)  # 已发现的文件数
+        finished = pyqtSignal(int, bool)  # 发现的文件总数, 是否被取消
+        error = pyqtSignal(str)
+
+    def __init__(self, directory, recursive=True, include_patterns=None, exclude_patterns=None):
+        super().__init__()
+        self.directory = directory
+        self.recursive = recursive
+        self.include_patterns = [p.lower() for p in (include_patterns or ["*.docx"])]
+        self.exclude_patterns = [p.lower() for p in (exclude_patterns or [])]
+        self.should_stop = False
+        self.signals = self.Signals()
+
+    @pyqtSlot()
+    def run(self):
+        """线程执行函数"""
+        found = 0
+        chunk = []
+        last_emit = time.monotonic()
+
+        try:
+            for path, stat in self.scan():
+                if self.should_stop:
+                    break
+
+                try:
+                    item = FileItem(path, stat)
+                except OSError:
+                    continue
+                chunk.append(item)
+
+                found += 1
+                now = time.monotonic()
+                if len(chunk) >= self.CHUNK_SIZE or now - last_emit >= self.CHUNK_INTERVAL:
+                    # 文件项发送后只在界面线程中访问
+                    self.signals.filesFound.emit(chunk)
+                    self.signals.progress.emit(found)
+                    chunk = []
+                    last_emit = now
+
+            if chunk:
+                self.signals.filesFound.emit(chunk)
+                self.signals.progress.emit(found)
+
+            self.signals.finished.emit(found, self.should_stop)
+
+        except Exception as e:
+            self.signals.error.emit(f"扫描目录时出错: {str(e)}")
+            self.signals.finished.emit(found, self.should_stop)
+
+    def scan(self):
+        """深度优先遍历目录，生成(文件路径, stat结果)
+
+        被排除的目录在遍历时直接跳过，不会进入其子目录。不需要线程和信号时（如命令行）可以直接迭代。
+        """
+        stack = [self.directory]
+        while stack:
+            if self.should_stop:
+                return
+
+            current = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if self.should_stop:
+                            return
+
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if self.recursive and not self._is_excluded(entry):
+                                    subdirs.append(entry.path)
+                            elif entry.is_file() and self._is_included(entry):
+                                # Windows上DirEntry.stat()直接使用目录列表中的数据，无需额外系统调用
+                                yield entry.path, entry.stat()
+                        except OSError:
+                            continue
+            except OSError:
+                # 无权限或已被删除的目录直接跳过
+                continue
+
+            # 逆序入栈，保持与os.walk相同的遍历顺序
+            stack.extend(reversed(subdirs))
+
+    def _relative_path(self, entry):
+        """获取相对于扫描根目录的路径（统一使用/分隔）"""
+        return os.path.relpath(entry.path, self.directory).replace(os.sep, "/").lower()
+
+    def _is_excluded(self, entry):
+        """检查文件或目录是否匹配排除模式"""
+        if not self.exclude_patterns:
+            return False
+
+        name = entry.name.lower()
+        relative = self._relative_path(entry)
+        return any(fnmatch.fnmatchcase(name, pattern) or fnmatch.fnmatchcase(relative, pattern)
+                   for pattern in self.exclude_patterns)
+
+    def _is_included(self, entry):
+        """检查文件是否匹配包含模式且未被排除"""
+        name = entry.name.lower()
+        if not any(fnmatch.fnmatchcase(name, pattern) for pattern in self.include_patterns):
+            return False
+        return not self._is_excluded(entry)
+
+    def stop(self):
+        """停止扫描"""
+        self.should_stop = True
+
+
+class PackageValidationWorker(QRunnable):
+    """在后台线程中预检文件包的工作线程
+
+    在线程池中并行检查zip中央目录，无效文件和zip炸弹的原因分批发送，由界面线程标记为无效文档。
+    文件暂时无法读取时不标记，由提取时报告。
+    """
+
+    BATCH_INTERVAL = 0.2  # 两批结果之间的最长间隔（秒）
+    WORKERS = 4  # 预检线程数，预检主要在等待磁盘或网络读取
+    IN_FLIGHT = 16  # 同时提交的预检数，避免为大量文件一次性创建Future
+
+    class Signals(QObject):
+        """工作线程信号"""
+        invalidFound = pyqtSignal(list)  # 一批无效文件的(文件路径, 原因)
+        finished = pyqtSignal()
+
+    def __init__(self, paths):
+        super().__init__()
+        self.paths = paths
+        self.should_stop = False
+        self.signals = self.Signals()
+
+    @staticmethod
+    def check(path):
+        """预检单个文件，无效时返回(文件路径, 原因)，否则返回None"""
+        try:
+            validate_package(path)
+        except InvalidPackageError as e:
+            return path, str(e)
+        except OSError:
+            pass
+        return None
+
+    @pyqtSlot()
+    def run(self):
+        """线程执行函数"""
+        invalid = []
+        pending = set()
+        last_emit = time.monotonic()
+        executor = ThreadPoolExecutor(self.WORKERS)
+
+        try:
+            for path in self.paths:
+                if self.should_stop:
+                    break
+
+                if len(pending) >= self.IN_FLIGHT:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    invalid.extend(future.result() for future in done if future.result())
+                pending.add(executor.submit(self.check, path))
+
+                now = time.monotonic()
+                if invalid and now - last_emit >= self.BATCH_INTERVAL:
+                    self.signals.invalidFound.emit(invalid)
+                    invalid = []
+                    last_emit = now
+
+            if not self.should_stop:
+                done, _ = wait(pending)
+                invalid.extend(future.result() for future in done if future.result())
+                if invalid:
+                    self.signals.invalidFound.emit(invalid)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.signals.finished.emit()
+
+    def stop(self):
+        """停止预检"""
+        self.should_stop = True
+
 
 class FileManager(QObject):
     """文件管理器，处理文件操作并与模型交互"""
 
     filesAdded = pyqtSignal(int)  # 添加了多少文件
     scanComplete = pyqtSignal(int)  # 扫描完成，参数是添加的文件数
+    scanProgress = pyqtSignal(int)  # 扫描中，参数是已发现的文件数
+    scanError = pyqtSignal(str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.model = FileTableModel()
 
+        # 目录扫描的文件名包含/排除模式（glob格式）
+        self.include_patterns = ["*.docx"]
+        self.exclude_patterns = []
+
+        self.scheduler = TaskScheduler.instance()
+        self.scan_worker = None
+        self._scan_added = 0
+
+        # 同一时间只运行一个预检，期间新加入的文件排队，结束后一起预检
+        self.validation_worker = None
+        self._validation_queue = []
+
+        # 尚未加入完的批量添加，每次事件循环空闲时加入一批
+        self._adding = deque()
+        self._add_timer = QTimer(self)
+        self._add_timer.setSingleShot(True)
+        self._add_timer.setInterval(0)
+        self._add_timer.timeout.connect(self._add_next_chunk)
+
     def add_file(self, file_path):
         """添加单个文件"""
         if os.path.isfile(file_path) and file_path.lower().endswith('.docx'):
             success = self.model.add_file(file_path)
             if success:
+                self._validate([file_path])
                 self.filesAdded.emit(1)
             return success
         return False
 
     def add_files(self, file_paths):
-        """添加多个文件"""
-        count = self.model.add_files(file_paths)
+        """添加多个文件
+
+        路径按FileTableModel.ADD_CHUNK分批加入，第一批立即加入并返回其添加的数量，其余每批之间
+        返回事件循环，大量文件不会阻塞第一屏的绘制。前一次添加尚未完成时排在其后，返回0。
+        每批加入后发送filesAdded信号。
+        """
+        self._adding.append(self.model.add_files_in_chunks(list(file_paths)))
+        if len(self._adding) > 1:
+            return 0
+        return self._add_next_chunk()
+
+    def is_adding(self):
+        """检查是否还有尚未加入完的文件"""
+        return bool(self._adding)
+
+    def _add_next_chunk(self):
+        """加入下一批路径，还有剩余时等事件循环空闲后继续"""
+        if not self._adding:
+            return 0
+
+        try:
+            count = next(self._adding[0])
+        except StopIteration:
+            self._adding.popleft()
+            count = 0
+
         if count > 0:
+            self._validate_added(count)
             self.filesAdded.emit(count)
+        if self._adding:
+            self._add_timer.start()
         return count
 
     def scan_directory(self, directory, recursive=True):
-        """扫描目录中的Word文档"""
+        """在后台扫描目录中的Word文档
+
+        发现的文件分批加入模型，扫描结束后发送scanComplete信号。
+        返回是否成功启动扫描。
+        """
         if not os.path.isdir(directory):
-            return 0
+            return False
 
-        file_paths = []
+        # 同一时间只保留一个扫描
+        self.cancel_scan()
 
-        if recursive:
-            # 递归遍历目录
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if file.lower().endswith('.docx'):
-                        file_paths.append(os.path.join(root, file))
-        else:
-            # 仅扫描当前目录
-            for file in os.listdir(directory):
-                if file.lower().endswith('.docx'):
-                    file_paths.append(os.path.join(directory, file))
-
-        # 批量添加找到的文件
-        count = self.model.add_files(file_paths)
-        self.scanComplete.emit(count)
-        return count
+        self._scan_added = 0
+        worker = DirectoryScanWorker(directory, recursive, self.include_patterns, self.exclude_patterns)
+        worker.signals.filesFound.connect(lambda items, w=worker: self._on_files_found(w, items))
+        worker.signals.progress.connect(self.scanProgress)
+        worker.signals.finished.connect(lambda found, canceled, w=worker: self._on_scan_finished(w))
+        worker.signals.error.connect(self.scanError)
+
+        self.scan_worker = worker
+        self.scheduler.submit(worker, Priority.BACKGROUND)
+        return True
+
+    def cancel_scan(self):
+        """取消正在进行的扫描"""
+        if self.scan_worker:
+            self.scan_worker.stop()
+            return True
+        return False
+
+    def is_scanning(self):
+        """检查是否正在扫描"""
+        return self.scan_worker is not None
+
+    def _on_files_found(self, worker, items):
+        """一批文件被发现时加入模型"""
+        # 已取消或被替换的扫描，丢弃尚在队列中的结果
+        if worker is not self.scan_worker or worker.should_stop:
+            return
+
+        count = self.model.add_file_items(items)
+        if count > 0:
+            self._validate_added(count)
+            self._scan_added += count
+            self.filesAdded.emit(count)
+
+    def _on_scan_finished(self, worker):
+        """扫描结束回调"""
+        if worker is not self.scan_worker:
+            return
+
+        self.scan_worker = None
+        self.scanComplete.emit(self._scan_added)
+
+    def _validate_added(self, count):
+        """预检刚加入列表末尾的count个文件"""
+        self._validate(self.model.paths(self.model.file_count() - count))
+
+    def _validate(self, paths):
+        """在后台预检文件，结果通过invalidFound信号回到界面线程"""
+        self._validation_queue.extend(paths)
+        if self.validation_worker is None:
+            self._start_validation()
+
+    def _start_validation(self):
+        """启动排队文件的预检"""
+        if not self._validation_queue:
+            return
+
+        worker = PackageValidationWorker(self._validation_queue)
+        self._validation_queue = []
+        worker.signals.invalidFound.connect(lambda results, w=worker: self._on_invalid_found(w, results))
+        worker.signals.finished.connect(lambda w=worker: self._on_validation_finished(w))
+
+        self.validation_worker = worker
+        self.scheduler.submit(worker, Priority.BACKGROUND)
+
+    def cancel_validation(self):
+        """取消正在进行和排队中的预检"""
+        self._validation_queue = []
+        if self.validation_worker:
+            self.validation_worker.stop()
+            self.validation_worker = None
+
+    def _on_invalid_found(self, worker, results):
+        """一批预检结果返回时标记无效文档"""
+        # 已取消的预检，丢弃尚在队列中的结果
+        if worker is not self.validation_worker:
+            return
+        self.model.mark_invalid(results)
+
+    def _on_validation_finished(self, worker):
+        """预检结束回调，继续预检期间新加入的文件"""
+        if worker is not self.validation_worker:
+            return
+
+        self.validation_worker = None
+        self._start_validation()
 
     def remove_file(self, index):
         """移除单个文件"""
@@ -252,14 +1023,12 @@ class FileManager(QObject):
 
     def clear_files(self):
         """清空所有文件"""
+        self._adding.clear()
+        self.cancel_validation()
         self.model.clear()
 
     def update_file_status(self, index, is_processed=True, error=""):
-        """更新文件处理状态"""
-        if isinstance(index, int) and 0 <= index < len(self.files):
-            file_item = self.files[index]
-            file_item.set_processed(is_processed, error)
-            model_index = self.index(index, 3)
-            self.dataChanged.emit(model_index, model_index, [Qt.ItemDataRole.DisplayRole])
-            return True
-        return False
+        """更新文件处理状态，index可以是行号或文件路径"""
+        if isinstance(index, str):
+            index = self.model.find_row(index)
+        return self.model.update_file_status(index, is_processed, error)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+规则性能统计模型 - 记录批处理中每条规则的耗时和命中情况
+"""
+
+import json
+import math
+import os
+from array import array
+
+from utils.extraction_failure import ExtractionEmpty, ExtractionFailure
+from utils.stage_timer import Stage
+
+
+class RuleOutcome:
+    """单条规则在单个文件上的结果分类"""
+    HIT = "hit"
+    EMPTY = "empty"
+    ERROR = "error"
+
+
+def classify_result(value):
+    """将规则的提取结果分类为命中、空结果或错误
+
+    提取方法出错时返回ExtractionFailure而不是抛出异常，没有找到内容时返回ExtractionEmpty，
+    都按类型判断，与提取到的文字内容无关。
+    """
+    if isinstance(value, ExtractionFailure):
+        return RuleOutcome.ERROR
+    if isinstance(value, ExtractionEmpty) or value is None or value == "" or value == []:
+        return RuleOutcome.EMPTY
+    return RuleOutcome.HIT
+
+
+class RuleProfile:
+    """单条规则在一个批次中的耗时和结果统计"""
+
+    def __init__(self, rule):
+        self.rule_id = rule.id
+        self.field_name = rule.field_name
+        self.header_name = rule.header_name
+        self.type_name = rule.type_name
+        self.times = array("d")  # 每个文档上的耗时（秒），用于计算分位数
+        self.hits = 0
+        self.empty = 0
+        self.errors = 0
+
+    def record(self, seconds, value):
+        """记录一个文档上的耗时和结果"""
+        self.times.append(seconds)
+        outcome = classify_result(value)
+        if outcome == RuleOutcome.HIT:
+            self.hits += 1
+        elif outcome == RuleOutcome.EMPTY:
+            self.empty += 1
+        else:
+            self.errors += 1
+
+    @property
+    def documents(self):
+        """统计的文档数"""
+        return len(self.times)
+
+    @property
+    def total_time(self):
+        """总耗时（秒）"""
+        return math.fsum(self.times)
+
+    @property
+    def mean_time(self):
+        """每个文档的平均耗时（秒）"""
+        return self.total_time / len(self.times) if self.times else 0.0
+
+    def percentile(self, q):
+        """每个文档耗时的分位数（秒），q取0-100，使用最近秩法"""
+        if not self.times:
+            return 0.0
+        ordered = sorted(self.times)
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    @property
+    def hit_rate(self):
+        """命中率（0-1）"""
+        return self.hits / self.documents if self.documents else 0.0
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "rule_id": self.rule_id,
+            "field_name": self.field_name,
+            "header_name": self.header_name,
+            "type_name": self.type_name,
+            "documents": self.documents,
+            "total_time": self.total_time,
+            "mean_time": self.mean_time,
+            "p95_time": self.percentile(95),
+            "hits": self.hits,
+            "empty": self.empty,
+            "errors": self.errors,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class BatchRuleProfile:
+    """一个批次中所有规则的统计
+
+    每完成一个文档调用一次record，只做几次字典查找和追加，开销可以忽略。
+    """
+
+    def __init__(self, rules):
+        self.profiles = [RuleProfile(rule) for rule in rules if rule.enabled]
+        self.documents = 0
+
+    def record(self, result, timings, rules=None):
+        """记录一个成功处理的文档，rules为该文档实际执行的规则（按模板路由时），默认为全部规则"""
+        if timings is None:
+            return
+        self.documents += 1
+        rule_ids = None if rules is None else {rule.id for rule in rules}
+        for profile in self.profiles:
+            if rule_ids is not None and profile.rule_id not in rule_ids:
+                continue
+            profile.record(timings.stages.get(Stage.rule(profile.header_name), 0.0),
+                           result.get(profile.header_name))
+
+    def by_rule_id(self):
+        """按规则ID索引的统计字典"""
+        return {profile.rule_id: profile.to_dict() for profile in self.profiles}
+
+    def to_dict(self):
+        """转换为字典，规则按总耗时从大到小排列"""
+        rules = sorted((profile.to_dict() for profile in self.profiles),
+                       key=lambda item: item["total_time"], reverse=True)
+        return {"documents": self.documents, "rules": rules}
+
+    def save_json(self, file_path):
+        """保存为JSON文件"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def output_path(output_file):
+        """与输出Excel同目录的统计文件路径"""
+        base, _ = os.path.splitext(output_file)
+        return f"{base}_规则统计.json"
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+规则语料测试模型 - 在文件列表上批量试运行规则并统计命中情况
+"""
+
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+from models.rule_profile import RuleOutcome, classify_result
+from models.task_model import apply_rule
+from utils.cancellation import CancellationToken, OperationCanceled, get_process_token, init_worker_process
+from utils.docx_parser import DocxParser
+from utils.task_scheduler import Priority, TaskScheduler
+
+
+def evaluate_rules(file_path, rules, token=None):
+    """解析单个文档并对每条规则分类结果
+
+    该函数不依赖任何Qt对象，可以直接在进程池的子进程中执行。
+    返回与rules等长的列表，每项为 (结果分类, 结果值或错误信息)。
+    文档无法解析时每条规则都记为错误。
+    """
+    token = token or get_process_token()
+    if token is not None:
+        token.check()
+
+    try:
+        parser = DocxParser(file_path, token)
+    except OperationCanceled:
+        raise
+    except Exception as e:
+        return [(RuleOutcome.ERROR, str(e))] * len(rules)
+
+    outcomes = []
+    for rule in rules:
+        if token is not None:
+            token.check()
+        try:
+            value = apply_rule(parser, rule)
+        except OperationCanceled:
+            raise
+        except Exception as e:
+            outcomes.append((RuleOutcome.ERROR, str(e)))
+            continue
+        outcomes.append((classify_result(value), value))
+    return outcomes
+
+
+class RuleStatistics:
+    """单条规则在语料上的统计"""
+
+    MAX_EXAMPLES = 5  # 保留的示例值和错误示例数
+
+    def __init__(self, rule):
+        self.field_name = rule.field_name
+        self.header_name = rule.header_name
+        self.type_name = rule.type_name
+        self.files = 0
+        self.hits = 0
+        self.empty = 0
+        self.errors = 0
+        self.examples = []  # 不重复的命中示例值
+        self.error_examples = []  # (文件路径, 错误信息)
+
+    @property
+    def hit_rate(self):
+        """命中率（0-1）"""
+        return self.hits / self.files if self.files else 0.0
+
+    def record(self, file_path, outcome, value):
+        """记录一个文件上的结果"""
+        self.files += 1
+        if outcome == RuleOutcome.HIT:
+            self.hits += 1
+            example = self._format_example(value)
+            if len(self.examples) < self.MAX_EXAMPLES and example not in self.examples:
+                self.examples.append(example)
+        elif outcome == RuleOutcome.EMPTY:
+            self.empty += 1
+        else:
+            self.errors += 1
+            if len(self.error_examples) < self.MAX_EXAMPLES:
+                self.error_examples.append((file_path, str(value)))
+
+    @staticmethod
+    def _format_example(value, max_length=80):
+        """把结果值压缩为一行示例文本"""
+        if isinstance(value, list):
+            value = " | ".join("\t".join(map(str, row)) if isinstance(row, list) else str(row) for row in value[:3])
+        text = " ".join(str(value).split())
+        return text if len(text) <= max_length else text[:max_length - 1] + "…"
+
+    def to_dict(self):
+        """转换为字典，作为信号参数发送给界面"""
+        return {
+            "field_name": self.field_name,
+            "header_name": self.header_name,
+            "type_name": self.type_name,
+            "files": self.files,
+            "hits": self.hits,
+            "empty": self.empty,
+            "errors": self.errors,
+            "hit_rate": self.hit_rate,
+            "examples": list(self.examples),
+            "error_examples": list(self.error_examples),
+        }
+
+
+class CorpusRuleTestWorker(QRunnable):
+    """在一组文件上试运行规则的工作线程，结果按时间窗口合并后持续发送"""
+
+    UPDATE_INTERVAL = 0.2  # 统计更新的最短发送间隔（秒）
+
+    class Signals(QObject):
+        """工作线程信号"""
+        progress = pyqtSignal(int, int)  # current, total
+        statisticsUpdated = pyqtSignal(list)  # [RuleStatistics.to_dict(), ...]
+        finished = pyqtSignal(bool)  # 是否被取消
+        error = pyqtSignal(str)
+
+    def __init__(self, file_paths, rules, max_workers=1):
+        super().__init__()
+        self.file_paths = list(file_paths)
+        self.rules = list(rules)
+        self.max_workers = max(1, max_workers or 1)
+        self.statistics = [RuleStatistics(rule) for rule in self.rules]
+        self.signals = self.Signals()
+
+        if self.max_workers > 1 and len(self.file_paths) > 1:
+            self.token = CancellationToken.for_processes()
+        else:
+            self.token = CancellationToken()
+
+        self._done = 0
+        self._last_flush = 0.0
+
+    def run(self):
+        """线程执行函数"""
+        try:
+            self.signals.progress.emit(0, len(self.file_paths))
+
+            if self.max_workers > 1 and len(self.file_paths) > 1:
+                self._run_parallel()
+            else:
+                self._run_sequential()
+
+        except OperationCanceled:
+            pass
+        except Exception as e:
+            self.signals.error.emit(f"规则测试出错: {str(e)}")
+        finally:
+            self._flush()
+            self.signals.finished.emit(self.token.is_cancelled)
+
+    def _run_sequential(self):
+        """在当前线程中逐个文件测试"""
+        for file_path in self.file_paths:
+            self._record(file_path, evaluate_rules(file_path, self.rules, self.token))
+
+    def _run_parallel(self):
+        """在进程池中并行测试，同时在途的文件数不超过进程数"""
+        queue = deque(self.file_paths)
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker_process,
+                                 initargs=self.token.events) as executor:
+            futures = {}
+            while queue or futures:
+                while queue and len(futures) < self.max_workers and not self.token.is_cancelled:
+                    file_path = queue.popleft()
+                    futures[executor.submit(evaluate_rules, file_path, self.rules)] = file_path
+
+                if not futures:
+                    return
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path = futures.pop(future)
+                    try:
+                        self._record(file_path, future.result())
+                    except OperationCanceled:
+                        pass
+
+    def _record(self, file_path, outcomes):
+        """记录一个文件的结果"""
+        for stats, (outcome, value) in zip(self.statistics, outcomes):
+            stats.record(file_path, outcome, value)
+
+        self._done += 1
+        if time.monotonic() - self._last_flush >= self.UPDATE_INTERVAL:
+            self._flush()
+
+    def _flush(self):
+        """发送当前统计和进度"""
+        self._last_flush = time.monotonic()
+        self.signals.statisticsUpdated.emit([stats.to_dict() for stats in self.statistics])
+        self.signals.progress.emit(self._done, len(self.file_paths))
+
+    def stop(self):
+        """停止测试"""
+        self.token.cancel()
+
+
+class RuleTestManager(QObject):
+    """规则语料测试管理器"""
+
+    testStarted = pyqtSignal(int)  # 测试的文件数
+    testProgress = pyqtSignal(int, int)  # current, total
+    statisticsUpdated = pyqtSignal(list)  # [RuleStatistics.to_dict(), ...]
+    testFinished = pyqtSignal(bool)  # 是否被取消
+    testError = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.scheduler = TaskScheduler.instance()
+        self.worker = None
+
+    @staticmethod
+    def sample_files(file_paths, sample_size=0, seed=0):
+        """抽取样本文件，sample_size为0或不小于文件数时返回全部
+
+        使用固定的随机种子，同一文件列表重复测试时样本一致，便于比较规则修改前后的结果。
+        """
+        file_paths = list(file_paths)
+        if sample_size <= 0 or sample_size >= len(file_paths):
+            return file_paths
+        return random.Random(seed).sample(file_paths, sample_size)
+
+    def start_test(self, file_paths, rules, sample_size=0, max_workers=1):
+        """开始测试，已有测试在运行时先停止"""
+        if not file_paths or not rules:
+            self.testError.emit("没有可测试的文件或规则")
+            return False
+
+        self.stop_test()
+
+        files = self.sample_files(file_paths, sample_size)
+        worker = CorpusRuleTestWorker(files, rules, max_workers)
+        worker.signals.progress.connect(self.testProgress)
+        worker.signals.statisticsUpdated.connect(self.statisticsUpdated)
+        worker.signals.finished.connect(lambda canceled, w=worker: self._on_finished(w, canceled))
+        worker.signals.error.connect(self.testError)
+
+        self.worker = worker
+        self.testStarted.emit(len(files))
+        self.scheduler.submit(worker, Priority.INTERACTIVE)
+        return True
+
+    def stop_test(self):
+        """停止正在进行的测试"""
+        if self.worker:
+            if self.scheduler.cancel(self.worker):
+                # 尚未开始就被移出队列，不会再发出finished信号
+                self.worker = None
+                self.testFinished.emit(True)
+            return True
+        return False
+
+    def shutdown(self):
+        """停止测试并断开与工作线程的连接
+
+        管理器即将随窗口销毁时调用。工作线程可能在销毁之后才结束，断开连接后它发出的信号不再调用本对象。
+        """
+        worker = self.worker
+        self.stop_test()
+        self.worker = None
+        if worker is None:
+            return
+        signals = worker.signals
+        for signal in (signals.progress, signals.statisticsUpdated, signals.finished, signals.error):
+            try:
+                signal.disconnect()
+            except TypeError:
+                pass
+
+    def is_testing(self):
+        """检查是否正在测试"""
+        return self.worker is not None
+
+    def _on_finished(self, worker, canceled):
+        """测试结束，管理器已被销毁时（断开连接前已排队的信号）直接忽略"""
+        if sip.isdeleted(self):
+            return
+        if worker is self.worker:
+            self.worker = None
+            self.testFinished.emit(canceled)
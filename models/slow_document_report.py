@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+慢文档报告模型 - 找出批次中最耗时和最占内存的文档
+"""
+
+import csv
+import heapq
+import os
+
+from utils.stage_timer import Stage
+
+
+class SlowDocumentEntry:
+    """报告中的一个文档"""
+
+    def __init__(self, task):
+        timings = task.timings
+        self.file_path = task.file_path
+        self.file_name = task.file_name
+        self.file_size = timings.bytes_read or task.file_size or 0
+        self.paragraph_count = timings.paragraph_count
+        self.table_count = timings.table_count
+        self.total_time = timings.total
+        self.stages = {
+            Stage.READ: timings.stages.get(Stage.READ, 0.0),
+            Stage.INFLATE: timings.stages.get(Stage.INFLATE, 0.0),
+            Stage.PARSE: timings.stages.get(Stage.PARSE, 0.0),
+            Stage.RULE: timings.rule_total(),
+            Stage.EXPORT: timings.stages.get(Stage.EXPORT, 0.0),
+        }
+        self.peak_memory_delta = timings.peak_memory_delta
+        self.reasons = []  # 入选原因：耗时、内存
+
+
+class SlowDocumentReport:
+    """批次中最慢和最占内存的前N个文档
+
+    两个排行合并为一个列表，按总耗时从大到小排列，同时出现在两个排行中的文档只列一次。
+    """
+
+    TOP_N = 20
+
+    STAGES = [Stage.READ, Stage.INFLATE, Stage.PARSE, Stage.RULE, Stage.EXPORT]
+
+    HEADERS = (["文件名", "文件大小(KB)", "段落数", "表格数", "总耗时(秒)"]
+               + [f"{Stage.display_name(stage)}(秒)" for stage in STAGES]
+               + ["内存峰值增长(MB)", "入选原因", "文件路径"])
+
+    def __init__(self, entries=None):
+        self.entries = entries or []
+
+    @classmethod
+    def from_tasks(cls, tasks, top_n=None):
+        """从已完成的任务生成报告"""
+        top_n = top_n or cls.TOP_N
+        measured = [task for task in tasks if task.timings is not None]
+
+        slowest = heapq.nlargest(top_n, measured, key=lambda task: task.timings.total)
+        hungriest = heapq.nlargest(top_n, measured, key=lambda task: task.timings.peak_memory_delta)
+
+        entries = {}
+        for reason, selected in (("耗时", slowest), ("内存", hungriest)):
+            for task in selected:
+                if reason == "内存" and task.timings.peak_memory_delta <= 0:
+                    continue
+                entry = entries.get(id(task))
+                if entry is None:
+                    entry = entries[id(task)] = SlowDocumentEntry(task)
+                entry.reasons.append(reason)
+
+        return cls(sorted(entries.values(), key=lambda entry: entry.total_time, reverse=True))
+
+    def rows(self):
+        """报告的表格行（与HEADERS对应）"""
+        for entry in self.entries:
+            yield ([entry.file_name,
+                    f"{entry.file_size / 1024:.1f}",
+                    entry.paragraph_count,
+                    entry.table_count,
+                    f"{entry.total_time:.3f}"]
+                   + [f"{entry.stages[stage]:.3f}" for stage in self.STAGES]
+                   + [f"{entry.peak_memory_delta / 1024 / 1024:.1f}",
+                      "、".join(entry.reasons),
+                      entry.file_path])
+
+    def save_csv(self, file_path):
+        """保存为CSV文件，带BOM以便Excel直接打开"""
+        with open(file_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.HEADERS)
+            writer.writerows(self.rows())
+
+    @staticmethod
+    def output_path(output_file):
+        """与输出Excel同目录的报告文件路径"""
+        base, _ = os.path.splitext(output_file)
+        return f"{base}_慢文档.csv"
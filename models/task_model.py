@@ -5,15 +5,34 @@
 任务处理模型 - 处理批量提取任务
 """
 
+import errno
+import heapq
 import os
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
 from enum import Enum
 
-from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, QThreadPool
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
 
 from models.extraction_rule import ExtractionMode
+from models.rule_profile import BatchRuleProfile
+from models.slow_document_report import SlowDocumentReport
+from utils.cancellation import CancellationToken, OperationCanceled, get_process_token, init_worker_process
+from utils.chrome_trace import ChromeTrace
+from utils.cost_estimator import CostEstimator
+from utils.doc_properties import DocumentProperties
 from utils.docx_parser import DocxParser
 from utils.excel_exporter import ExcelExporter
+from utils.memory_budget import MemoryBudget, format_size
+from utils.package_validator import validate_package
+from utils.path_rules import extract_path_field, path_skip_reason
+from utils.profiler import BatchProfiler, profiled_call
+from utils.stage_timer import BatchTimingSummary, MemoryMode, Stage, StageTimings, memory_tracing, \
+    process_peak_rss
+from utils.task_scheduler import Priority, TaskScheduler
 
 
 class TaskStatus(Enum):
@@ -23,18 +42,26 @@ class TaskStatus(Enum):
     COMPLETED = "已完成"
     FAILED = "失败"
     CANCELED = "已取消"
+    SKIPPED = "已跳过"
 
 
 class ExtractionTask:
     """单个文件的提取任务"""
 
-    def __init__(self, file_path, rules=None):
+    def __init__(self, file_path, rules=None, file_size=None):
         self.file_path = file_path
         self.file_name = os.path.basename(file_path)
+        self.file_size = file_size
         self.rules = rules or []
         self.status = TaskStatus.PENDING
         self.start_time = None
         self.end_time = None
+        self.processing_time = 0.0  # 实际解析和提取耗时（秒），不含排队等待
+        self.timings = None  # 分阶段耗时（StageTimings），处理完成后设置
+        self.template = None  # 按模板路由时匹配的模板名称
+        self.predicted_memory = None  # 按包大小预测的内存峰值增长（字节），设置内存预算时计算
+        self.peak_memory = 0  # 解析和提取期间实测的内存峰值增长（字节）
+        self.row_key = None  # 输出行的排序键：首次处理时所在批次的位置，重试时结果按它放回原位
         self.error = ""
         self.extracted_data = {}  # 提取的数据，键为字段名，值为提取结果
 
@@ -50,12 +77,24 @@ class ExtractionTask:
         if data:
             self.extracted_data = data
 
+    def record_timings(self, timings):
+        """记录提取过程的分阶段耗时和内存峰值"""
+        self.timings = timings
+        self.processing_time = timings.total
+        self.peak_memory = timings.peak_memory_delta
+
     def fail(self, error):
         """任务失败"""
         self.end_time = datetime.now()
         self.status = TaskStatus.FAILED
         self.error = str(error)
 
+    def skip(self, reason):
+        """按规则跳过任务，不打开文档"""
+        self.end_time = datetime.now()
+        self.status = TaskStatus.SKIPPED
+        self.error = reason
+
     def cancel(self):
         """取消任务"""
         self.end_time = datetime.now()
@@ -70,142 +109,701 @@ class ExtractionTask:
         return (end - self.start_time).total_seconds()
 
 
+def is_transient_error(error):
+    """判断错误是否可能是临时性的（例如文件被其他程序占用），稍后重试可能成功"""
+    if isinstance(error, (PermissionError, BlockingIOError, InterruptedError, TimeoutError)):
+        return True
+    if isinstance(error, OSError):
+        # Windows: 32 = 文件被其他进程使用, 33 = 文件部分被锁定
+        if getattr(error, "winerror", None) in (32, 33):
+            return True
+        return error.errno in (errno.EBUSY, errno.EAGAIN, errno.ETXTBSY)
+    return False
+
+
+def apply_rule(parser, rule):
+    """应用提取规则"""
+    if rule.rule_type == ExtractionMode.REGEX:
+        pattern = rule.config.get("pattern", "")
+        group = rule.config.get("group", 0)
+        return parser.extract_with_regex(pattern, group)
+
+    elif rule.rule_type == ExtractionMode.POSITION:
+        start_index = rule.config.get("start_index", 0)
+        end_index = rule.config.get("end_index")
+        return parser.extract_by_position(start_index, end_index)
+
+    elif rule.rule_type == ExtractionMode.BOOKMARK:
+        bookmark_name = rule.config.get("bookmark_name", "")
+        return parser.extract_by_bookmark(bookmark_name)
+
+    elif rule.rule_type == ExtractionMode.TABLE_CELL:
+        table_index = rule.config.get("table_index", 0)
+        row_index = rule.config.get("row_index", 0)
+        col_index = rule.config.get("column_index", 0)
+        return parser.extract_table_cell(table_index, row_index, col_index)
+
+    elif rule.rule_type == ExtractionMode.TABLE_COLUMN:
+        table_index = rule.config.get("table_index", 0)
+        col_index = rule.config.get("column_index", 0)
+        has_header = rule.config.get("has_header", True)
+        return parser.extract_table_column(table_index, col_index, has_header)
+
+    elif rule.rule_type == ExtractionMode.TABLE_ROW:
+        table_index = rule.config.get("table_index", 0)
+        row_index = rule.config.get("row_index", 0)
+        return parser.extract_table_row(table_index, row_index)
+
+    elif rule.rule_type == ExtractionMode.TABLE_FULL:
+        table_index = rule.config.get("table_index", 0)
+        has_header = rule.config.get("has_header", True)
+        return parser.extract_table(table_index, has_header)
+
+    elif rule.rule_type == ExtractionMode.METADATA:
+        return parser.extract_property(rule.config.get("property", ""))
+
+    elif rule.rule_type == ExtractionMode.FILE_PATH:
+        return extract_path_field(parser.file_path, rule.config)
+
+    return None
+
+
+def _document_rules(rules):
+    """需要读取文档内容的启用规则，路径规则不需要"""
+    return [rule for rule in rules if rule.enabled and rule.rule_type != ExtractionMode.FILE_PATH]
+
+
+def path_only(rules):
+    """启用的规则是否都是路径规则，是则提取时不打开文档"""
+    return not _document_rules(rules)
+
+
+def metadata_only(rules):
+    """除路径规则外启用的规则是否都是文档属性规则，是则提取时不需要加载正文"""
+    document_rules = _document_rules(rules)
+    return bool(document_rules) and all(rule.rule_type == ExtractionMode.METADATA for rule in document_rules)
+
+
+def extract_document(file_path, rules, skip_file_info=False, token=None, trace=False, memory_mode=None,
+                     timings=None, staged=False):
+    """解析单个文档并应用所有启用的规则
+
+    该函数不依赖任何Qt对象，可以直接在进程池的子进程中执行。
+    未传入令牌时使用子进程初始化时设置的令牌；已取消时抛出OperationCanceled。
+    返回 (提取结果, StageTimings)，其中记录读取、解压、解析和每条规则的耗时，
+    以及解析和提取两个步骤的内存峰值（按memory_mode测量，默认不测量）；
+    trace为True时同时记录各阶段的起止时间，用于导出时间线。
+    启用的规则都是文档属性规则时只读取docProps下的属性部件，不加载和解析正文；
+    都是路径规则时不打开文档。传入timings时在其上继续记录（例如已记录的模板分类耗时）。
+    staged为True时分别记录读取、解压和解析的耗时（见DocxParser），只在性能分析和记录时间线时使用。
+    """
+    started_ns = time.perf_counter_ns()
+    if timings is None:
+        timings = StageTimings(trace)
+    memory_mode = memory_mode or MemoryMode.OFF
+    token = token or get_process_token()
+    if token is not None:
+        token.check()
+
+    with memory_tracing(memory_mode):
+        if path_only(rules):
+            parser = None
+        elif metadata_only(rules):
+            # 只需要文档属性时不加载正文，只读取中央目录和docProps下的两个小部件
+            with timings.measure_memory(Stage.READ, memory_mode), timings.measure(Stage.READ):
+                validate_package(file_path)
+                parser = DocumentProperties.read(file_path)
+        else:
+            # 解析Word文档
+            with timings.measure_memory(Stage.PARSE, memory_mode):
+                parser = DocxParser(file_path, token, timings, staged)
+            timings.paragraph_count = len(parser.paragraphs)
+            timings.table_count = len(parser.tables)
+        result = {}
+
+        # 应用每条规则
+        with timings.measure_memory(Stage.RULE, memory_mode):
+            for rule in rules:
+                if not rule.enabled:
+                    continue
+
+                if token is not None:
+                    token.check()
+                with timings.measure(Stage.rule(rule.header_name)):
+                    if rule.rule_type == ExtractionMode.FILE_PATH:
+                        result[rule.header_name] = extract_path_field(file_path, rule.config)
+                    else:
+                        result[rule.header_name] = apply_rule(parser, rule)
+
+    # 添加文件路径 (如果未设置跳过)
+    if not skip_file_info:
+        result["文件名"] = os.path.basename(file_path)
+        result["文件路径"] = file_path
+
+    timings.add_span(ChromeTrace.DOCUMENT, started_ns, time.perf_counter_ns())
+    return result, timings
+
+
+def extract_routed(file_path, router, skip_file_info=False, token=None, trace=False, memory_mode=None,
+                   staged=False):
+    """按模板特征为文档选择规则集后提取
+
+    先按路径、文档属性和正文开头几个块判断模板，再只运行该模板的规则，其它模板的规则不会执行。
+    返回 (模板名称, 提取结果, StageTimings)，没有匹配的模板时模板名称和提取结果为None；
+    路径不匹配该模板中必需的路径规则时不加载正文，提取结果为None。
+    """
+    token = token or get_process_token()
+    timings = StageTimings(trace)
+    with timings.measure(Stage.CLASSIFY):
+        template = router.classify(file_path, token)
+    if template is None:
+        return None, None, timings
+    if path_skip_reason(file_path, template.rules):
+        return template.name, None, timings
+
+    result, timings = extract_document(file_path, template.rules, skip_file_info, token, trace, memory_mode, timings,
+                                       staged)
+    return template.name, result, timings
+
+
 class BatchExtractionWorker(QRunnable):
     """批量提取工作线程"""
 
+    # 进度和状态更新的最短发送间隔（秒），避免逐文件信号阻塞界面事件循环
+    UPDATE_INTERVAL = 0.1
+
+    # 临时性错误（如文件被占用）的重试次数和首次重试延迟（秒），之后每次延迟加倍
+    MAX_RETRIES = 3
+    RETRY_DELAY = 1.0
+
+    # 有内存预算时，从队列头部最多查找多少个任务来寻找放得下的文档
+    MEMORY_SCAN_LIMIT = 256
+
     class Signals(QObject):
         """工作线程信号"""
         started = pyqtSignal()
         progress = pyqtSignal(int, int)  # current, total
-        taskCompleted = pyqtSignal(int, ExtractionTask)  # index, task
-        taskFailed = pyqtSignal(int, str)  # index, error
+        tasksUpdated = pyqtSignal(list)  # [(index, success, error), ...]，success为None表示按规则跳过
         completed = pyqtSignal(list)  # all tasks
         error = pyqtSignal(str)
 
-    def __init__(self, tasks, output_file=None, append_mode=False, skip_file_info=False):
+    def __init__(self, tasks, output_file=None, append_mode=False, skip_file_info=False,
+                 max_workers=1, cost_estimator=None, exporter=None, scheduler=None, profile_mode=None,
+                 trace=False, memory_budget=None, memory_mode=None, router=None):
         super().__init__()
         self.tasks = tasks
         self.output_file = output_file
         self.append_mode = append_mode
         self.skip_file_info = skip_file_info
-        self.should_stop = False
+        self.max_workers = max(1, max_workers or 1)
+        self.cost_estimator = cost_estimator or CostEstimator()
+        self.exporter = exporter  # 传入上一批次的导出器时直接在其工作簿上继续写入
+        self.scheduler = scheduler  # 提供时按全局预算限制并行数
+        # 提供TemplateRouter时按模板特征为每个文档选择规则集，结果写入以模板命名的工作表
+        self.router = router
+        self.rule_profile = BatchRuleProfile(router.rules() if router else tasks[0].rules if tasks else [])
+        self.slow_report = None  # 处理结束后生成的SlowDocumentReport
+        # 指定ProfileMode时在性能分析器下运行，子进程的分析数据随结果返回后合并
+        self.profiler = BatchProfiler(profile_mode) if profile_mode else None
+        # 开启时记录Chrome Trace时间线，关闭时为None
+        self.trace = ChromeTrace() if trace else None
+        self._submitted = {}  # 任务索引 -> 提交到进程池的时间（ns），仅记录时间线时使用
+        # 内存预算（字节），设置时跳过预计超出预算的文档，并行时限制在途文档的预计内存之和
+        self.memory_budget = MemoryBudget(memory_budget, trace or bool(profile_mode)) if memory_budget else None
+        self.memory_mode = memory_mode
+        self.skipped = set()  # 不分发的任务索引：路径不匹配或预计超出内存预算
+        self.path_skipped = set()  # 路径不匹配规则或任何模板而跳过的任务索引
+        self.over_budget = set()  # 预计超出预算而跳过的任务索引
+        self.memory_deferred = set()  # 因预算推迟分发过的任务索引
+        self.peak_rss = 0  # 主进程的常驻内存峰值（字节）
         self.signals = self.Signals()
 
+        # 并行处理时令牌需要在子进程间共享
+        if self.max_workers > 1 and len(tasks) > 1:
+            self.token = CancellationToken.for_processes()
+        else:
+            self.token = CancellationToken()
+
+        self._deferred = []  # 等待重试的任务堆: (可重试时间, 已重试次数, 任务索引)
+        self._attempts = {}  # 任务索引 -> 已重试次数，并行时重新分发推迟的任务使用
+        self._rows = {}  # 重排缓冲区: 任务索引 -> 提取结果（失败、取消或跳过时为None）
+        self._next_row = 0  # 下一个要写入的任务索引
+        self._pending_updates = []
+        self._last_flush = 0.0
+        self._done = 0
+        self._total = len(tasks)
+
     def run(self):
         """线程执行函数"""
+        if self.profiler is not None:
+            self.profiler.start()
+
         try:
             self.signals.started.emit()
 
             # 创建Excel导出器
-            exporter = ExcelExporter()
-            if self.output_file:
-                exporter.set_output_file(self.output_file, self.append_mode)
-
-            # 对每个任务进行处理
-            total = len(self.tasks)
+            if self.exporter is None:
+                self.exporter = ExcelExporter()
+                if self.output_file:
+                    self.exporter.set_output_file(self.output_file, self.append_mode)
+            if self.router is not None:
+                # 按模板顺序分配工作表标题，截断后重名的模板各自使用带后缀的工作表
+                self.exporter.register_sheets(template.name for template in self.router.templates)
 
             # 初始进度
-            self.signals.progress.emit(0, total)
+            self.signals.progress.emit(0, self._total)
 
-            for i, task in enumerate(self.tasks):
-                if self.should_stop:
-                    task.cancel()
-                    self.signals.taskFailed.emit(i, "任务已取消")
-                    continue
-
-                try:
-                    # 处理任务
-                    task.start()
+            # 在读取任何文件之前按路径规则跳过文档，再跳过预计超出内存预算的文档
+            self._apply_path_rules()
+            self._apply_memory_budget()
+            for i in sorted(self.skipped):
+                self._finish_row(i)
 
-                    # 解析Word文档
-                    parser = DocxParser(task.file_path)
-                    result = {}
+            if self.max_workers > 1 and self._total > 1:
+                self._run_parallel()
+            else:
+                self._run_sequential()
 
-                    # 应用每条规则
-                    for rule in task.rules:
-                        if not rule.enabled:
-                            continue
+            # 处理因临时性错误而推迟的任务
+            self._run_deferred()
 
-                        value = self._apply_rule(parser, rule)
-                        result[rule.header_name] = value
+            # 发送剩余的状态更新
+            self._flush_updates()
 
-                    # 添加文件路径 (如果未设置跳过)
-                    if not self.skip_file_info:
-                        result["文件名"] = os.path.basename(task.file_path)
-                        result["文件路径"] = task.file_path
+            self.slow_report = SlowDocumentReport.from_tasks(self.tasks)
 
-                    # 标记任务完成
-                    task.complete(result)
-
-                    # 添加到Excel
-                    if self.output_file:
-                        exporter.add_row(result)
-
-                    self.signals.taskCompleted.emit(i, task)
-
-                except Exception as e:
-                    # 任务处理失败
-                    task.fail(str(e))
-                    self.signals.taskFailed.emit(i, str(e))
+            # 保存Excel
+            if self.output_file:
+                with self._span("保存Excel", Stage.EXPORT):
+                    self.exporter.save()
+            self._update_peak_rss()
 
-                # 在每个任务完成后更新进度为i+1
-                self.signals.progress.emit(i + 1, total)
+            if self.profiler is not None:
+                self.profiler.stop()
 
-            # 保存Excel
             if self.output_file:
-                exporter.save()
+                self._save_reports()
 
             # 确保最终进度为100%
-            self.signals.progress.emit(total, total)
+            self.signals.progress.emit(self._total, self._total)
 
             self.signals.completed.emit(self.tasks)
 
         except Exception as e:
             self.signals.error.emit(f"批量处理任务出错: {str(e)}")
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
+
+    def _run_sequential(self):
+        """在当前线程中按原始顺序逐个处理，在文件边界重试已到时间的推迟任务"""
+        for i, task in enumerate(self.tasks):
+            if i in self.skipped:
+                continue
+
+            try:
+                # 文件边界：暂停时在此等待，已取消时结束循环
+                self.token.check()
+            except OperationCanceled:
+                self._cancel_tasks([j for j in range(i, self._total) if j not in self.skipped])
+                return
+
+            self._retry_ready()
+            self._process_task(i, task)
+
+    def _retry_ready(self):
+        """重试已到可重试时间的推迟任务"""
+        while self._deferred and self._deferred[0][0] <= time.monotonic():
+            _, attempt, i = heapq.heappop(self._deferred)
+            self._process_task(i, self.tasks[i], attempt)
+
+    def _process_task(self, i, task, attempt=0):
+        """在当前线程中处理单个任务，结果经重排缓冲区按原始顺序写入"""
+        try:
+            # 处理任务
+            task.start()
+            func, args = self._job(task, self.token)
+            result = self._record_result(i, task, func(*args))
+
+            # 添加到Excel
+            if result is not None:
+                self._report(i, True, "")
+            self._finish_row(i, result)
+
+        except OperationCanceled:
+            self._cancel_task(i, task)
+        except Exception as e:
+            # 任务处理失败
+            self._handle_failure(i, task, e, attempt)
+
+    def _run_parallel(self):
+        """在进程池中并行处理，按估算成本从大到小分发任务
+
+        大文件先处理可以避免列表末尾的几个大文件拖长整体耗时；
+        导出时通过重排缓冲区按原始文件顺序写入，输出与顺序处理一致。
+        同时在途的文件数在每个文件边界按调度器的当前预算重新计算，
+        交互性工作运行时批量提取会让出核心；设置内存预算时在途文档的预计内存之和不超过预算。
+        子进程共享同一个取消令牌，停止或暂停会在正在解析的文档内部生效。
+        因临时性错误推迟的任务到时间后重新放到队首分发，重试结果同样按原始顺序写入。
+        """
+        candidates = [i for i in range(self._total) if i not in self.skipped]
+        order = self.cost_estimator.order_largest_first([self.tasks[i] for i in candidates])
+        queue = deque(candidates[position] for position in order)
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker_process,
+                                 initargs=self.token.events) as executor:
+            futures = {}
+            while queue or futures or self._deferred:
+                if self.token.is_cancelled:
+                    # 尚未分发和等待重试的任务一次性取消
+                    self._cancel_tasks(list(queue) + [i for _, _, i in self._deferred])
+                    queue.clear()
+                    self._deferred.clear()
+                elif not self.token.is_paused:
+                    while self._deferred and self._deferred[0][0] <= time.monotonic():
+                        _, attempt, i = heapq.heappop(self._deferred)
+                        self._attempts[i] = attempt
+                        queue.appendleft(i)
+                    limit = self.max_workers
+                    if self.scheduler is not None:
+                        limit = min(limit, self.scheduler.batch_slots())
+                    while queue and len(futures) < limit:
+                        i = self._next_task(queue, futures)
+                        if i is None:
+                            break
+                        task = self.tasks[i]
+                        task.start()
+                        futures[self._submit(executor, i)] = i
+
+                if not futures:
+                    if self.token.is_paused:
+                        # 暂停中且没有在途任务
+                        self.token.wait_resumed(self.UPDATE_INTERVAL)
+                    elif self._deferred:
+                        # 只剩等待重试的任务
+                        time.sleep(min(self.UPDATE_INTERVAL, max(0.0, self._deferred[0][0] - time.monotonic())))
+                    continue
 
-    def _apply_rule(self, parser, rule):
-        """应用提取规则"""
-        if rule.rule_type == ExtractionMode.REGEX:
-            pattern = rule.config.get("pattern", "")
-            group = rule.config.get("group", 0)
-            return parser.extract_with_regex(pattern, group)
-
-        elif rule.rule_type == ExtractionMode.POSITION:
-            start_index = rule.config.get("start_index", 0)
-            end_index = rule.config.get("end_index")
-            return parser.extract_by_position(start_index, end_index)
-
-        elif rule.rule_type == ExtractionMode.BOOKMARK:
-            bookmark_name = rule.config.get("bookmark_name", "")
-            return parser.extract_by_bookmark(bookmark_name)
-
-        elif rule.rule_type == ExtractionMode.TABLE_CELL:
-            table_index = rule.config.get("table_index", 0)
-            row_index = rule.config.get("row_index", 0)
-            col_index = rule.config.get("column_index", 0)
-            return parser.extract_table_cell(table_index, row_index, col_index)
-
-        elif rule.rule_type == ExtractionMode.TABLE_COLUMN:
-            table_index = rule.config.get("table_index", 0)
-            col_index = rule.config.get("column_index", 0)
-            has_header = rule.config.get("has_header", True)
-            return parser.extract_table_column(table_index, col_index, has_header)
-
-        elif rule.rule_type == ExtractionMode.TABLE_ROW:
-            table_index = rule.config.get("table_index", 0)
-            row_index = rule.config.get("row_index", 0)
-            return parser.extract_table_row(table_index, row_index)
-
-        elif rule.rule_type == ExtractionMode.TABLE_FULL:
-            table_index = rule.config.get("table_index", 0)
-            has_header = rule.config.get("has_header", True)
-            return parser.extract_table(table_index, has_header)
-
+                if self.trace is None:
+                    done, _ = wait(futures, timeout=self.UPDATE_INTERVAL, return_when=FIRST_COMPLETED)
+                else:
+                    with self.trace.span("等待子进程", "wait", {"in_flight": len(futures)}):
+                        done, _ = wait(futures, timeout=self.UPDATE_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures.pop(future)
+                    task = self.tasks[i]
+
+                    try:
+                        result = self._record_result(i, task, self._result(future))
+                        if result is not None:
+                            self._report(i, True, "")
+                        self._finish_row(i, result)
+                    except OperationCanceled:
+                        self._cancel_task(i, task)
+                    except Exception as e:
+                        self._handle_failure(i, task, e, self._attempts.get(i, 0))
+
+    def _finish_row(self, i, result=None):
+        """任务已有最终结果，按原始顺序写入重排缓冲区中已就绪的行
+
+        推迟重试的任务在得到最终结果前一直占着自己的位置，其后的行暂存在缓冲区中，
+        因此重试后的输出顺序仍与输入一致；暂存的时间不超过重试的退避时间。
+        """
+        self._rows[i] = result
+        while self._next_row in self._rows:
+            row = self._rows.pop(self._next_row)
+            if row is not None:
+                self._export_ready(self._next_row, row)
+            self._next_row += 1
+
+    def _export_ready(self, i, result):
+        """写入已轮到的行，写入失败时只将该任务标记为失败，不中断整个批次
+
+        任务完成时已计入进度，这里只发送状态更新，不重复计数。
+        """
+        task = self.tasks[i]
+        try:
+            self._export_row(i, task, result)
+        except Exception as e:
+            task.fail(f"写入结果失败: {str(e)}")
+            self._pending_updates.append((i, False, task.error))
+
+    def _next_task(self, queue, futures):
+        """从队列中取出下一个要分发的任务
+
+        有内存预算时跳过与在途文档合计超出预算的任务，改为分发后面较小的文档；
+        都放不下时返回None，等在途文档完成后再分发。没有在途文档时总是分发队首任务。
+        """
+        if self.memory_budget is None or not futures:
+            return queue.popleft()
+
+        in_flight = sum(self.tasks[i].predicted_memory or 0 for i in futures.values())
+        for position, i in enumerate(queue):
+            if position >= self.MEMORY_SCAN_LIMIT:
+                break
+            if self.memory_budget.fits(self.tasks[i].predicted_memory, in_flight):
+                del queue[position]
+                return i
+            self.memory_deferred.add(i)
         return None
 
+    def _job(self, task, token=None):
+        """任务的提取函数及参数，子进程中令牌为None，使用子进程初始化时设置的令牌
+
+        只有性能分析和记录时间线时分阶段加载文档，其余情况不额外保留解压后的副本。
+        """
+        trace = self.trace is not None
+        staged = trace or self.profiler is not None
+        if self.router is None:
+            return extract_document, (task.file_path, task.rules, self.skip_file_info, token, trace,
+                                      self.memory_mode, None, staged)
+        return extract_routed, (task.file_path, self.router, self.skip_file_info, token, trace, self.memory_mode,
+                                staged)
+
+    def _submit(self, executor, task_index):
+        """把任务提交到进程池，性能分析时在子进程中包装为profiled_call，记录时间线时记下提交时间"""
+        task = self.tasks[task_index]
+        if self.trace is not None:
+            self._submitted[task_index] = ChromeTrace.now()
+        func, args = self._job(task)
+        if self.profiler is None:
+            return executor.submit(func, *args)
+        return executor.submit(profiled_call, self.profiler.mode, func, *args)
+
+    def _record_result(self, i, task, output):
+        """记录提取函数的返回值并完成任务，返回要导出的行
+
+        没有匹配的模板，或路径不匹配所属模板中必需的路径规则时跳过任务并返回None。
+        """
+        rules = None
+        if self.router is None:
+            result, timings = output
+        else:
+            task.template, result, timings = output
+            if task.template is None:
+                reason = "没有匹配的模板，已跳过"
+            else:
+                rules = self.router.template(task.template).rules
+                reason = path_skip_reason(task.file_path, rules) if result is None else ""
+            if reason:
+                task.record_timings(timings)
+                task.skip(reason)
+                if task.template is not None:
+                    self.path_skipped.add(i)
+                self._report(i, None, reason)
+                return None
+
+        task.record_timings(timings)
+        task.complete(result)
+        self.rule_profile.record(result, task.timings, rules)
+        return result
+
+    def _result(self, future):
+        """取出子进程的提取结果，性能分析时合并子进程的分析数据"""
+        if self.profiler is None:
+            return future.result()
+        output, data = future.result()
+        self.profiler.add_data(data)
+        return output
+
+    def _run_deferred(self):
+        """按退避时间依次重试剩余的推迟任务，结果仍按原始顺序写入"""
+        while self._deferred:
+            if self.token.is_cancelled:
+                self._cancel_tasks([i for _, _, i in self._deferred])
+                self._deferred.clear()
+                return
+
+            ready_time, attempt, i = heapq.heappop(self._deferred)
+            task = self.tasks[i]
+
+            # 等待到可重试时间，期间响应停止请求
+            while not self.token.is_cancelled and time.monotonic() < ready_time:
+                time.sleep(min(0.05, max(0.0, ready_time - time.monotonic())))
+
+            try:
+                self.token.check()
+            except OperationCanceled:
+                heapq.heappush(self._deferred, (ready_time, attempt, i))
+                continue
+
+            self._process_task(i, task, attempt)
+
+    def _apply_path_rules(self):
+        """按路径规则或模板的路径特征跳过文档，只匹配路径字符串，不读取文件
+
+        按模板路由时，路径不匹配任何模板的特征，或不匹配每个候选模板中必需的路径规则时跳过；
+        只有部分候选模板的路径规则不匹配时，在分类后按所属模板的路径规则判断（见extract_routed）。
+        """
+        for i, task in enumerate(self.tasks):
+            if self.router is None:
+                reason = path_skip_reason(task.file_path, task.rules)
+            else:
+                candidates = self.router.candidates(task.file_path)
+                reasons = [path_skip_reason(task.file_path, template.rules) for template in candidates]
+                if not candidates:
+                    reason = "路径不匹配任何模板，已跳过"
+                elif all(reasons):
+                    reason = reasons[0]
+                else:
+                    reason = ""
+            if reason:
+                self.skipped.add(i)
+                self.path_skipped.add(i)
+                task.skip(reason)
+                self._report(i, None, reason)
+
+    def _apply_memory_budget(self):
+        """预测每个文档所需的内存，超出预算的文档直接标记为失败，可在调高预算后重试"""
+        if self.memory_budget is None:
+            return
+
+        for i, task in enumerate(self.tasks):
+            if i in self.skipped or not self._loads_document(task):
+                # 已跳过，或不加载正文，所需内存与文档大小无关
+                continue
+            task.predicted_memory = self.memory_budget.predict(task.file_path)
+            if self.memory_budget.exceeds(task.predicted_memory):
+                self.skipped.add(i)
+                self.over_budget.add(i)
+                task.fail(f"预计内存 {format_size(task.predicted_memory)} 超出预算 "
+                          f"{format_size(self.memory_budget.limit)}，已跳过")
+                self._report(i, False, task.error)
+
+    def _loads_document(self, task):
+        """提取时是否可能完整加载文档，按模板路由时考虑路径匹配的所有模板"""
+        if self.router is None:
+            rule_sets = [task.rules]
+        else:
+            rule_sets = [template.rules for template in self.router.candidates(task.file_path)]
+        return any(not path_only(rules) and not metadata_only(rules) for rules in rule_sets)
+
+    def _update_peak_rss(self):
+        """更新主进程的常驻内存峰值，顺序处理时包含各步骤测量前被重置的峰值"""
+        self.peak_rss = max(self.peak_rss, process_peak_rss() or 0)
+
+    def timing_summary(self):
+        """汇总本批次已完成任务的分阶段耗时和内存峰值"""
+        summary = BatchTimingSummary()
+        for task in self.tasks:
+            if task.status == TaskStatus.COMPLETED:
+                summary.add(task.timings, task.file_name)
+        summary.process_peak_rss = self.peak_rss
+        summary.over_budget = len(self.over_budget)
+        summary.path_skipped = len(self.path_skipped)
+        summary.deferred = len(self.memory_deferred)
+        return summary
+
+    def _handle_failure(self, i, task, error, attempt=0):
+        """处理任务失败：临时性错误推迟重试，其它错误直接标记失败"""
+        if not self.token.is_cancelled and attempt < self.MAX_RETRIES and is_transient_error(error):
+            ready_time = time.monotonic() + self.RETRY_DELAY * (2 ** attempt)
+            heapq.heappush(self._deferred, (ready_time, attempt + 1, i))
+            return
+
+        task.fail(str(error))
+        self._report(i, False, str(error))
+        self._finish_row(i)
+
+    def _cancel_task(self, i, task):
+        """取消单个正在处理的任务"""
+        task.cancel()
+        self._report(i, False, "任务已取消")
+        self._finish_row(i)
+
+    def _cancel_tasks(self, indices):
+        """批量取消任务，合并为一次状态通知"""
+        for i in indices:
+            self.tasks[i].cancel()
+            self._done += 1
+            self._pending_updates.append((i, False, "任务已取消"))
+            self._finish_row(i)
+        self._flush_updates()
+
+    def _export_row(self, i, task, result):
+        """将提取结果写入Excel，耗时计入任务的写入阶段"""
+        if self.output_file:
+            key = task.row_key if task.row_key is not None else i
+            if task.timings is None:
+                self.exporter.add_row(result, task.template, key)
+                return
+            with task.timings.measure(Stage.EXPORT):
+                self.exporter.add_row(result, task.template, key)
+
+    def _save_reports(self):
+        """在输出文件旁保存本批次的规则统计和慢文档报告，保存失败不影响批处理结果"""
+        with self._span("保存报告", Stage.EXPORT):
+            try:
+                self.rule_profile.save_json(BatchRuleProfile.output_path(self.output_file))
+            except OSError as e:
+                print(f"保存规则统计失败: {e}")
+
+            try:
+                self.slow_report.save_csv(SlowDocumentReport.output_path(self.output_file))
+            except OSError as e:
+                print(f"保存慢文档报告失败: {e}")
+
+            if self.profiler is not None:
+                try:
+                    self.profiler.save(self.profiler.output_path(self.output_file))
+                except OSError as e:
+                    print(f"保存性能分析结果失败: {e}")
+
+        if self.trace is not None:
+            for i, task in enumerate(self.tasks):
+                self.trace.add_task(i, task.file_name, task.timings, self._submitted.get(i))
+            try:
+                self.trace.save(ChromeTrace.output_path(self.output_file))
+            except OSError as e:
+                print(f"保存时间线失败: {e}")
+
+    def _span(self, name, category):
+        """开启时间线时记录代码块的时间段，否则什么也不做"""
+        if self.trace is None:
+            return nullcontext()
+        return self.trace.span(name, category)
+
+    def _report(self, index, success, error):
+        """记录单个任务的最终状态，按时间窗口合并后批量发送"""
+        self._done += 1
+        self._pending_updates.append((index, success, error))
+        self._update_peak_rss()
+
+        now = time.monotonic()
+        if now - self._last_flush >= self.UPDATE_INTERVAL:
+            self._flush_updates()
+
+    def _flush_updates(self):
+        """发送累积的状态更新和最新进度"""
+        self._last_flush = time.monotonic()
+
+        if self._pending_updates:
+            updates, self._pending_updates = self._pending_updates, []
+            self.signals.tasksUpdated.emit(updates)
+
+        self.signals.progress.emit(self._done, self._total)
+
+    @property
+    def should_stop(self):
+        """是否已请求停止"""
+        return self.token.is_cancelled
+
     def stop(self):
-        """停止处理"""
-        self.should_stop = True
+        """停止处理，正在解析的文档会在下一个检查点中止"""
+        self.token.cancel()
+
+    def pause(self):
+        """暂停处理，导出器和已提取的结果保留在内存中"""
+        self.token.pause()
+
+    def resume(self):
+        """恢复处理"""
+        self.token.resume()
+
+    @property
+    def is_paused(self):
+        """是否处于暂停状态"""
+        return self.token.is_paused
 
 
 class TaskManager(QObject):
@@ -213,46 +811,84 @@ class TaskManager(QObject):
 
     taskStarted = pyqtSignal()
     taskProgress = pyqtSignal(int, int)  # current, total
-    taskItemCompleted = pyqtSignal(int, bool)  # index, success
-    taskCompleted = pyqtSignal(int, ExtractionTask)  # index, task
-    taskFailed = pyqtSignal(int, str)  # index, error
+    tasksUpdated = pyqtSignal(list)  # [(index, success, error), ...]，success为None表示按规则跳过
     allTasksCompleted = pyqtSignal()
     taskError = pyqtSignal(str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.thread_pool = QThreadPool()
-        self.thread_pool.setMaxThreadCount(4)  # 限制最大线程数
+        self.scheduler = TaskScheduler.instance()
         self.worker = None
         self.tasks = []
+        self.cost_estimator = CostEstimator()  # 跨批次保留的实际耗时记录
+        self.last_exporter = None  # 上一批次的导出器，重试时直接在其工作簿上把结果放回原位
+        self.rule_profile = None  # 上一批次的规则统计（BatchRuleProfile）
+        self.slow_report = None  # 上一批次的慢文档报告（SlowDocumentReport）
 
-    def create_tasks(self, file_paths, rules):
+    def create_tasks(self, file_paths, rules, file_sizes=None):
         """创建批处理任务"""
+        file_sizes = file_sizes or {}
         self.tasks = []
         for path in file_paths:
-            task = ExtractionTask(path, rules)
+            task = ExtractionTask(path, rules, file_sizes.get(path))
             self.tasks.append(task)
         return self.tasks
 
-    def start_processing(self, output_file=None, append_mode=False, skip_file_info=False):
-        """开始处理任务"""
+    def get_retryable_tasks(self):
+        """获取上一批次中失败或被取消的任务"""
+        return [task for task in self.tasks if task.status in (TaskStatus.FAILED, TaskStatus.CANCELED)]
+
+    def create_retry_tasks(self, rules=None):
+        """根据上一批次中失败或被取消的任务创建重试任务，重试任务沿用原任务的输出位置"""
+        retry_tasks = []
+        for i, task in enumerate(self.tasks):
+            if task.status not in (TaskStatus.FAILED, TaskStatus.CANCELED):
+                continue
+            retry_task = ExtractionTask(task.file_path, rules or task.rules, task.file_size)
+            retry_task.row_key = task.row_key if task.row_key is not None else i
+            retry_tasks.append(retry_task)
+        self.tasks = retry_tasks
+        return self.tasks
+
+    def start_processing(self, output_file=None, append_mode=False, skip_file_info=False, max_workers=1,
+                         reuse_output=False, profile_mode=None, trace=False, memory_budget=None, memory_mode=None):
+        """开始处理任务
+
+        reuse_output为True时结果写入上一批次的输出：如果上一批次的工作簿仍在内存中，且输出文件
+        保存后没有在磁盘上被修改，则直接在其上把各行放回原来的位置，避免重新加载整个Excel文件；
+        否则以追加模式打开文件，结果追加到末尾，不会覆盖用户对文件的修改。
+        profile_mode为ProfileMode之一时在性能分析器下运行，结果保存在输出文件旁；
+        trace为True时在输出文件旁保存Chrome Trace格式的时间线；
+        memory_budget为内存预算（字节），预计超出预算的文档跳过，并行时在途文档的预计内存之和不超过预算；
+        memory_mode为MemoryMode之一时记录每个文档的内存峰值，默认不测量。
+        """
         if not self.tasks:
             self.taskError.emit("没有任务可处理")
             return False
 
+        exporter = None
+        if reuse_output:
+            if (self.last_exporter is not None and self.last_exporter.output_file == output_file
+                    and self.last_exporter.unchanged_on_disk()):
+                exporter = self.last_exporter
+            else:
+                self.last_exporter = None
+                append_mode = True
+
         # 创建工作线程
-        self.worker = BatchExtractionWorker(self.tasks, output_file, append_mode, skip_file_info)
+        self.worker = BatchExtractionWorker(self.tasks, output_file, append_mode, skip_file_info,
+                                            max_workers, self.cost_estimator, exporter, self.scheduler,
+                                            profile_mode, trace, memory_budget, memory_mode)
 
         # 连接信号
         self.worker.signals.started.connect(self.taskStarted)
         self.worker.signals.progress.connect(self.taskProgress)
-        self.worker.signals.taskCompleted.connect(self.taskCompleted)  # 新增连接
-        self.worker.signals.taskFailed.connect(self.taskFailed)  # 新增连接
+        self.worker.signals.tasksUpdated.connect(self.tasksUpdated)
         self.worker.signals.completed.connect(self._on_all_completed)
         self.worker.signals.error.connect(self.taskError)
 
         # 启动工作线程
-        self.thread_pool.start(self.worker)
+        self.scheduler.submit(self.worker, Priority.BATCH)
         return True
 
     def stop_processing(self):
@@ -262,23 +898,46 @@ class TaskManager(QObject):
             return True
         return False
 
-    def _on_task_completed(self, index, task):
-        """单个任务完成"""
-        self.taskItemCompleted.emit(index, True)
+    def pause_processing(self):
+        """暂停处理任务"""
+        if self.worker:
+            self.worker.pause()
+            return True
+        return False
 
-    def _on_task_failed(self, index, error):
-        """单个任务失败"""
-        self.taskItemCompleted.emit(index, False)
+    def resume_processing(self):
+        """恢复处理任务"""
+        if self.worker:
+            self.worker.resume()
+            return True
+        return False
 
     def _on_all_completed(self, tasks):
         """所有任务完成"""
+        # 保留导出器，重试失败文件时无需重新加载工作簿
+        if self.worker is not None:
+            self.last_exporter = self.worker.exporter
+            self.rule_profile = self.worker.rule_profile
+            self.slow_report = self.worker.slow_report
+
+        # 记录实际耗时，供后续批次估算任务成本
+        for task in tasks:
+            if task.status == TaskStatus.COMPLETED:
+                self.cost_estimator.record(task.file_path, task.processing_time, task.file_size)
         self.allTasksCompleted.emit()
 
+    def get_stage_summary(self):
+        """汇总当前批次已完成任务的分阶段耗时和内存峰值"""
+        if self.worker is None:
+            return BatchTimingSummary()
+        return self.worker.timing_summary()
+
     def get_progress(self):
         """获取进度信息"""
         total = len(self.tasks)
         completed = sum(1 for task in self.tasks
-                        if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED])
+                        if task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELED,
+                                           TaskStatus.SKIPPED])
         return completed, total
 
     def get_statistics(self):
@@ -287,6 +946,7 @@ class TaskManager(QObject):
         completed = sum(1 for task in self.tasks if task.status == TaskStatus.COMPLETED)
         failed = sum(1 for task in self.tasks if task.status == TaskStatus.FAILED)
         canceled = sum(1 for task in self.tasks if task.status == TaskStatus.CANCELED)
+        skipped = sum(1 for task in self.tasks if task.status == TaskStatus.SKIPPED)
         pending = sum(1 for task in self.tasks if task.status == TaskStatus.PENDING)
 
         return {
@@ -294,6 +954,7 @@ class TaskManager(QObject):
             "completed": completed,
             "failed": failed,
             "canceled": canceled,
+            "skipped": skipped,
             "pending": pending,
             "success_rate": completed / total if total > 0 else 0
         }
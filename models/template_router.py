@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+模板路由模型 - 按文档的廉价特征判断所属模板，只对文档运行该模板的规则集
+"""
+
+import json
+import os
+import re
+
+from models.extraction_rule import ExtractionRule
+from utils.doc_peek import DocumentPeek
+from utils.doc_properties import DocumentProperties
+from utils.path_rules import path_text
+
+
+class TemplateSignature:
+    """模板特征
+
+    设置的条件全部满足时匹配，未设置任何条件时匹配所有文档。条件按读取成本从低到高检查：
+    路径（不读取文件）、文档属性（只读取docProps）、正文开头的段落和表格首行（只预读前几个块）。
+    """
+
+    DEFAULT_BLOCK_LIMIT = 20
+
+    def __init__(self, path_pattern="", path_source="path", properties=None, literals=None, table_header=None,
+                 block_limit=DEFAULT_BLOCK_LIMIT):
+        self.path_pattern = path_pattern  # 路径需要匹配的正则表达式
+        self.path_source = path_source  # 匹配的路径部分，见PATH_SOURCES
+        self.properties = properties or {}  # 属性名 -> 属性值需要匹配的正则表达式
+        self.literals = literals or []  # 开头段落中必须出现的文字
+        self.table_header = table_header or []  # 开头某个表格的首行必须包含的单元格文字
+        self.block_limit = block_limit  # 检查开头的多少个段落或表格
+
+    @property
+    def needs_properties(self):
+        """是否需要读取文档属性"""
+        return bool(self.properties)
+
+    @property
+    def needs_body(self):
+        """是否需要预读正文开头"""
+        return bool(self.literals or self.table_header)
+
+    def match_path(self, file_path):
+        """路径是否匹配，没有路径条件时总是匹配"""
+        return not self.path_pattern or re.search(self.path_pattern, path_text(file_path, self.path_source)) is not None
+
+    def match_properties(self, properties):
+        """文档属性是否匹配"""
+        return all(re.search(pattern, str(properties.extract_property(name)))
+                   for name, pattern in self.properties.items())
+
+    def match_body(self, peek):
+        """正文开头是否包含所有文字，以及是否有首行包含所有表头文字的表格"""
+        text = "\n".join(peek.paragraphs(self.block_limit))
+        if not all(literal in text for literal in self.literals):
+            return False
+        if not self.table_header:
+            return True
+        return any(all(any(name in cell for cell in header) for name in self.table_header)
+                   for header in peek.table_headers(self.block_limit))
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "path_pattern": self.path_pattern,
+            "path_source": self.path_source,
+            "properties": self.properties,
+            "literals": self.literals,
+            "table_header": self.table_header,
+            "block_limit": self.block_limit,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典创建，正则表达式无效时抛出ValueError"""
+        signature = cls(data.get("path_pattern", ""), data.get("path_source", "path"), data.get("properties"),
+                        data.get("literals"), data.get("table_header"),
+                        data.get("block_limit", cls.DEFAULT_BLOCK_LIMIT))
+        for pattern in [signature.path_pattern, *signature.properties.values()]:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"无效的正则表达式 {pattern}: {e}")
+        return signature
+
+
+class RuleTemplate:
+    """命名的规则集及其模板特征"""
+
+    def __init__(self, name, rules, signature=None):
+        self.name = name
+        self.rules = rules
+        self.signature = signature or TemplateSignature()
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "name": self.name,
+            "rules": [rule.to_dict() for rule in self.rules],
+            "signature": self.signature.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data, base_dir=""):
+        """从字典创建，rules可以是规则列表，也可以是相对于base_dir的规则文件路径"""
+        name = data.get("name", "")
+        if not name:
+            raise ValueError("模板缺少名称")
+
+        rules_data = data.get("rules", [])
+        if isinstance(rules_data, str):
+            with open(os.path.join(base_dir, rules_data), "r", encoding="utf-8") as f:
+                rules_data = json.load(f)
+        rules = [rule for rule in (ExtractionRule.from_dict(item) for item in rules_data) if rule.enabled]
+        if not rules:
+            raise ValueError(f"模板 {name} 没有启用的规则")
+
+        return cls(name, rules, TemplateSignature.from_dict(data.get("signature", {})))
+
+
+class TemplateRouter:
+    """按顺序检查各模板的特征，文档归入第一个匹配的模板
+
+    只包含规则和特征等基本数据，可以传给进程池的子进程，在子进程中分类后直接提取。
+    文档属性和正文开头都只在第一次需要时读取一次，由所有模板共用。
+    """
+
+    def __init__(self, templates):
+        self.templates = list(templates)
+        self._by_name = {template.name: template for template in self.templates}
+        if len(self._by_name) != len(self.templates):
+            raise ValueError("模板名称重复")
+
+    def template(self, name):
+        """按名称查找模板"""
+        return self._by_name.get(name)
+
+    def rules(self):
+        """所有模板的规则"""
+        return [rule for template in self.templates for rule in template.rules]
+
+    def candidates(self, file_path):
+        """路径匹配的模板，不读取文件"""
+        return [template for template in self.templates if template.signature.match_path(file_path)]
+
+    def classify(self, file_path, token=None):
+        """判断文档所属的模板，没有匹配的模板时返回None"""
+        candidates = self.candidates(file_path)
+        properties = None
+        peek = None
+        for template in candidates:
+            signature = template.signature
+            if signature.needs_properties:
+                if properties is None:
+                    properties = DocumentProperties.read(file_path)
+                if not signature.match_properties(properties):
+                    continue
+            if signature.needs_body:
+                if peek is None:
+                    block_limit = max(candidate.signature.block_limit for candidate in candidates
+                                      if candidate.signature.needs_body)
+                    peek = DocumentPeek.read(file_path, block_limit, token)
+                if not signature.match_body(peek):
+                    continue
+            return template
+        return None
+
+    @classmethod
+    def load(cls, file_path):
+        """从JSON文件加载模板列表，规则文件路径相对于该文件所在目录"""
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("templates", [])
+        base_dir = os.path.dirname(os.path.abspath(file_path))
+        return cls(RuleTemplate.from_dict(item, base_dir) for item in data)
+
+    def save(self, file_path):
+        """保存为JSON文件，规则以列表形式内联保存"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump([template.to_dict() for template in self.templates], f, ensure_ascii=False, indent=2)
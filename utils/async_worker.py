@@ -5,7 +5,10 @@
 异步处理工具 - 处理异步任务
 """
 
-from PyQt6.QtCore import QObject, pyqtSignal, QRunnable, QThreadPool
+from PyQt6.QtCore import QObject, pyqtSignal, QRunnable
+
+from utils.cancellation import CancellationToken, OperationCanceled
+from utils.task_scheduler import Priority, TaskScheduler
 
 
 class AsyncWorkerSignals(QObject):
@@ -15,11 +18,16 @@ class AsyncWorkerSignals(QObject):
     finished = pyqtSignal()
     result = pyqtSignal(object)
     error = pyqtSignal(str)
+    canceled = pyqtSignal()
     progress = pyqtSignal(int, int)  # current, total
 
 
 class AsyncWorker(QRunnable):
-    """异步工作线程"""
+    """异步工作线程
+
+    任务函数声明cancel_token参数时会收到工作线程的取消令牌，
+    在检查点调用token.check()即可响应stop()、pause()和resume()。
+    """
 
     def __init__(self, task_func, *args, **kwargs):
         super().__init__()
@@ -28,26 +36,47 @@ class AsyncWorker(QRunnable):
         self.task_func = task_func
         self.args = args
         self.kwargs = kwargs
-        self.should_stop = False
+        self.token = CancellationToken()
 
         # 如果有传递进度回调，则包装它
         if "progress_callback" in kwargs:
             self.kwargs["progress_callback"] = self._on_progress
 
+        # 如果有传递取消令牌参数，则替换为本工作线程的令牌
+        if "cancel_token" in kwargs:
+            self.kwargs["cancel_token"] = self.token
+
     def run(self):
         """运行任务"""
         try:
+            self.token.check()
             self.signals.started.emit()
             result = self.task_func(*self.args, **self.kwargs)
+            self.token.check()
             self.signals.result.emit(result)
+        except OperationCanceled:
+            self.signals.canceled.emit()
         except Exception as e:
             self.signals.error.emit(str(e))
         finally:
             self.signals.finished.emit()
 
+    @property
+    def should_stop(self):
+        """是否已请求停止"""
+        return self.token.is_cancelled
+
     def stop(self):
         """停止任务"""
-        self.should_stop = True
+        self.token.cancel()
+
+    def pause(self):
+        """暂停任务，任务函数在下一个检查点阻塞"""
+        self.token.pause()
+
+    def resume(self):
+        """恢复任务"""
+        self.token.resume()
 
     def _on_progress(self, current, total):
         """进度回调"""
@@ -55,34 +84,36 @@ class AsyncWorker(QRunnable):
 
 
 class AsyncTaskManager:
-    """异步任务管理器"""
+    """异步任务管理器，任务提交到全局调度器"""
 
-    def __init__(self, max_threads=4):
-        self.thread_pool = QThreadPool()
-        self.thread_pool.setMaxThreadCount(max_threads)
+    def __init__(self, priority=Priority.INTERACTIVE):
+        self.scheduler = TaskScheduler.instance()
+        self.priority = priority
         self.active_tasks = {}
 
     def run_task(self, task_id, task_func, *args, **kwargs):
         """运行异步任务"""
-        # 如果已有同ID任务在运行，先停止它
+        # 如果已有同ID任务在运行，先停止它（仍在排队的直接移出队列）
         if task_id in self.active_tasks:
-            self.active_tasks[task_id].stop()
+            self.scheduler.cancel(self.active_tasks[task_id])
 
         # 创建新任务
         worker = AsyncWorker(task_func, *args, **kwargs)
         self.active_tasks[task_id] = worker
 
         # 设置任务完成后的清理
-        worker.signals.finished.connect(lambda: self._cleanup_task(task_id))
+        worker.signals.finished.connect(lambda: self._cleanup_task(task_id, worker))
 
         # 启动任务
-        self.thread_pool.start(worker)
+        self.scheduler.submit(worker, self.priority)
         return worker.signals
 
     def stop_task(self, task_id):
         """停止指定任务"""
         if task_id in self.active_tasks:
-            self.active_tasks[task_id].stop()
+            if self.scheduler.cancel(self.active_tasks[task_id]):
+                # 尚未开始就被移出队列，不会再发出finished信号
+                del self.active_tasks[task_id]
             return True
         return False
 
@@ -95,7 +126,8 @@ class AsyncTaskManager:
         """检查任务是否在运行"""
         return task_id in self.active_tasks
 
-    def _cleanup_task(self, task_id):
+    def _cleanup_task(self, task_id, worker):
         """清理完成的任务"""
-        if task_id in self.active_tasks:
+        # 同ID的新任务已替换旧任务时不要误删
+        if self.active_tasks.get(task_id) is worker:
             del self.active_tasks[task_id]
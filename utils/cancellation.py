@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+取消令牌 - 在解析和规则执行过程中协作式地响应取消与暂停
+"""
+
+import multiprocessing
+import threading
+
+
+class OperationCanceled(Exception):
+    """操作已被取消"""
+
+    def __init__(self, message="操作已取消"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """协作式取消令牌
+
+    长时间运行的代码在检查点调用check()：已取消时抛出OperationCanceled，
+    已暂停时阻塞到恢复或取消为止。使用进程间事件创建的令牌可以通过进程池的
+    initializer传给子进程，父进程中的取消和暂停会立即被子进程看到。
+    """
+
+    def __init__(self, cancel_event=None, resume_event=None):
+        self._cancel_event = cancel_event or threading.Event()
+        self._resume_event = resume_event or threading.Event()
+        self._resume_event.set()
+
+    @classmethod
+    def for_processes(cls):
+        """创建可在子进程间共享的令牌"""
+        return cls(multiprocessing.Event(), multiprocessing.Event())
+
+    @property
+    def events(self):
+        """底层事件对象，用于传给子进程后重建令牌"""
+        return self._cancel_event, self._resume_event
+
+    @classmethod
+    def from_events(cls, cancel_event, resume_event):
+        """使用已有的事件对象重建令牌（不改变暂停状态）"""
+        token = cls.__new__(cls)
+        token._cancel_event = cancel_event
+        token._resume_event = resume_event
+        return token
+
+    def cancel(self):
+        """请求取消，同时唤醒处于暂停中的代码"""
+        self._cancel_event.set()
+        self._resume_event.set()
+
+    @property
+    def is_cancelled(self):
+        """是否已请求取消"""
+        return self._cancel_event.is_set()
+
+    def pause(self):
+        """暂停，下一个检查点开始阻塞"""
+        if not self.is_cancelled:
+            self._resume_event.clear()
+
+    def resume(self):
+        """恢复运行"""
+        self._resume_event.set()
+
+    @property
+    def is_paused(self):
+        """是否处于暂停状态"""
+        return not self._resume_event.is_set()
+
+    def wait_resumed(self, timeout=None):
+        """等待恢复或取消，返回是否已不再暂停"""
+        return self._resume_event.wait(timeout)
+
+    def check(self):
+        """检查点：暂停时阻塞，已取消时抛出OperationCanceled"""
+        # 取消时会同时设置恢复事件，暂停中的等待会立即返回
+        self._resume_event.wait()
+        if self._cancel_event.is_set():
+            raise OperationCanceled()
+
+
+# 进程池子进程中的取消令牌，由init_worker_process在子进程启动时设置
+_process_token = None
+
+
+def init_worker_process(cancel_event, resume_event):
+    """进程池子进程初始化：使用父进程的事件重建取消令牌"""
+    global _process_token
+    _process_token = CancellationToken.from_events(cancel_event, resume_event)
+
+
+def get_process_token():
+    """获取当前子进程的取消令牌，不在进程池中时返回None"""
+    return _process_token
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+时间线导出 - 将批处理各阶段记录为Chrome Trace Event JSON，可在chrome://tracing或Perfetto中查看
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from utils.stage_timer import Stage
+
+
+class ChromeTrace:
+    """批处理时间线
+
+    每个进程显示为一个泳道：批处理线程所在的主进程记录分发、等待子进程和写入Excel，
+    提取子进程记录读取、解压、解析和每条规则。任务从提交到子进程开始处理之间的
+    排队等待记录为异步事件，单独显示一行。
+    只有开启时才创建该对象，关闭时批处理只多一次None判断。
+    """
+
+    DOCUMENT = "document"  # 整个文档处理的时间段名称
+
+    def __init__(self):
+        self.events = []
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._processes = {self._pid: "批处理"}
+        self._threads = {}
+
+    @staticmethod
+    def now():
+        """当前时间（ns），与StageTimings的时间段使用同一时钟"""
+        return time.perf_counter_ns()
+
+    def _ts(self, ns):
+        """转换为相对批次开始的微秒数"""
+        return (ns - self._origin) / 1000
+
+    def complete(self, name, category, started_ns, finished_ns, pid=None, tid=None, args=None):
+        """记录一个完整的时间段"""
+        pid = pid or self._pid
+        tid = tid or threading.get_native_id()
+        if pid == self._pid:
+            self._threads.setdefault((pid, tid), "批处理线程")
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": self._ts(started_ns),
+            "dur": (finished_ns - started_ns) / 1000,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category, args=None):
+        """记录代码块在当前线程上的时间段"""
+        started = self.now()
+        try:
+            yield
+        finally:
+            self.complete(name, category, started, self.now(), args=args)
+
+    def add_queue_wait(self, index, file_name, submitted_ns, started_ns):
+        """记录任务提交后在进程池中排队的时间"""
+        if started_ns <= submitted_ns:
+            return
+        for phase, ns in (("b", submitted_ns), ("e", started_ns)):
+            self.events.append({
+                "name": "排队",
+                "cat": "queue",
+                "ph": phase,
+                "id": index,
+                "ts": self._ts(ns),
+                "pid": self._pid,
+                "tid": 0,
+                "args": {"file": file_name} if phase == "b" else {},
+            })
+
+    def add_task(self, index, file_name, timings, submitted_ns=None):
+        """记录一个任务的所有时间段"""
+        if timings is None or not timings.spans:
+            return
+
+        for name, started, finished, pid, tid in timings.spans:
+            if pid != self._pid:
+                self._processes.setdefault(pid, f"提取进程 {pid}")
+            if name == self.DOCUMENT:
+                self.complete(file_name, "document", started, finished, pid, tid, {"index": index})
+                if submitted_ns is not None:
+                    self.add_queue_wait(index, file_name, submitted_ns, started)
+            else:
+                category = Stage.RULE if name.startswith(Stage.RULE + ":") else name
+                self.complete(Stage.display_name(name), category, started, finished, pid, tid)
+
+    def to_dict(self):
+        """转换为Trace Event格式"""
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": name}}
+                    for pid, name in self._processes.items()]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                     for (pid, tid), name in self._threads.items()]
+        return {"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}
+
+    def save(self, file_path):
+        """保存为JSON文件"""
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+
+    @staticmethod
+    def output_path(output_file):
+        """与输出Excel同目录的时间线文件路径"""
+        base, _ = os.path.splitext(output_file)
+        return f"{base}_trace.json"
@@ -56,7 +56,12 @@ class ConfigManager(QObject):
             "files": {
                 "recent_files": [],
                 "recent_directories": [],
-                "recursive_scan": True
+                "recursive_scan": True,
+                "include_patterns": ["*.docx"],
+                "exclude_patterns": []
+            },
+            "preview": {
+                "prefetch_neighbours": 1
             },
             "rules": {
                 "recent_rule_files": [],
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+任务耗时估算工具 - 为批量提取任务估算处理成本并排序
+"""
+
+import os
+
+
+class CostEstimator:
+    """任务成本估算器
+
+    优先使用之前运行中观测到的实际耗时，否则按文件大小结合已观测的
+    平均处理速率估算。没有任何历史数据时直接以文件大小作为成本。
+    """
+
+    def __init__(self, max_history=100000):
+        self.max_history = max_history
+        self.history = {}  # 文件路径 -> 实际处理耗时（秒）
+        self._total_bytes = 0
+        self._total_seconds = 0.0
+
+    def record(self, file_path, seconds, size=None):
+        """记录一次实际处理耗时"""
+        if seconds is None or seconds <= 0:
+            return
+
+        if len(self.history) >= self.max_history and file_path not in self.history:
+            # 超出上限时丢弃最早的记录
+            self.history.pop(next(iter(self.history)))
+        self.history[file_path] = seconds
+
+        if size:
+            self._total_bytes += size
+            self._total_seconds += seconds
+
+    @property
+    def seconds_per_byte(self):
+        """已观测的平均处理速率（秒/字节）"""
+        if self._total_bytes <= 0:
+            return None
+        return self._total_seconds / self._total_bytes
+
+    def estimate(self, file_path, size=None):
+        """估算单个文件的处理成本"""
+        if file_path in self.history:
+            return self.history[file_path]
+
+        if size is None:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = 0
+
+        rate = self.seconds_per_byte
+        if rate is None:
+            # 没有速率数据时，成本单位与文件大小一致即可
+            return float(size)
+        return size * rate
+
+    def order_largest_first(self, tasks):
+        """按估算成本从大到小返回任务索引（LPT调度顺序）"""
+        if self.seconds_per_byte is None and self.history:
+            # 有部分耗时记录但无速率时，统一按大小比较以免单位混用
+            costs = [self._size_of(task) for task in tasks]
+        else:
+            costs = [self.estimate(task.file_path, task.file_size) for task in tasks]
+
+        return sorted(range(len(tasks)), key=lambda i: costs[i], reverse=True)
+
+    @staticmethod
+    def _size_of(task):
+        """获取任务文件大小"""
+        if task.file_size is not None:
+            return task.file_size
+        try:
+            return os.path.getsize(task.file_path)
+        except OSError:
+            return 0
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文档开头预读 - 流式解压并解析主文档开头的若干段落和表格，不构建完整的文档对象
+"""
+
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+
+from utils.package_validator import InvalidPackageError, validate_package
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY = f"{_W_NS}body"
+_W_P = f"{_W_NS}p"
+_W_TBL = f"{_W_NS}tbl"
+_W_TR = f"{_W_NS}tr"
+_W_TC = f"{_W_NS}tc"
+_W_T = f"{_W_NS}t"
+_W_SDT = f"{_W_NS}sdt"
+_W_SDT_CONTENT = f"{_W_NS}sdtContent"
+
+# 解析过程中各元素在正文结构中的角色，块和表格的行可以包在内容控件（w:sdt > w:sdtContent）中
+_BLOCKS = "blocks"  # 直接包含段落和表格的元素：w:body或块级内容控件的w:sdtContent
+_BLOCK_SDT = "block-sdt"  # 块级内容控件
+_PARAGRAPH = "paragraph"
+_TABLE = "table"  # 正文中的表格，单元格中的嵌套表格不计为块
+_ROWS = "rows"  # 行级内容控件的w:sdtContent，直接包含表格的行
+_ROW_SDT = "row-sdt"  # 行级内容控件
+_ROW = "row"
+
+
+def _role(tag, parent_role, depth):
+    """元素在正文结构中的角色，与正文块无关的元素返回None"""
+    if parent_role is None:
+        return _BLOCKS if depth == 2 and tag == _W_BODY else None
+    if parent_role == _BLOCKS:
+        return {_W_P: _PARAGRAPH, _W_TBL: _TABLE, _W_SDT: _BLOCK_SDT}.get(tag)
+    if parent_role == _BLOCK_SDT:
+        return _BLOCKS if tag == _W_SDT_CONTENT else None
+    if parent_role in (_TABLE, _ROWS):
+        return {_W_TR: _ROW, _W_SDT: _ROW_SDT}.get(tag)
+    if parent_role == _ROW_SDT:
+        return _ROWS if tag == _W_SDT_CONTENT else None
+    return None
+
+
+def _text(element):
+    """元素中所有文本节点连接后的文本"""
+    return "".join(node.text or "" for node in element.iter(_W_T))
+
+
+class DocumentPeek:
+    """主文档开头的正文块
+
+    只按顺序读取正文中前block_limit个段落或表格，段落保留文本，表格只保留第一行各单元格的文本，
+    块级内容控件中的段落和表格与正文中的一样计入。读到足够的块后立即停止解压，耗时和内存与文档总大小无关（开头的大表格需要读完才能继续）。
+    """
+
+    def __init__(self, blocks=None):
+        self.blocks = blocks or []  # (是否为表格, 段落文本或表格首行) 列表
+
+    def paragraphs(self, limit=None):
+        """前limit个块中的段落文本"""
+        return [value for is_table, value in self.blocks[:limit] if not is_table]
+
+    def table_headers(self, limit=None):
+        """前limit个块中各表格的首行"""
+        return [value for is_table, value in self.blocks[:limit] if is_table]
+
+    @classmethod
+    def read(cls, file_path, block_limit, token=None):
+        """预读文档开头，无效文档抛出InvalidPackageError，主文档不是有效的XML时抛出ValueError"""
+        main_part = validate_package(file_path)
+        if token is not None:
+            token.check()
+
+        blocks = []
+        roles = [None]  # 从根元素到当前元素各层的角色，第一项对应文档之外
+        table_header = None  # 正在读取的表格的首行，读完首行前为None
+        try:
+            with zipfile.ZipFile(file_path) as archive, archive.open(main_part) as stream:
+                for event, element in ET.iterparse(stream, events=("start", "end")):
+                    if event == "start":
+                        role = _role(element.tag, roles[-1], len(roles))
+                        roles.append(role)
+                        if role == _TABLE:
+                            table_header = None
+                        continue
+
+                    role = roles.pop()
+                    if role == _ROW:
+                        # 表格读完首行即可计入，其余的行逐行释放，很大的表格也不会整体保留在内存中
+                        if table_header is None:
+                            table_header = [_text(cell) for cell in element.findall(_W_TC)]
+                            blocks.append((True, table_header))
+                        element.clear()
+                    elif role == _PARAGRAPH:
+                        blocks.append((False, _text(element)))
+                        element.clear()
+                    elif role == _TABLE:
+                        if table_header is None:
+                            blocks.append((True, []))
+                        element.clear()
+                    elif roles[-1] == _BLOCKS:
+                        element.clear()
+
+                    if len(blocks) >= block_limit:
+                        break
+        except ET.ParseError as e:
+            raise ValueError(f"无法解析文档开头: {e}")
+        except zipfile.BadZipFile:
+            raise InvalidPackageError("不是有效的zip文件，可能不是Word文档")
+        except (zipfile.LargeZipFile, NotImplementedError, RuntimeError, zlib.error) as e:
+            raise InvalidPackageError(f"无法读取zip内容: {e}")
+        return cls(blocks)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文档属性 - 只读取docx包中的核心属性和应用程序属性部件，不加载正文
+"""
+
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+from datetime import datetime
+
+from utils.package_validator import PACKAGE_RELS_PART, InvalidPackageError, PackageLimits
+
+CORE_PART = "docProps/core.xml"
+APP_PART = "docProps/app.xml"
+
+CORE_PROPERTIES_REL = "/metadata/core-properties"
+EXTENDED_PROPERTIES_REL = "/extended-properties"
+
+_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_CP_NS = "{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}"
+_DC_NS = "{http://purl.org/dc/elements/1.1/}"
+_DCTERMS_NS = "{http://purl.org/dc/terms/}"
+_APP_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/extended-properties}"
+
+# 核心属性（docProps/core.xml）：属性名 -> XML标签
+CORE_PROPERTIES = {
+    "title": f"{_DC_NS}title",
+    "subject": f"{_DC_NS}subject",
+    "author": f"{_DC_NS}creator",
+    "keywords": f"{_CP_NS}keywords",
+    "comments": f"{_DC_NS}description",
+    "last_modified_by": f"{_CP_NS}lastModifiedBy",
+    "revision": f"{_CP_NS}revision",
+    "created": f"{_DCTERMS_NS}created",
+    "modified": f"{_DCTERMS_NS}modified",
+    "last_printed": f"{_CP_NS}lastPrinted",
+    "category": f"{_CP_NS}category",
+    "content_status": f"{_CP_NS}contentStatus",
+}
+
+# 应用程序属性（docProps/app.xml）：属性名 -> XML标签
+APP_PROPERTIES = {
+    "pages": f"{_APP_NS}Pages",
+    "words": f"{_APP_NS}Words",
+    "characters": f"{_APP_NS}Characters",
+    "characters_with_spaces": f"{_APP_NS}CharactersWithSpaces",
+    "lines": f"{_APP_NS}Lines",
+    "paragraphs": f"{_APP_NS}Paragraphs",
+    "total_time": f"{_APP_NS}TotalTime",
+    "application": f"{_APP_NS}Application",
+    "app_version": f"{_APP_NS}AppVersion",
+    "company": f"{_APP_NS}Company",
+    "manager": f"{_APP_NS}Manager",
+    "template": f"{_APP_NS}Template",
+}
+
+# 属性的显示名称，顺序即界面中的顺序
+PROPERTY_NAMES = {
+    "title": "标题",
+    "subject": "主题",
+    "author": "作者",
+    "keywords": "关键词",
+    "comments": "备注",
+    "category": "类别",
+    "content_status": "内容状态",
+    "last_modified_by": "最后修改者",
+    "revision": "修订号",
+    "created": "创建时间",
+    "modified": "修改时间",
+    "last_printed": "最后打印时间",
+    "pages": "页数",
+    "words": "字数",
+    "characters": "字符数",
+    "characters_with_spaces": "字符数（含空格）",
+    "lines": "行数",
+    "paragraphs": "段落数",
+    "total_time": "编辑时间（分钟）",
+    "application": "应用程序",
+    "app_version": "应用程序版本",
+    "company": "公司",
+    "manager": "经理",
+    "template": "模板",
+}
+
+# 日期类型的核心属性，格式化为 "YYYY-MM-DD HH:MM:SS"
+DATE_PROPERTIES = {"created", "modified", "last_printed"}
+
+# 整数类型的属性
+INTEGER_PROPERTIES = {"revision", "pages", "words", "characters", "characters_with_spaces", "lines",
+                      "paragraphs", "total_time"}
+
+
+def _format_date(text):
+    """将W3CDTF日期格式化为 "YYYY-MM-DD HH:MM:SS"，无法解析时原样返回"""
+    try:
+        return datetime.fromisoformat(text).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return text
+
+
+def _convert(name, text):
+    """按属性类型转换文本"""
+    if name in DATE_PROPERTIES:
+        return _format_date(text)
+    if name in INTEGER_PROPERTIES:
+        try:
+            return int(text)
+        except ValueError:
+            return text
+    return text
+
+
+class DocumentProperties:
+    """文档的核心属性和应用程序属性
+
+    只解压docProps下的两个小部件，不解析正文，适合只需要作者、日期、页数等信息的清点任务。
+    页数、字数等统计值由Word在保存时写入，没有由Word保存过的文档可能没有这些属性。
+    """
+
+    def __init__(self, values=None):
+        self.values = values or {}
+
+    def extract_property(self, name):
+        """获取属性值，文档中没有该属性时返回空字符串，与DocxParser的同名方法一致"""
+        return self.values.get(name, "")
+
+    def to_dict(self):
+        """以显示名称为键的字典"""
+        return {PROPERTY_NAMES[name]: self.values[name] for name in PROPERTY_NAMES if name in self.values}
+
+    @classmethod
+    def read(cls, file_path, limits=None):
+        """读取文档属性，不是有效的zip或部件过大时抛出InvalidPackageError，文件无法读取时抛出OSError"""
+        limits = limits or PackageLimits()
+        values = {}
+        try:
+            with zipfile.ZipFile(file_path) as archive:
+                parts = {info.filename: info for info in archive.infolist()}
+                core_part, app_part = cls._property_parts(archive, parts, limits)
+                for part, tags in ((core_part, CORE_PROPERTIES), (app_part, APP_PROPERTIES)):
+                    root = cls._read_part(archive, parts.get(part), limits)
+                    if root is None:
+                        continue
+                    for name, tag in tags.items():
+                        element = root.find(tag)
+                        if element is not None and element.text and element.text.strip():
+                            values[name] = _convert(name, element.text.strip())
+        except zipfile.BadZipFile:
+            raise InvalidPackageError("不是有效的zip文件，可能不是Word文档")
+        except (zipfile.LargeZipFile, NotImplementedError, RuntimeError, zlib.error) as e:
+            raise InvalidPackageError(f"无法读取zip内容: {e}")
+        return cls(values)
+
+    @staticmethod
+    def _property_parts(archive, parts, limits):
+        """从包关系中找到两个属性部件，没有关系部件或关系时使用默认位置"""
+        core_part, app_part = CORE_PART, APP_PART
+        root = DocumentProperties._read_part(archive, parts.get(PACKAGE_RELS_PART), limits)
+        if root is None:
+            return core_part, app_part
+
+        for rel in root.iter(f"{_REL_NS}Relationship"):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = posixpath.normpath(rel.get("Target", "").lstrip("/"))
+            rel_type = rel.get("Type", "")
+            if rel_type.endswith(CORE_PROPERTIES_REL):
+                core_part = target
+            elif rel_type.endswith(EXTENDED_PROPERTIES_REL):
+                app_part = target
+        return core_part, app_part
+
+    @staticmethod
+    def _read_part(archive, info, limits):
+        """读取并解析属性部件，部件不存在或不是有效的XML时返回None"""
+        if info is None:
+            return None
+        if info.file_size > limits.MAX_DESCRIPTOR_SIZE:
+            raise InvalidPackageError(f"{info.filename} 过大（{info.file_size / 1024 / 1024:.1f} MB）")
+        try:
+            return ET.fromstring(archive.read(info))
+        except ET.ParseError:
+            return None
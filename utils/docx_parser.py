@@ -5,21 +5,49 @@
 Word文档解析工具 - 处理Word文档内容提取
 """
 
+import contextlib
+import io
 import os
 import re
+import zipfile
 
 from docx import Document
 from docx.opc.exceptions import PackageNotFoundError
 
+from utils.cancellation import OperationCanceled
+from utils.doc_properties import DocumentProperties
+from utils.extraction_failure import ExtractionEmpty, ExtractionFailure
+from utils.package_validator import InvalidPackageError, validate_package
+from utils.stage_timer import Stage
+
 
 class DocxParser:
-    """Word文档解析器"""
+    """Word文档解析器
+
+    传入取消令牌时，在预检、分块读入文件和python-docx打开文档这几个步骤之间，以及解析段落和表格、
+    逐个匹配正则的过程中定期检查令牌。python-docx打开文档（解压并构建XML树）的过程中无法检查令牌，
+    很大的文档要等这一步完成后才会响应取消和暂停，耗时与文档大小成正比。
+    传入StageTimings时记录加载和解析的耗时以及读取的字节数：预检和读入文件计入读取阶段，
+    python-docx打开内存中的文件时同时完成解压和XML解析，两者一并计入解析阶段。staged为True时
+    分阶段加载，另外单独记录解压的耗时，但需要额外保留一份解压后的内存副本，只在性能分析和记录时间线时使用。
+    加载前先预检zip中央目录，无效文件和zip炸弹在解压任何正文之前就会被拒绝。
+    """
+
+    # 每处理多少个段落、表格行或正则匹配检查一次取消令牌
+    CHECK_INTERVAL = 200
+
+    # 读入文件时每读多少字节检查一次取消令牌，网络共享上读取大文件时也能及时停止
+    READ_CHUNK = 1024 * 1024
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, token=None, timings=None, staged=False):
         self.file_path = file_path
+        self.token = token
+        self.timings = timings
+        self.staged = staged and timings is not None
         self.document = None
         self.paragraphs = []
         self.tables = []
+        self._properties = None
 
         self._load_document()
 
@@ -29,36 +57,117 @@ class DocxParser:
             if not os.path.exists(self.file_path):
                 raise FileNotFoundError(f"文件不存在: {self.file_path}")
 
-            self.document = Document(self.file_path)
-
-            # 提取段落
-            self.paragraphs = [p.text for p in self.document.paragraphs]
-
-            # 提取表格
-            self.tables = []
-            for table in self.document.tables:
-                table_data = []
-                for i, row in enumerate(table.rows):
-                    row_data = []
-                    for j, cell in enumerate(row.cells):
-                        row_data.append(cell.text)
-                    table_data.append(row_data)
-                self.tables.append(table_data)
+            with self._measure(Stage.READ):
+                validate_package(self.file_path)
+            self._check()
 
+            if self.staged:
+                self.document = self._load_staged()
+            else:
+                data = self._read()
+                self._check()
+                with self._measure(Stage.PARSE):
+                    self.document = Document(io.BytesIO(data))
+                del data
+            self._check()
+
+            with self._measure(Stage.PARSE):
+                # 提取段落
+                self.paragraphs = []
+                for i, p in enumerate(self.document.paragraphs):
+                    if i % self.CHECK_INTERVAL == 0:
+                        self._check()
+                    self.paragraphs.append(p.text)
+
+                # 提取表格
+                self.tables = []
+                for table in self.document.tables:
+                    table_data = []
+                    for i, row in enumerate(table.rows):
+                        if i % self.CHECK_INTERVAL == 0:
+                            self._check()
+                        row_data = []
+                        for j, cell in enumerate(row.cells):
+                            row_data.append(cell.text)
+                        table_data.append(row_data)
+                    self.tables.append(table_data)
+
+        except zipfile.BadZipFile:
+            raise ValueError(f"无法打开文件，可能不是有效的Word文档: {self.file_path}")
         except PackageNotFoundError:
+            # python-docx对无法读取的文件（例如被Word占用）同样报告为包不存在，
+            # 先尝试直接打开文件，让占用错误以原始类型抛出
+            with open(self.file_path, "rb"):
+                pass
             raise ValueError(f"无法打开文件，可能不是有效的Word文档: {self.file_path}")
+        except InvalidPackageError:
+            # 预检的错误信息已经说明原因
+            raise
+        except (PermissionError, BlockingIOError, TimeoutError, OperationCanceled):
+            # 文件被占用等临时性错误保留原始类型，便于批处理时稍后重试；取消同样原样抛出
+            raise
         except Exception as e:
             raise ValueError(f"加载文档时出错: {str(e)}")
 
+    def _load_staged(self):
+        """分阶段加载文档，分别计时
+
+        python-docx在打开文档时同时完成解压和XML解析，无法分别计时。这里先一次性
+        读入文件，再解压全部部件并重新打包为不压缩的内存zip，python-docx打开它时
+        只剩下XML解析的开销。内存zip是额外的一份副本，批处理默认不使用这种方式。
+        """
+        data = self._read()
+        self._check()
+
+        with self._measure(Stage.INFLATE):
+            stored = io.BytesIO()
+            with zipfile.ZipFile(io.BytesIO(data)) as source, \
+                    zipfile.ZipFile(stored, "w", zipfile.ZIP_STORED) as target:
+                for info in source.infolist():
+                    target.writestr(info.filename, source.read(info))
+            del data
+        self._check()
+
+        with self._measure(Stage.PARSE):
+            stored.seek(0)
+            return Document(stored)
+
+    def _read(self):
+        """分块读入整个文件，计入读取阶段；网络共享上慢的文档可以与解析慢的文档区分开"""
+        with self._measure(Stage.READ):
+            chunks = []
+            with open(self.file_path, "rb") as f:
+                while True:
+                    chunk = f.read(self.READ_CHUNK)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    self._check()
+            data = b"".join(chunks)
+            del chunks
+        if self.timings is not None:
+            self.timings.bytes_read += len(data)
+        return data
+
+    def _measure(self, stage):
+        """在传入StageTimings时计时，否则不做任何事"""
+        if self.timings is None:
+            return contextlib.nullcontext()
+        return self.timings.measure(stage)
+
     def extract_with_regex(self, pattern, group=0):
         """使用正则表达式提取文本"""
         try:
             # 将所有段落合并为一个文本
             all_text = "\n".join(self.paragraphs)
 
-            # 应用正则表达式
+            # 应用正则表达式，逐个匹配以便在大文档上响应取消
             regex = re.compile(pattern)
-            matches = regex.findall(all_text)
+            matches = []
+            for i, match in enumerate(regex.finditer(all_text)):
+                if i % self.CHECK_INTERVAL == 0:
+                    self._check()
+                matches.append(self._match_value(regex, match))
 
             # 处理结果
             if not matches:
@@ -72,8 +181,24 @@ class DocxParser:
                 # 如果匹配结果是字符串（单个捕获组或整个匹配）
                 return "\n".join(matches)
 
+        except OperationCanceled:
+            raise
         except Exception as e:
-            return f"正则表达式错误: {str(e)}"
+            return ExtractionFailure(f"正则表达式错误: {str(e)}")
+
+    @staticmethod
+    def _match_value(regex, match):
+        """按findall的规则取单个匹配的值"""
+        if regex.groups == 0:
+            return match.group(0)
+        if regex.groups == 1:
+            return match.group(1) or ""
+        return tuple(g or "" for g in match.groups())
+
+    def _check(self):
+        """检查取消令牌"""
+        if self.token is not None:
+            self.token.check()
 
     def extract_by_position(self, start_index, end_index=None):
         """通过位置索引提取文本"""
@@ -89,14 +214,14 @@ class DocxParser:
             return "\n".join(self.paragraphs[start_index:end_index])
 
         except Exception as e:
-            return f"位置提取错误: {str(e)}"
+            return ExtractionFailure(f"位置提取错误: {str(e)}")
 
     def extract_by_bookmark(self, bookmark_name):
         """通过书签提取文本"""
         try:
             # 遍历文档中的所有书签
             if not hasattr(self.document, 'element') or not hasattr(self.document.element, 'xpath'):
-                return "文档不支持书签访问"
+                return ExtractionEmpty("文档不支持书签访问")
 
             bookmarks = {}
             for bookmark_elem in self.document.element.xpath('//w:bookmark'):
@@ -106,43 +231,43 @@ class DocxParser:
                     # 实际应用可能需要更复杂的解析逻辑
                     return f"书签 '{bookmark_name}' 的内容"
 
-            return f"未找到书签: {bookmark_name}"
+            return ExtractionEmpty(f"未找到书签: {bookmark_name}")
 
         except Exception as e:
-            return f"书签提取错误: {str(e)}"
+            return ExtractionFailure(f"书签提取错误: {str(e)}")
 
     def extract_table_cell(self, table_index, row_index, col_index):
         """提取表格单元格内容"""
         try:
             if table_index < 0 or table_index >= len(self.tables):
-                return f"表格索引越界: {table_index}"
+                return ExtractionFailure(f"表格索引越界: {table_index}")
 
             table = self.tables[table_index]
 
             if row_index < 0 or row_index >= len(table):
-                return f"行索引越界: {row_index}"
+                return ExtractionFailure(f"行索引越界: {row_index}")
 
             if col_index < 0 or col_index >= len(table[row_index]):
-                return f"列索引越界: {col_index}"
+                return ExtractionFailure(f"列索引越界: {col_index}")
 
             return table[row_index][col_index]
 
         except Exception as e:
-            return f"表格单元格提取错误: {str(e)}"
+            return ExtractionFailure(f"表格单元格提取错误: {str(e)}")
 
     def extract_table_column(self, table_index, col_index, has_header=True):
         """提取表格列"""
         try:
             if table_index < 0 or table_index >= len(self.tables):
-                return f"表格索引越界: {table_index}"
+                return ExtractionFailure(f"表格索引越界: {table_index}")
 
             table = self.tables[table_index]
 
             if len(table) == 0:
-                return "表格为空"
+                return ExtractionEmpty("表格为空")
 
             if col_index < 0 or col_index >= len(table[0]):
-                return f"列索引越界: {col_index}"
+                return ExtractionFailure(f"列索引越界: {col_index}")
 
             # 提取列数据
             start_row = 1 if has_header else 0
@@ -151,18 +276,18 @@ class DocxParser:
             return "\n".join(column_data)
 
         except Exception as e:
-            return f"表格列提取错误: {str(e)}"
+            return ExtractionFailure(f"表格列提取错误: {str(e)}")
 
     def extract_table_row(self, table_index, row_index):
         """提取表格行"""
         try:
             if table_index < 0 or table_index >= len(self.tables):
-                return f"表格索引越界: {table_index}"
+                return ExtractionFailure(f"表格索引越界: {table_index}")
 
             table = self.tables[table_index]
 
             if row_index < 0 or row_index >= len(table):
-                return f"行索引越界: {row_index}"
+                return ExtractionFailure(f"行索引越界: {row_index}")
 
             # 提取行数据
             row_data = table[row_index]
@@ -170,18 +295,28 @@ class DocxParser:
             return "\t".join(row_data)
 
         except Exception as e:
-            return f"表格行提取错误: {str(e)}"
+            return ExtractionFailure(f"表格行提取错误: {str(e)}")
+
+    def extract_property(self, name):
+        """提取文档属性，首次使用时从docProps读取"""
+        try:
+            if self._properties is None:
+                self._properties = DocumentProperties.read(self.file_path)
+            return self._properties.extract_property(name)
+
+        except Exception as e:
+            return ExtractionFailure(f"文档属性提取错误: {str(e)}")
 
     def extract_table(self, table_index, has_header=True):
         """提取整个表格"""
         try:
             if table_index < 0 or table_index >= len(self.tables):
-                return f"表格索引越界: {table_index}"
+                return ExtractionFailure(f"表格索引越界: {table_index}")
 
             table = self.tables[table_index]
 
             if not table:
-                return "表格为空"
+                return ExtractionEmpty("表格为空")
 
             # 返回表格数据，适合测试显示
             if has_header and len(table) > 0:
@@ -192,4 +327,4 @@ class DocxParser:
                 return table
 
         except Exception as e:
-            return f"表格提取错误: {str(e)}"
+            return ExtractionFailure(f"表格提取错误: {str(e)}")
@@ -6,6 +6,7 @@ Excel导出工具 - 处理数据导出到Excel
 """
 
 import os
+import re
 
 import openpyxl
 from openpyxl.styles import Font, Alignment
@@ -13,7 +14,12 @@ from openpyxl.utils import get_column_letter
 
 
 class ExcelExporter:
-    """Excel导出器"""
+    """Excel导出器
+
+    默认写入一个数据工作表；add_row指定工作表名称时（例如按模板路由），
+    各数据工作表分别记录表头和当前行。add_row指定排序键时，保存前各工作表中带键的行按键排序，
+    重试的结果虽然写在末尾，保存后回到原来的位置。
+    """
 
     def __init__(self):
         self.output_file = None
@@ -21,10 +27,16 @@ class ExcelExporter:
         self.worksheet = None
         self.current_row = 1
         self.headers = []
+        self._sheet_states = {}  # 不在使用中的数据工作表名称 -> (表头, 当前行)
+        self._sheet_titles = {}  # 数据工作表名称 -> 去除非法字符、截断并去重后的工作表标题
+        self._row_keys = {}  # 数据工作表标题 -> [第一个带键的行号, 按行顺序的排序键列表]
+        self._saved_stamp = None  # 上次保存后输出文件的 (修改时间ns, 大小)
 
     def set_output_file(self, file_path, append_mode=False):
         """设置输出文件"""
         self.output_file = file_path
+        self._row_keys = {}
+        self._saved_stamp = None
 
         if append_mode and os.path.exists(file_path):
             # 追加模式，打开现有文件
@@ -55,12 +67,69 @@ class ExcelExporter:
         self.worksheet.title = "提取数据"
         self.current_row = 1
         self.headers = []
+        self._sheet_states = {}
+        self._sheet_titles = {}
+        self._row_keys = {}
+
+    def register_sheets(self, names):
+        """按顺序为各名称分配工作表标题，重名时的后缀与写入顺序无关"""
+        for name in names:
+            self._sheet_title(name)
+
+    def _sheet_title(self, name):
+        """名称对应的工作表标题
+
+        替换工作表标题中不允许的字符并截断到31个字符，与其它名称的标题重复（不区分大小写）时
+        加上 "~2"、"~3" 等后缀，不同名称的数据不会写入同一个工作表。
+        """
+        title = self._sheet_titles.get(name)
+        if title is not None:
+            return title
+
+        base = re.sub(r"[\[\]:*?/\\]", "_", name)[:31] or "提取数据"
+        used = {existing.casefold() for existing in self._sheet_titles.values()}
+        title = base
+        number = 2
+        while title.casefold() in used:
+            suffix = f"~{number}"
+            title = base[:31 - len(suffix)] + suffix
+            number += 1
+        self._sheet_titles[name] = title
+        return title
+
+    def select_sheet(self, name):
+        """切换到指定名称的数据工作表，不存在时创建；还没有写入任何数据的默认工作表直接改名使用"""
+        title = self._sheet_title(name)
+        if self.worksheet.title == title:
+            return
+
+        if not self.headers and self.current_row == 1 and not self._sheet_states:
+            if title not in self.workbook.sheetnames:
+                self.worksheet.title = title
+                return
+
+        self._sheet_states[self.worksheet.title] = (self.headers, self.current_row)
+        if title in self._sheet_states:
+            self.worksheet = self.workbook[title]
+            self.headers, self.current_row = self._sheet_states.pop(title)
+        elif title in self.workbook.sheetnames:
+            # 追加模式下已有的工作表，从现有内容继续写入
+            self.worksheet = self.workbook[title]
+            self.headers = [cell.value for cell in self.worksheet[1] if cell.value]
+            self.current_row = self.worksheet.max_row + 1 if self.headers else 1
+        else:
+            self.worksheet = self.workbook.create_sheet(title=title)
+            self.headers = []
+            self.current_row = 1
 
-    def add_row(self, data_dict):
-        """添加一行数据"""
+    def add_row(self, data_dict, sheet_name=None, key=None):
+        """添加一行数据，指定sheet_name时写入该名称的数据工作表，指定key时保存前按key排序"""
         if not self.workbook:
             raise ValueError("未设置输出文件")
 
+        if sheet_name:
+            self.select_sheet(sheet_name)
+
         # 处理表头
         if not self.headers:
             self._write_headers(list(data_dict.keys()))
@@ -96,8 +165,44 @@ class ExcelExporter:
                 # 普通数据直接写入
                 self.worksheet.cell(row=self.current_row, column=col).value = value
 
+        if key is not None:
+            self._record_key(key)
         self.current_row += 1
 
+    def _record_key(self, key):
+        """记录当前行的排序键，带键的行必须连续，中间插入了不带键的行时从当前行重新开始记录"""
+        entry = self._row_keys.get(self.worksheet.title)
+        if entry is None or entry[0] + len(entry[1]) != self.current_row:
+            entry = self._row_keys[self.worksheet.title] = [self.current_row, []]
+        entry[1].append(key)
+
+    def _sort_rows(self, sheet, first_row, keys):
+        """把带键的行按键排序
+
+        只移动第一个不在位置上的行及其后的行：先按新顺序逐行移到表格末尾之后，再整体移回，
+        每个单元格只移动两次，与插入的行数无关。
+        """
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        start = next((position for position, index in enumerate(order) if position != index), None)
+        if start is None:
+            return
+
+        last_column = get_column_letter(sheet.max_column)
+        spare_row = sheet.max_row + 1
+        for position in range(start, len(order)):
+            source = first_row + order[position]
+            target = spare_row + position - start
+            sheet.move_range(f"A{source}:{last_column}{source}", rows=target - source)
+        sheet.move_range(f"A{spare_row}:{last_column}{spare_row + len(order) - start - 1}",
+                         rows=first_row + start - spare_row)
+
+        # 移动单元格不会更新超链接记录的位置
+        for row in sheet.iter_rows(min_row=first_row + start, max_row=first_row + len(order) - 1):
+            for cell in row:
+                if cell.hyperlink is not None:
+                    cell.hyperlink.ref = cell.coordinate
+        keys.sort()
+
     def _write_headers(self, headers):
         """写入表头"""
         self.headers = headers
@@ -167,12 +272,34 @@ class ExcelExporter:
         if not self.workbook or not self.output_file:
             raise ValueError("未设置输出文件")
 
-        # 调整主工作表列宽
+        # 调整数据工作表列宽
         self._adjust_column_width(self.worksheet)
+        for title in self._sheet_states:
+            self._adjust_column_width(self.workbook[title])
+
+        # 重试的行写在末尾，保存前放回原来的位置
+        for title, (first_row, keys) in self._row_keys.items():
+            self._sort_rows(self.workbook[title], first_row, keys)
 
         # 保存文件
         try:
             self.workbook.save(self.output_file)
-            return True
         except Exception as e:
             raise ValueError(f"保存Excel文件失败: {str(e)}")
+        self._saved_stamp = self._file_stamp()
+        return True
+
+    def _file_stamp(self):
+        """输出文件的 (修改时间ns, 大小)，文件不存在时返回None"""
+        try:
+            stat = os.stat(self.output_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def unchanged_on_disk(self):
+        """输出文件在上次保存后是否未被修改，未保存过或文件已被修改、删除时返回False
+
+        内存中的工作簿只在此时才能继续使用，否则再次保存会覆盖用户在Excel中所做的修改。
+        """
+        return self._saved_stamp is not None and self._file_stamp() == self._saved_stamp
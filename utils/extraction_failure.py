@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+提取结果标记 - 提取方法出错或没有找到内容时返回的说明文字
+"""
+
+
+class ExtractionFailure(str):
+    """规则提取失败时返回的错误信息
+
+    仍然是字符串，写入Excel和在界面中显示时与普通的提取结果相同；
+    统计命中率时按类型判断失败，不依赖错误信息的文字，提取到的正文中含有“错误: ”也不会被误判。
+    可以从进程池的子进程直接返回。
+    """
+
+    __slots__ = ()
+
+
+class ExtractionEmpty(str):
+    """规则没有提取到内容时返回的说明，如表格为空、未找到书签
+
+    与ExtractionFailure一样仍然是字符串，统计时按类型判断为空结果，不依赖说明的文字。
+    """
+
+    __slots__ = ()
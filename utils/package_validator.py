@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+docx包预检 - 只读取zip中央目录和很小的描述部件，在解压正文之前拒绝无效文件和zip炸弹
+"""
+
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+
+# 主文档部件的内容类型（文档、模板及其启用宏的版本）
+MAIN_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.template.main+xml",
+    "application/vnd.ms-word.document.macroEnabled.main+xml",
+    "application/vnd.ms-word.template.macroEnabledTemplate.main+xml",
+}
+
+CONTENT_TYPES_PART = "[Content_Types].xml"
+PACKAGE_RELS_PART = "_rels/.rels"
+DEFAULT_MAIN_PART = "word/document.xml"
+OFFICE_DOCUMENT_REL = "/officeDocument"
+
+_CT_NS = "{http://schemas.openxmlformats.org/package/2006/content-types}"
+_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+class InvalidPackageError(ValueError):
+    """文件不是有效的Word文档，或部件大小、压缩比超出限制"""
+
+
+class PackageLimits:
+    """预检的限制
+
+    zipfile解压时不会超过中央目录中声明的大小（声明不实时以CRC错误结束），
+    因此只检查中央目录即可限制解析时实际解压的数据量。
+    """
+
+    MAX_PARTS = 10000  # 部件数
+    MAX_XML_PART_SIZE = 256 * 1024 * 1024  # 单个XML部件解压后的大小，XML会被完整解析为DOM
+    MAX_TOTAL_SIZE = 2 * 1024 * 1024 * 1024  # 全部部件解压后的总大小
+    MAX_RATIO = 200  # 单个部件的压缩比，正常文档的XML通常在5到30之间
+    RATIO_MIN_SIZE = 1024 * 1024  # 解压后小于此大小的部件不检查压缩比
+    MAX_DESCRIPTOR_SIZE = 1024 * 1024  # [Content_Types].xml和_rels/.rels解压后的大小
+
+    def __init__(self, **overrides):
+        for name, value in overrides.items():
+            if not hasattr(type(self), name):
+                raise AttributeError(f"未知的限制: {name}")
+            setattr(self, name, value)
+
+
+def _mb(size):
+    """格式化为MB"""
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+def _check_sizes(infos, limits):
+    """检查部件数、解压大小和压缩比"""
+    if len(infos) > limits.MAX_PARTS:
+        raise InvalidPackageError(f"部件过多（{len(infos)} 个）")
+
+    total = 0
+    for info in infos:
+        total += info.file_size
+        if info.filename.endswith((".xml", ".rels")) and info.file_size > limits.MAX_XML_PART_SIZE:
+            raise InvalidPackageError(f"部件 {info.filename} 解压后 {_mb(info.file_size)}，"
+                                      f"超出限制 {_mb(limits.MAX_XML_PART_SIZE)}")
+        if info.file_size >= limits.RATIO_MIN_SIZE:
+            ratio = info.file_size / max(1, info.compress_size)
+            if ratio > limits.MAX_RATIO:
+                raise InvalidPackageError(f"部件 {info.filename} 压缩比 {ratio:.0f}:1 异常，可能是zip炸弹")
+
+    if total > limits.MAX_TOTAL_SIZE:
+        raise InvalidPackageError(f"解压后共 {_mb(total)}，超出限制 {_mb(limits.MAX_TOTAL_SIZE)}")
+
+
+def _read_descriptor(archive, info, limits):
+    """读取并解析很小的描述部件"""
+    if info.file_size > limits.MAX_DESCRIPTOR_SIZE:
+        raise InvalidPackageError(f"{info.filename} 过大（{_mb(info.file_size)}）")
+    try:
+        return ET.fromstring(archive.read(info))
+    except ET.ParseError:
+        raise InvalidPackageError(f"{info.filename} 不是有效的XML")
+
+
+def _main_part(archive, parts, limits):
+    """从包关系中找到主文档部件，没有关系部件时使用默认位置"""
+    rels = parts.get(PACKAGE_RELS_PART)
+    if rels is None:
+        return DEFAULT_MAIN_PART
+
+    for rel in _read_descriptor(archive, rels, limits).iter(f"{_REL_NS}Relationship"):
+        if rel.get("Type", "").endswith(OFFICE_DOCUMENT_REL) and rel.get("TargetMode") != "External":
+            return posixpath.normpath(rel.get("Target", "").lstrip("/"))
+    raise InvalidPackageError("包关系中没有主文档")
+
+
+def _content_type(content_types, part_name):
+    """部件的内容类型：先查Override，再按扩展名查Default"""
+    default = None
+    extension = posixpath.splitext(part_name)[1].lstrip(".").lower()
+    for element in content_types:
+        if element.tag == f"{_CT_NS}Override" and element.get("PartName", "").lstrip("/") == part_name:
+            return element.get("ContentType")
+        if element.tag == f"{_CT_NS}Default" and element.get("Extension", "").lower() == extension:
+            default = element.get("ContentType")
+    return default
+
+
+def validate_package(file_path, limits=None):
+    """预检docx文件并返回主文档部件名，不通过时抛出InvalidPackageError，文件无法读取时抛出OSError
+
+    检查部件数、各部件解压后的大小和压缩比，[Content_Types].xml存在且有效，
+    主文档部件存在且内容类型为WordprocessingML。只解压两个很小的描述部件，
+    正文和图片等部件都不会被读取。
+    """
+    limits = limits or PackageLimits()
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            infos = archive.infolist()
+            _check_sizes(infos, limits)
+
+            parts = {info.filename: info for info in infos}
+            content_types = parts.get(CONTENT_TYPES_PART)
+            if content_types is None:
+                raise InvalidPackageError(f"缺少 {CONTENT_TYPES_PART}，不是Office文档")
+
+            main_part = _main_part(archive, parts, limits)
+            if main_part not in parts:
+                raise InvalidPackageError(f"缺少主文档部件 {main_part}")
+
+            content_type = _content_type(_read_descriptor(archive, content_types, limits), main_part)
+            if content_type not in MAIN_CONTENT_TYPES:
+                raise InvalidPackageError(f"主文档的内容类型不是Word文档: {content_type or '未知'}")
+            return main_part
+    except zipfile.BadZipFile:
+        raise InvalidPackageError("不是有效的zip文件，可能不是Word文档")
+    except (zipfile.LargeZipFile, NotImplementedError, RuntimeError, zlib.error) as e:
+        # 不支持的压缩方式、加密或损坏的部件等
+        raise InvalidPackageError(f"无法读取zip内容: {e}")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+路径规则 - 从文件路径或文件名中提取字段，不打开文档
+"""
+
+import os
+import re
+
+from utils.extraction_failure import ExtractionFailure
+
+# 匹配的路径部分及显示名称
+PATH_SOURCES = {
+    "name": "文件名",
+    "stem": "文件名（不含扩展名）",
+    "directory": "所在目录",
+    "path": "完整路径",
+}
+
+
+def path_text(file_path, source="name"):
+    """取出要匹配的路径部分，路径分隔符统一为 /，同一条规则在Windows和Linux上写法一致"""
+    path = os.path.abspath(file_path).replace(os.sep, "/")
+    directory, name = path.rsplit("/", 1)
+    if source == "stem":
+        return os.path.splitext(name)[0]
+    if source == "directory":
+        return directory
+    if source == "path":
+        return path
+    return name
+
+
+def match_path(file_path, config):
+    """按规则配置匹配路径，返回re.Match，不匹配时返回None；正则无效时抛出re.error"""
+    pattern = config.get("pattern", "")
+    return re.search(pattern, path_text(file_path, config.get("source", "name")))
+
+
+def extract_path_field(file_path, config):
+    """提取路径字段
+
+    有模板时按模板组合捕获组（如 "\\2-\\1" 或 "\\g<年份>"），否则返回group指定的捕获组；
+    不匹配时返回空字符串，正则无效时返回ExtractionFailure。
+    """
+    try:
+        match = match_path(file_path, config)
+        if match is None:
+            return ""
+        template = config.get("template", "")
+        if template:
+            return match.expand(template)
+        return match.group(config.get("group", 0)) or ""
+
+    except (re.error, IndexError) as e:
+        return ExtractionFailure(f"路径提取错误: {str(e)}")
+
+
+def path_skip_reason(file_path, rules):
+    """按启用的路径规则判断是否跳过文档，返回跳过原因，不跳过时返回空字符串
+
+    只有配置了 required 的规则参与判断，路径不匹配时跳过；正则无效时不跳过，由提取时报告错误。
+    """
+    for rule in rules:
+        if not rule.enabled or not rule.config.get("required"):
+            continue
+        try:
+            if match_path(file_path, rule.config) is None:
+                return f"{PATH_SOURCES.get(rule.config.get('source', 'name'), '路径')}不匹配规则 {rule.field_name}，已跳过"
+        except re.error:
+            continue
+    return ""
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批处理性能分析 - 在确定性或采样分析器下运行批处理并合并子进程的结果
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+
+
+class ProfileMode:
+    """性能分析模式"""
+    DETERMINISTIC = "pstats"  # cProfile，输出pstats文件，可用snakeviz等工具查看
+    SAMPLING = "collapsed"  # 定时采样调用栈，输出折叠栈文件，可用flamegraph.pl或speedscope查看
+
+    NAMES = {
+        DETERMINISTIC: "确定性 (pstats)",
+        SAMPLING: "采样 (火焰图折叠栈)",
+    }
+
+    EXTENSIONS = {
+        DETERMINISTIC: ".pstats",
+        SAMPLING: ".collapsed",
+    }
+
+
+class StackSampler:
+    """采样分析器：后台线程定时记录目标线程的调用栈
+
+    每个调用栈折叠为 "文件:函数;文件:函数;..." 形式的一行并计数，
+    与flamegraph.pl使用的折叠栈格式一致。
+    """
+
+    INTERVAL = 0.005  # 采样间隔（秒）
+
+    def __init__(self, interval=None):
+        self.interval = interval or self.INTERVAL
+        self.counts = Counter()
+        self._target = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """开始采样调用此方法的线程"""
+        self._target = threading.get_ident()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止采样"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """采样循环"""
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+
+
+class _StatsData:
+    """包装从子进程返回的pstats数据，供pstats.Stats加载"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        """pstats.Stats加载数据时调用，数据已经准备好"""
+
+
+class Profiler:
+    """单个线程上的性能分析器，两种模式使用相同的接口"""
+
+    def __init__(self, mode):
+        self.mode = mode
+        if mode == ProfileMode.DETERMINISTIC:
+            self._profile = cProfile.Profile()
+        elif mode == ProfileMode.SAMPLING:
+            self._profile = StackSampler()
+        else:
+            raise ValueError(f"未知的性能分析模式: {mode}")
+
+    def start(self):
+        """开始分析调用此方法的线程"""
+        if self.mode == ProfileMode.DETERMINISTIC:
+            self._profile.enable()
+        else:
+            self._profile.start()
+
+    def stop(self):
+        """停止分析"""
+        if self.mode == ProfileMode.DETERMINISTIC:
+            self._profile.disable()
+        else:
+            self._profile.stop()
+
+    def data(self):
+        """可序列化的分析结果，用于从子进程返回后合并"""
+        if self.mode == ProfileMode.DETERMINISTIC:
+            self._profile.create_stats()
+            return self._profile.stats
+        return dict(self._profile.counts)
+
+
+def profiled_call(mode, func, *args, **kwargs):
+    """在性能分析器下调用函数，返回 (函数结果, 分析数据)
+
+    用于进程池的子进程：每次调用单独分析，数据随结果返回父进程合并。
+    函数抛出异常时分析数据随之丢弃。
+    """
+    profiler = Profiler(mode)
+    profiler.start()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.stop()
+    return result, profiler.data()
+
+
+class BatchProfiler:
+    """一个批次的性能分析
+
+    批处理线程自身由start/stop分析；并行提取时各子进程的分析数据
+    通过add_data合并，最终写入一个文件。
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self._profiler = Profiler(mode)
+        self._running = False
+        self._stats = None  # 合并后的pstats.Stats
+        self._counts = Counter()  # 合并后的折叠栈计数
+
+    def start(self):
+        """开始分析调用此方法的线程"""
+        self._profiler.start()
+        self._running = True
+
+    def stop(self):
+        """停止分析并并入结果，重复调用时不做任何事"""
+        if not self._running:
+            return
+        self._running = False
+        self._profiler.stop()
+        self.add_data(self._profiler.data())
+
+    def add_data(self, data):
+        """合并一份分析数据（来自profiled_call或本线程）"""
+        if not data:
+            return
+        if self.mode == ProfileMode.DETERMINISTIC:
+            if self._stats is None:
+                self._stats = pstats.Stats(_StatsData(data))
+            else:
+                self._stats.add(_StatsData(data))
+        else:
+            self._counts.update(data)
+
+    def save(self, file_path):
+        """保存分析结果"""
+        if self.mode == ProfileMode.DETERMINISTIC:
+            if self._stats is not None:
+                self._stats.dump_stats(file_path)
+        else:
+            with open(file_path, "w", encoding="utf-8") as f:
+                for stack, count in sorted(self._counts.items()):
+                    f.write(f"{stack} {count}\n")
+
+    def output_path(self, output_file):
+        """与输出Excel同目录的分析文件路径"""
+        base, _ = os.path.splitext(output_file)
+        return f"{base}_profile{ProfileMode.EXTENSIONS[self.mode]}"
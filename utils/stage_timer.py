@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+分阶段计时工具 - 记录单个文档各处理阶段的耗时、读取字节数和内存增长
+"""
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+if os.name == "nt":
+    import ctypes
+    from ctypes import wintypes
+
+    class _ProcessMemoryCounters(ctypes.Structure):
+        """Windows的PROCESS_MEMORY_COUNTERS结构"""
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+else:
+    _ProcessMemoryCounters = None
+
+
+class Stage:
+    """处理阶段名称"""
+    CLASSIFY = "classify"  # 按模板特征判断文档所属的模板
+    READ = "read"  # 从磁盘或网络共享读取文件
+    INFLATE = "inflate"  # 解压zip中的各个部件
+    PARSE = "parse"  # 解析XML并构建段落和表格
+    RULE = "rule"  # 规则执行，具体规则记录为 "rule:表头名"
+    EXPORT = "export"  # 写入Excel行
+
+    NAMES = {
+        CLASSIFY: "分类",
+        READ: "读取",
+        INFLATE: "解压",
+        PARSE: "解析",
+        RULE: "规则",
+        EXPORT: "写入",
+    }
+
+    @classmethod
+    def rule(cls, header_name):
+        """单条规则的阶段名"""
+        return f"{cls.RULE}:{header_name}"
+
+    @classmethod
+    def display_name(cls, stage):
+        """阶段的中文显示名"""
+        if stage.startswith(cls.RULE + ":"):
+            return f"规则 {stage[len(cls.RULE) + 1:]}"
+        return cls.NAMES.get(stage, stage)
+
+
+class MemoryMode:
+    """单个文档的内存测量方式"""
+    OFF = "off"  # 不测量单个文档的内存，默认方式
+    RSS = "rss"  # 进程常驻内存峰值，开销可忽略，包含lxml等C库分配的内存；只有Linux能在每个步骤前重置峰值
+    SAMPLED = "rss-sampled"  # 同RSS，峰值无法重置的平台上在后台线程中定期采样常驻内存，更准确但有额外开销
+    TRACEMALLOC = "tracemalloc"  # Python分配的峰值，不受分配器缓存影响，但会明显拖慢解析
+
+    NAMES = {
+        OFF: "不测量",
+        RSS: "常驻内存",
+        SAMPLED: "常驻内存（采样）",
+        TRACEMALLOC: "tracemalloc",
+    }
+
+    @staticmethod
+    def platform_default():
+        """界面默认的测量方式：Linux上每个步骤前重置峰值的开销可忽略，默认测量常驻内存，其它平台不测量"""
+        return MemoryMode.RSS if sys.platform.startswith("linux") else MemoryMode.OFF
+
+
+class StageTimings:
+    """单个任务的分阶段统计
+
+    只包含基本类型的属性，可以从进程池的子进程直接返回。
+    trace为True时额外记录每个阶段的起止时间（perf_counter_ns，系统范围的单调时钟，
+    不同进程的时间可以直接比较）和所在的进程、线程，用于导出时间线。
+    """
+
+    def __init__(self, trace=False):
+        self.stages = {}  # 阶段名 -> 耗时（秒）
+        self.spans = [] if trace else None  # [(阶段名, 开始ns, 结束ns, 进程ID, 线程ID), ...]
+        self.bytes_read = 0
+        self.peak_memory_delta = 0  # 处理期间进程内存峰值相对开始时的增长（字节），无法获取时为0
+        self.memory_peaks = {}  # 阶段名 -> 该步骤的内存峰值增长（字节）
+        self._memory_start = None  # 第一个内存测量步骤开始时的内存基线
+        self.paragraph_count = 0
+        self.table_count = 0
+
+    def add(self, stage, seconds):
+        """累加某个阶段的耗时"""
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def measure(self, stage):
+        """测量代码块的耗时并计入指定阶段"""
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            finished = time.perf_counter_ns()
+            self.add(stage, (finished - started) / 1e9)
+            if self.spans is not None:
+                self.spans.append((stage, started, finished, os.getpid(), threading.get_native_id()))
+
+    @contextmanager
+    def measure_memory(self, stage, mode=MemoryMode.OFF):
+        """测量代码块的内存峰值增长并记入指定阶段，mode为OFF时不做任何事
+
+        各步骤依次测量，文档的总峰值相对第一个步骤开始时计算，包含前面步骤遗留的内存。
+        """
+        if mode == MemoryMode.OFF:
+            yield
+            return
+
+        probe = memory_probe(mode)
+        if self._memory_start is None:
+            self._memory_start = probe.start
+        try:
+            yield
+        finally:
+            delta = probe.delta()
+            probe.close()
+            self.memory_peaks[stage] = max(self.memory_peaks.get(stage, 0), delta)
+            self.peak_memory_delta = max(self.peak_memory_delta, probe.start - self._memory_start + delta)
+
+    def add_span(self, name, started_ns, finished_ns):
+        """记录不计入阶段耗时的时间段（例如整个文档的处理），未开启时间线时忽略"""
+        if self.spans is not None:
+            self.spans.append((name, started_ns, finished_ns, os.getpid(), threading.get_native_id()))
+
+    @property
+    def total(self):
+        """所有阶段的总耗时"""
+        return sum(self.stages.values())
+
+    def rule_total(self):
+        """所有规则的总耗时"""
+        prefix = Stage.RULE + ":"
+        return sum(seconds for stage, seconds in self.stages.items() if stage.startswith(prefix))
+
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "stages": dict(self.stages),
+            "bytes_read": self.bytes_read,
+            "peak_memory_delta": self.peak_memory_delta,
+            "memory_peaks": dict(self.memory_peaks),
+            "paragraph_count": self.paragraph_count,
+            "table_count": self.table_count,
+        }
+
+
+class BatchTimingSummary:
+    """一个批次的分阶段汇总"""
+
+    def __init__(self):
+        self.stages = {}  # 阶段名 -> 总耗时（秒）
+        self.task_count = 0
+        self.bytes_read = 0
+        self.max_memory_delta = 0
+        self.max_memory_file = ""  # 内存峰值增长最大的文件名
+        self.process_peak_rss = 0  # 批处理主进程的常驻内存峰值（字节）
+        self.over_budget = 0  # 预计超出内存预算而跳过的文件数
+        self.path_skipped = 0  # 路径不匹配规则而跳过的文件数
+        self.deferred = 0  # 因内存预算推迟分发的文件数
+
+    def add(self, timings, file_name=""):
+        """累加一个任务的统计"""
+        if timings is None:
+            return
+        self.task_count += 1
+        for stage, seconds in timings.stages.items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        self.bytes_read += timings.bytes_read
+        if timings.peak_memory_delta > self.max_memory_delta:
+            self.max_memory_delta = timings.peak_memory_delta
+            self.max_memory_file = file_name
+
+    @property
+    def total(self):
+        """所有阶段的总耗时"""
+        return sum(self.stages.values())
+
+    def grouped(self):
+        """按主要阶段分组的耗时，各条规则合并为一项"""
+        groups = {}
+        prefix = Stage.RULE + ":"
+        for stage, seconds in self.stages.items():
+            key = Stage.RULE if stage.startswith(prefix) else stage
+            groups[key] = groups.get(key, 0.0) + seconds
+        return groups
+
+    def rule_stages(self):
+        """各条规则的总耗时，从大到小排列"""
+        prefix = Stage.RULE + ":"
+        rules = [(stage[len(prefix):], seconds) for stage, seconds in self.stages.items()
+                 if stage.startswith(prefix)]
+        return sorted(rules, key=lambda item: item[1], reverse=True)
+
+
+def current_rss():
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/statm", "r") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
+
+    if os.name == "nt":
+        counters = _windows_memory_counters()
+        return counters.WorkingSetSize if counters else None
+
+    return None
+
+
+def peak_rss():
+    """当前进程自上次重置以来的常驻内存峰值（字节），无法获取时返回None"""
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/self/status", "r") as f:
+                for line in f:
+                    if line.startswith("VmHWM:"):
+                        return int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            return None
+        return None
+
+    if os.name == "nt":
+        counters = _windows_memory_counters()
+        return counters.PeakWorkingSetSize if counters else None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    # macOS上ru_maxrss的单位是字节
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# 重置前记下的进程内存峰值（字节），与peak_rss一起得到整个进程运行期间的峰值
+_peak_before_reset = 0
+
+
+def process_peak_rss():
+    """整个进程运行期间的常驻内存峰值（字节），包含reset_peak_rss重置前的峰值，无法获取时返回None"""
+    peak = peak_rss()
+    if peak is None:
+        return _peak_before_reset or None
+    return max(peak, _peak_before_reset)
+
+
+def reset_peak_rss():
+    """尽可能重置内存峰值，使下一次peak_rss只反映之后的增长（仅Linux支持）
+
+    重置对整个进程生效，重置前的峰值记入process_peak_rss。
+    """
+    global _peak_before_reset
+    if sys.platform.startswith("linux"):
+        _peak_before_reset = process_peak_rss() or 0
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")
+            return True
+        except OSError:
+            return False
+    return False
+
+
+class MemoryProbe:
+    """测量一段处理期间进程内存峰值相对开始时的增长
+
+    Linux上每次开始前重置峰值；其它平台峰值无法重置，sample为True时在后台线程中
+    定期采样常驻内存，否则只有处理期间创下新峰值时才能得到准确的增长量，
+    其余情况以结束时的常驻内存增长近似。
+    """
+
+    # 无法重置峰值时的采样间隔（秒）
+    SAMPLE_INTERVAL = 0.01
+
+    def __init__(self, sample=False):
+        resettable = reset_peak_rss()
+        self.start_rss = current_rss()
+        self.start_peak = peak_rss()
+        self._sampled_peak = None
+        self._sampler = None
+        if sample and not resettable and self.start_rss is not None:
+            self._sampled_peak = self.start_rss
+            self._stop_sampling = threading.Event()
+            self._sampler = threading.Thread(target=self._sample, name="MemoryProbe", daemon=True)
+            self._sampler.start()
+
+    def _sample(self):
+        """采样线程"""
+        while not self._stop_sampling.wait(self.SAMPLE_INTERVAL):
+            rss = current_rss()
+            if rss is not None and rss > self._sampled_peak:
+                self._sampled_peak = rss
+
+    @property
+    def start(self):
+        """开始时的常驻内存（字节）"""
+        return self.start_rss or 0
+
+    def delta(self):
+        """内存峰值增长（字节）"""
+        if self.start_rss is None:
+            return 0
+
+        peak = peak_rss()
+        if peak is not None and self.start_peak is not None and peak > self.start_peak:
+            return max(0, peak - self.start_rss)
+
+        rss = current_rss()
+        if self._sampled_peak is not None:
+            rss = max(rss or 0, self._sampled_peak)
+        return max(0, rss - self.start_rss) if rss is not None else 0
+
+    def close(self):
+        """停止采样线程"""
+        if self._sampler is not None:
+            self._stop_sampling.set()
+            self._sampler.join()
+            self._sampler = None
+
+
+class TracemallocProbe:
+    """用tracemalloc测量Python分配的峰值增长，需要已开启tracemalloc（见memory_tracing）
+
+    只统计经过Python内存分配器的对象，lxml等C扩展直接分配的内存不包含在内，
+    通常小于常驻内存的增长，但不受分配器缓存和其它线程的释放时机影响。
+    """
+
+    def __init__(self):
+        self.tracing = tracemalloc.is_tracing()
+        self.start = 0
+        if self.tracing:
+            tracemalloc.reset_peak()
+            self.start = tracemalloc.get_traced_memory()[0]
+
+    def delta(self):
+        """分配峰值增长（字节）"""
+        if not self.tracing or not tracemalloc.is_tracing():
+            return 0
+        return max(0, tracemalloc.get_traced_memory()[1] - self.start)
+
+    def close(self):
+        """与MemoryProbe接口一致"""
+
+
+def memory_probe(mode=MemoryMode.RSS):
+    """按测量方式创建内存探针，只有SAMPLED方式在峰值无法重置时启动采样线程"""
+    if mode == MemoryMode.TRACEMALLOC:
+        return TracemallocProbe()
+    return MemoryProbe(sample=mode == MemoryMode.SAMPLED)
+
+
+@contextmanager
+def memory_tracing(mode):
+    """mode为TRACEMALLOC时在代码块期间开启tracemalloc，已开启时沿用"""
+    started = mode == MemoryMode.TRACEMALLOC and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def _windows_memory_counters():
+    """读取Windows进程内存计数器"""
+    if _ProcessMemoryCounters is None:
+        return None
+    try:
+        counters = _ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters
+    except (AttributeError, OSError):
+        pass
+    return None
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+全局任务调度器 - 所有后台工作共享一个按优先级调度的线程池
+"""
+
+import os
+import threading
+from enum import IntEnum
+
+from PyQt6.QtCore import QRunnable, QThreadPool
+
+
+class Priority(IntEnum):
+    """调度优先级，数值越大越先被线程池取出"""
+    BATCH = 0  # 批量提取
+    BACKGROUND = 1  # 目录扫描等后台工作
+    INTERACTIVE = 2  # 文档预览、规则测试等用户正在等待的工作
+
+
+class _ScheduledJob(QRunnable):
+    """包装提交的任务，记录各优先级正在运行的数量"""
+
+    def __init__(self, scheduler, runnable, priority):
+        super().__init__()
+        self.scheduler = scheduler
+        self.runnable = runnable
+        self.priority = priority
+        self.setAutoDelete(False)  # 生命周期由调度器持有
+
+    def run(self):
+        """线程执行函数"""
+        self.scheduler._job_started(self)
+        try:
+            self.runnable.run()
+        finally:
+            self.scheduler._job_finished(self)
+
+
+class TaskScheduler:
+    """应用程序级任务调度器
+
+    所有管理器通过同一个实例提交QRunnable：
+    - 线程池按优先级取出排队的任务，交互性工作总是排在批量工作之前；
+    - 全局并发预算由CPU核心数决定，批量提取的并行进程数在每个文件边界
+      按预算减去正在运行的交互任务重新计算，交互工作因此可以抢占批量工作；
+    - 提交的任务在结束前由调度器持有引用，应用退出时统一停止并等待。
+    """
+
+    # 为交互性工作保留的核心数
+    INTERACTIVE_RESERVE = 1
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        """获取全局调度器"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, budget=None):
+        self.budget = max(2, budget or os.cpu_count() or 2)
+
+        self.thread_pool = QThreadPool()
+        # 批量和扫描的协调线程大部分时间在等待I/O或子进程，额外留出两个线程
+        self.thread_pool.setMaxThreadCount(self.budget + 2)
+
+        self._lock = threading.Lock()
+        self._jobs = {}  # 原始任务 -> _ScheduledJob（排队中或运行中）
+        self._running = {priority: 0 for priority in Priority}
+
+    def submit(self, runnable, priority=Priority.BATCH):
+        """提交任务到共享线程池"""
+        job = _ScheduledJob(self, runnable, Priority(priority))
+        with self._lock:
+            self._jobs[runnable] = job
+        self.thread_pool.start(job, int(priority))
+        return runnable
+
+    def cancel(self, runnable):
+        """取消任务：排队中的直接移出队列，运行中的请求其停止
+
+        返回任务是否在开始运行前被移出队列。
+        """
+        with self._lock:
+            job = self._jobs.get(runnable)
+        if job is None:
+            return False
+
+        if self.thread_pool.tryTake(job):
+            with self._lock:
+                self._jobs.pop(runnable, None)
+            return True
+
+        if hasattr(runnable, "stop"):
+            runnable.stop()
+        return False
+
+    def running_count(self, priority):
+        """获取指定优先级正在运行的任务数"""
+        with self._lock:
+            return self._running[Priority(priority)]
+
+    def batch_slots(self):
+        """当前可用于批量提取的并行数
+
+        保留的核心和正在运行的交互任务都从预算中扣除，至少保留一个，
+        保证批量工作不会被持续的交互操作饿死。
+        """
+        interactive = self.running_count(Priority.INTERACTIVE)
+        return max(1, self.budget - max(self.INTERACTIVE_RESERVE, interactive))
+
+    def shutdown(self, timeout_ms=3000):
+        """停止所有任务并等待线程池结束"""
+        self.thread_pool.clear()
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if hasattr(job.runnable, "stop"):
+                job.runnable.stop()
+        return self.thread_pool.waitForDone(timeout_ms)
+
+    def _job_started(self, job):
+        """任务开始运行"""
+        with self._lock:
+            self._running[job.priority] += 1
+
+    def _job_finished(self, job):
+        """任务运行结束，释放调度器持有的引用"""
+        with self._lock:
+            self._running[job.priority] -= 1
+            if self._jobs.get(job.runnable) is job:
+                del self._jobs[job.runnable]
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+语料测试对话框 - 在文件列表上试运行规则并实时显示命中统计
+"""
+
+import os
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel,
+                             QPushButton, QSpinBox, QProgressBar, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QAbstractItemView)
+
+from models.rule_test_model import RuleTestManager
+
+
+class CorpusTestDialog(QDialog):
+    """规则语料测试对话框
+
+    在正式批量处理之前，用全部文件或抽样文件验证规则的命中率。
+    """
+
+    COLUMNS = ["规则", "命中率", "命中", "空结果", "错误", "示例值"]
+
+    def __init__(self, rules, file_paths, parent=None):
+        super().__init__(parent)
+        self.rules = rules
+        self.file_paths = file_paths
+        self.test_manager = RuleTestManager(self)
+
+        self._init_ui()
+        self._connect_signals()
+
+    def _init_ui(self):
+        """初始化界面"""
+        self.setWindowTitle("语料测试")
+        self.setMinimumSize(760, 420)
+
+        layout = QVBoxLayout(self)
+
+        # 测试范围
+        names = "、".join(rule.field_name for rule in self.rules[:5])
+        if len(self.rules) > 5:
+            names += f" 等 {len(self.rules)} 条规则"
+        rules_label = QLabel(f"<b>规则:</b> {names}")
+        rules_label.setWordWrap(True)
+        layout.addWidget(rules_label)
+
+        form_layout = QFormLayout()
+
+        self.sample_spinbox = QSpinBox()
+        self.sample_spinbox.setRange(0, max(len(self.file_paths), 0))
+        self.sample_spinbox.setValue(min(len(self.file_paths), 200))
+        self.sample_spinbox.setSpecialValueText("全部文件")
+        self.sample_spinbox.setSuffix(f" / {len(self.file_paths)} 个文件")
+        self.sample_spinbox.setToolTip("随机抽取的文件数，0表示测试全部文件；相同文件列表的抽样结果固定")
+        form_layout.addRow("抽样数量:", self.sample_spinbox)
+
+        cpu_count = os.cpu_count() or 1
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setRange(1, max(1, cpu_count))
+        self.workers_spinbox.setValue(max(1, cpu_count - 1))
+        form_layout.addRow("并行进程数:", self.workers_spinbox)
+
+        layout.addLayout(form_layout)
+
+        # 进度
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("未开始")
+        layout.addWidget(self.status_label)
+
+        # 统计表格
+        self.stats_table = QTableWidget(len(self.rules), len(self.COLUMNS))
+        self.stats_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.stats_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.stats_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.stats_table.verticalHeader().setVisible(False)
+        header = self.stats_table.horizontalHeader()
+        for column in range(len(self.COLUMNS) - 1):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(len(self.COLUMNS) - 1, QHeaderView.ResizeMode.Stretch)
+
+        for row, rule in enumerate(self.rules):
+            self.stats_table.setItem(row, 0, QTableWidgetItem(rule.field_name))
+        layout.addWidget(self.stats_table, 1)
+
+        # 按钮布局
+        button_layout = QHBoxLayout()
+
+        self.start_btn = QPushButton("开始测试")
+        button_layout.addWidget(self.start_btn)
+
+        self.stop_btn = QPushButton("停止")
+        self.stop_btn.setEnabled(False)
+        button_layout.addWidget(self.stop_btn)
+
+        button_layout.addStretch()
+
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(close_btn)
+
+        layout.addLayout(button_layout)
+
+        if not self.file_paths:
+            self.start_btn.setEnabled(False)
+            self.status_label.setText("文件列表为空，请先添加文件")
+
+    def _connect_signals(self):
+        """连接信号和槽"""
+        self.start_btn.clicked.connect(self.start_test)
+        self.stop_btn.clicked.connect(self.test_manager.stop_test)
+
+        self.test_manager.testStarted.connect(self._on_test_started)
+        self.test_manager.testProgress.connect(self._on_test_progress)
+        self.test_manager.statisticsUpdated.connect(self._update_statistics)
+        self.test_manager.testFinished.connect(self._on_test_finished)
+        self.test_manager.testError.connect(lambda error: self.status_label.setText(error))
+
+    def start_test(self):
+        """开始测试"""
+        self.test_manager.start_test(self.file_paths, self.rules,
+                                     self.sample_spinbox.value(), self.workers_spinbox.value())
+
+    def _on_test_started(self, file_count):
+        """测试开始"""
+        self.start_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self.sample_spinbox.setEnabled(False)
+        self.workers_spinbox.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"正在测试 {file_count} 个文件...")
+
+    def _on_test_progress(self, current, total):
+        """更新进度"""
+        if total > 0:
+            self.progress_bar.setValue(min(int(current / total * 100), 100))
+            self.status_label.setText(f"正在测试... {current}/{total}")
+
+    def _update_statistics(self, statistics):
+        """更新统计表格"""
+        for row, stats in enumerate(statistics):
+            values = [
+                stats["field_name"],
+                f"{stats['hit_rate']:.1%}",
+                str(stats["hits"]),
+                str(stats["empty"]),
+                str(stats["errors"]),
+                "；".join(stats["examples"]),
+            ]
+            for column, value in enumerate(values):
+                item = self.stats_table.item(row, column)
+                if item is None:
+                    item = QTableWidgetItem()
+                    self.stats_table.setItem(row, column, item)
+                item.setText(value)
+                if column in (1, 2, 3, 4):
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+
+            # 错误列的提示中显示出错的文件和原因
+            if stats["error_examples"]:
+                self.stats_table.item(row, 4).setToolTip("\n".join(
+                    f"{os.path.basename(path)}: {error}" for path, error in stats["error_examples"]))
+            if stats["examples"]:
+                self.stats_table.item(row, 5).setToolTip("\n".join(stats["examples"]))
+
+    def _on_test_finished(self, canceled):
+        """测试结束"""
+        self.start_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
+        self.sample_spinbox.setEnabled(True)
+        self.workers_spinbox.setEnabled(True)
+        if canceled:
+            self.status_label.setText("测试已停止")
+        else:
+            self.progress_bar.setValue(100)
+            self.status_label.setText("测试完成")
+
+    def closeEvent(self, event):
+        """关闭时停止测试，窗口关闭后即被销毁，先断开测试线程的信号"""
+        self.test_manager.shutdown()
+        super().closeEvent(event)
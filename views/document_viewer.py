@@ -8,13 +8,22 @@
 import os
 
 from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QTextCursor, QAction
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextBrowser,
+from PyQt6.QtGui import QTextCursor, QAction, QTextBlockFormat, QTextCharFormat, QFont, QColor
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTextBrowser, QTableView, QTextEdit,
                              QLabel, QPushButton, QComboBox, QTabWidget, QMenu, QMessageBox)
 
+from models.document_model import DocumentTableModel
+
 
 class DocumentViewer(QWidget):
-    """文档预览视图"""
+    """文档预览视图
+
+    段落按页追加到文本视图，滚动接近底部时再加载下一页；
+    表格通过DocumentTableModel和QTableView显示。首次显示的耗时与文档大小无关。
+    """
+
+    PAGE_SIZE = 200  # 每页追加的段落数
+    HEADING_SIZES = {1: 20, 2: 17, 3: 15, 4: 13, 5: 12, 6: 11}  # 标题级别 -> 字号
 
     textSelected = pyqtSignal(str)  # 选择的文本
     tableSelected = pyqtSignal(int, int, int)  # 表格索引, 行索引, 列索引
@@ -22,6 +31,9 @@ class DocumentViewer(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.document = None
+        self._loaded_paragraphs = 0  # 已追加到文本视图的段落数
+        self._paragraph_blocks = []  # 段落索引 -> 文本视图中的块号
+        self.regex_matches = None  # 实时预览的正则匹配结果
 
         self._init_ui()
         self._connect_signals()
@@ -41,6 +53,10 @@ class DocumentViewer(QWidget):
 
         info_layout.addStretch()
 
+        self.match_label = QLabel()
+        self.match_label.setVisible(False)
+        info_layout.addWidget(self.match_label)
+
         self.metadata_btn = QPushButton("查看元数据")
         self.metadata_btn.setEnabled(False)
         info_layout.addWidget(self.metadata_btn)
@@ -80,9 +96,19 @@ class DocumentViewer(QWidget):
 
         tables_layout.addLayout(tables_header)
 
-        self.table_browser = QTextBrowser()
-        self.table_browser.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        tables_layout.addWidget(self.table_browser)
+        self.table_model = DocumentTableModel()
+        self.table_view = QTableView()
+        self.table_view.setModel(self.table_model)
+        self.table_view.setWordWrap(False)
+        self.table_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        # 固定行高，避免按内容计算每一行的高度
+        self.table_view.verticalHeader().setDefaultSectionSize(self.table_view.fontMetrics().height() + 8)
+        tables_layout.addWidget(self.table_view)
+
+        self.table_empty_label = QLabel("当前文档中没有表格")
+        self.table_empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.table_empty_label.setVisible(False)
+        tables_layout.addWidget(self.table_empty_label)
 
         self.tab_widget.addTab(self.tables_tab, "表格内容")
 
@@ -95,7 +121,12 @@ class DocumentViewer(QWidget):
 
         # 右键菜单
         self.text_browser.customContextMenuRequested.connect(self._show_text_context_menu)
-        self.table_browser.customContextMenuRequested.connect(self._show_table_context_menu)
+        self.table_view.customContextMenuRequested.connect(self._show_table_context_menu)
+
+        # 滚动接近底部时加载下一页段落；内容不足以滚动时也继续加载
+        scroll_bar = self.text_browser.verticalScrollBar()
+        scroll_bar.valueChanged.connect(self._on_text_scrolled)
+        scroll_bar.rangeChanged.connect(lambda minimum, maximum: self._on_text_scrolled(scroll_bar.value()))
 
         # 表格选择下拉框
         self.table_combo.currentIndexChanged.connect(self._update_table_view)
@@ -117,6 +148,9 @@ class DocumentViewer(QWidget):
         self.title_label.setText(os.path.basename(document.file_path))
         self.metadata_btn.setEnabled(True)
 
+        # 旧文档的匹配结果不再有效
+        self.set_regex_matches(None)
+
         # 更新文本内容
         self._update_text_view()
 
@@ -124,12 +158,119 @@ class DocumentViewer(QWidget):
         self._update_table_list()
 
     def _update_text_view(self):
-        """更新文本视图"""
+        """更新文本视图，只渲染元数据和第一页段落"""
         if not self.document or not self.document.is_loaded:
             return
 
-        html = self.document.get_document_html()
-        self.text_browser.setHtml(html)
+        self._loaded_paragraphs = 0
+        self._paragraph_blocks = []
+        self.text_browser.setHtml(self.document.get_header_html())
+        self._append_paragraph_page()
+
+    def _has_more_paragraphs(self):
+        """是否还有未显示的段落"""
+        return self.document is not None and self._loaded_paragraphs < len(self.document.paragraphs)
+
+    def _append_paragraph_page(self):
+        """在文本视图末尾追加一页段落"""
+        if not self._has_more_paragraphs():
+            return
+
+        start = self._loaded_paragraphs
+        end = min(start + self.PAGE_SIZE, len(self.document.paragraphs))
+        self._loaded_paragraphs = end
+
+        # 在文档末尾逐段插入，每个段落正好是一个文本块，便于按段落定位高亮
+        cursor = QTextCursor(self.text_browser.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for para in self.document.paragraphs[start:end]:
+            block_format = QTextBlockFormat()
+            char_format = QTextCharFormat()
+
+            level = self._heading_level(para["style"])
+            if level:
+                block_format.setHeadingLevel(level)
+                char_format.setFontWeight(QFont.Weight.Bold)
+                char_format.setFontPointSize(self.HEADING_SIZES[level])
+
+            cursor.insertBlock(block_format, char_format)
+            self._paragraph_blocks.append(cursor.blockNumber())
+            # 段内换行使用行分隔符，保持一个段落对应一个文本块且字符位置不变
+            cursor.insertText(para["text"].replace("\n", "\u2028"), char_format)
+
+        # 全部段落显示后列出表格，表格内容在表格选项卡中按需显示
+        if end == len(self.document.paragraphs) and self.document.tables:
+            cursor.insertBlock()
+            cursor.insertHtml("".join(
+                f"<p><i>表格 {i + 1}: {table['rows']}行 x {table['cols']}列（见“表格内容”选项卡）</i></p>"
+                for i, table in enumerate(self.document.tables)
+            ))
+        cursor.endEditBlock()
+
+        if self.regex_matches is not None:
+            self._apply_regex_highlights()
+
+    @staticmethod
+    def _heading_level(style):
+        """根据段落样式获取标题级别，非标题返回0"""
+        style = style or ""
+        if not style.startswith("Heading"):
+            return 0
+        level_text = style.replace("Heading", "").strip()
+        level = int(level_text) if level_text.isdigit() else 1
+        return level if 1 <= level <= 6 else 0
+
+    def set_regex_matches(self, matches):
+        """显示正则表达式的实时匹配结果，传入None清除高亮"""
+        self.regex_matches = matches
+
+        if matches is None:
+            self.match_label.setVisible(False)
+        else:
+            if matches.error:
+                text = matches.error
+            elif matches.truncated:
+                text = f"匹配 {matches.count}+ 处"
+            else:
+                text = f"匹配 {matches.count} 处"
+            self.match_label.setText(text)
+            self.match_label.setVisible(True)
+
+        self._apply_regex_highlights()
+
+    def _apply_regex_highlights(self):
+        """为已显示的段落设置匹配高亮，未显示的段落在加载后再高亮"""
+        if self.regex_matches is None:
+            self.text_browser.setExtraSelections([])
+            return
+
+        highlight = QTextCharFormat()
+        highlight.setBackground(QColor("#ffe082"))
+
+        text_document = self.text_browser.document()
+        selections = []
+        for para, start, end in self.regex_matches.spans:
+            if para >= len(self._paragraph_blocks):
+                break
+
+            block = text_document.findBlockByNumber(self._paragraph_blocks[para])
+            cursor = QTextCursor(block)
+            cursor.setPosition(block.position() + start)
+            cursor.setPosition(block.position() + end, QTextCursor.MoveMode.KeepAnchor)
+
+            selection = QTextEdit.ExtraSelection()
+            selection.cursor = cursor
+            selection.format = highlight
+            selections.append(selection)
+
+        self.text_browser.setExtraSelections(selections)
+
+    def _on_text_scrolled(self, value):
+        """滚动到接近底部时加载下一页"""
+        scroll_bar = self.text_browser.verticalScrollBar()
+        if value >= scroll_bar.maximum() - scroll_bar.pageStep() and self._has_more_paragraphs():
+            self._append_paragraph_page()
 
     def _update_table_list(self):
         """更新表格列表"""
@@ -142,9 +283,13 @@ class DocumentViewer(QWidget):
         if table_count == 0:
             self.table_combo.addItem("没有表格")
             self.table_combo.setEnabled(False)
-            self.table_browser.setHtml("<p>当前文档中没有表格</p>")
+            self.table_model.set_table(None)
+            self.table_view.setVisible(False)
+            self.table_empty_label.setVisible(True)
         else:
             self.table_combo.setEnabled(True)
+            self.table_view.setVisible(True)
+            self.table_empty_label.setVisible(False)
             for i in range(table_count):
                 table = self.document.tables[i]
                 self.table_combo.addItem(f"表格 {i + 1} ({table['rows']}行 x {table['cols']}列)")
@@ -158,13 +303,17 @@ class DocumentViewer(QWidget):
             return
 
         if index < len(self.document.tables):
-            table_html = self.document.get_table_as_html(index)
-            self.table_browser.setHtml(table_html)
+            table = self.document.tables[index]
+            if self.table_model.table is not table:
+                self.table_model.set_table(table)
 
     def _clear_content(self):
         """清空内容"""
         self.text_browser.clear()
-        self.table_browser.clear()
+        self._loaded_paragraphs = 0
+        self._paragraph_blocks = []
+        self.set_regex_matches(None)
+        self.table_model.set_table(None)
         self.table_combo.clear()
         self.table_combo.setEnabled(False)
         self.metadata_btn.setEnabled(False)
@@ -234,29 +383,43 @@ class DocumentViewer(QWidget):
         if table_index < 0 or not self.document or table_index >= len(self.document.tables):
             return
 
-        # 尝试确定单元格位置 (这部分需要根据实际HTML结构调整)
-        # 由于QTextBrowser不提供表格单元格定位，这里是一个简化的演示
-        # 实际应用中可能需要更复杂的计算或使用QTableView替代
-
         menu = QMenu(self)
 
+        # 右键所在的单元格
+        cell_index = self.table_view.indexAt(position)
+        if cell_index.isValid():
+            row, col = cell_index.row(), cell_index.column()
+
+            extract_cell_action = QAction(f"提取单元格 ({row + 1}, {col + 1})", self)
+            extract_cell_action.triggered.connect(lambda: self.tableSelected.emit(table_index, row, col))
+            menu.addAction(extract_cell_action)
+
+            extract_row_action = QAction(f"提取第 {row + 1} 行", self)
+            extract_row_action.triggered.connect(lambda: self.tableSelected.emit(table_index, row, -1))
+            menu.addAction(extract_row_action)
+
+            extract_col_action = QAction(f"提取第 {col + 1} 列", self)
+            extract_col_action.triggered.connect(lambda: self.tableSelected.emit(table_index, -1, col))
+            menu.addAction(extract_col_action)
+
+            menu.addSeparator()
+
         # 提取整个表格
         extract_table_action = QAction(f"提取整个表格", self)
         extract_table_action.triggered.connect(lambda: self.tableSelected.emit(table_index, -1, -1))
         menu.addAction(extract_table_action)
 
         # 提取表格列
-        if self.document and table_index < len(self.document.tables):
-            table = self.document.tables[table_index]
-            if table and table['cols'] > 0:
-                columns_menu = menu.addMenu("提取表格列")
+        table = self.document.tables[table_index]
+        if table and table['cols'] > 0:
+            columns_menu = menu.addMenu("提取表格列")
 
-                for col in range(table['cols']):
-                    col_action = QAction(f"提取第 {col + 1} 列", self)
-                    col_action.triggered.connect(lambda checked, c=col: self.tableSelected.emit(table_index, -1, c))
-                    columns_menu.addAction(col_action)
+            for col in range(table['cols']):
+                col_action = QAction(f"提取第 {col + 1} 列", self)
+                col_action.triggered.connect(lambda checked, c=col: self.tableSelected.emit(table_index, -1, c))
+                columns_menu.addAction(col_action)
 
-        menu.exec(self.table_browser.viewport().mapToGlobal(position))
+        menu.exec(self.table_view.viewport().mapToGlobal(position))
 
     def _identify_and_extract(self, text):
         """智能识别并提取数据"""
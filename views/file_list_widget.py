@@ -5,23 +5,27 @@
 文件列表视图 - 显示和管理文件列表
 """
 
-from PyQt6.QtCore import Qt, pyqtSignal, QSortFilterProxyModel
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableView,
                              QPushButton, QHeaderView, QAbstractItemView,
-                             QMenu, QLabel, QLineEdit)
+                             QMenu, QLabel, QLineEdit, QComboBox)
 
-from models.file_model import FileManager
+from models.file_model import FileManager, FileFilterProxyModel
 
 
 class FileListWidget(QWidget):
     """文件列表视图"""
 
+    FILTER_DELAY = 250  # 搜索输入停止后多久开始过滤（毫秒）
+    PREVIEW_DELAY = 150  # 选择停止变化后多久开始加载预览（毫秒）
+
     fileSelected = pyqtSignal(str)  # 选中文件的路径
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.file_manager = FileManager()
+        self._scan_canceled = False
 
         self._init_ui()
         self._connect_signals()
@@ -47,12 +51,28 @@ class FileListWidget(QWidget):
         self.search_input.setMaximumWidth(200)
         header_layout.addWidget(self.search_input)
 
+        self.status_filter_combo = QComboBox()
+        self.status_filter_combo.addItem("全部状态", None)
+        for status in ("未处理", "已处理", "处理失败", "已跳过", "无效文档"):
+            self.status_filter_combo.addItem(status, status)
+        header_layout.addWidget(self.status_filter_combo)
+
         layout.addLayout(header_layout)
 
+        # 过滤防抖定时器
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DELAY)
+
+        # 预览防抖定时器，快速点击或方向键浏览时只加载最后停留的文件
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DELAY)
+        self._preview_path = None
+
         # 表格视图
-        self.proxy_model = QSortFilterProxyModel()
+        self.proxy_model = FileFilterProxyModel()
         self.proxy_model.setSourceModel(self.file_manager.model)
-        self.proxy_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
 
         self.table_view = QTableView()
         self.table_view.setModel(self.proxy_model)
@@ -60,6 +80,7 @@ class FileListWidget(QWidget):
         self.table_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
         self.table_view.setAlternatingRowColors(True)
         self.table_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        # 排序只作用于已提供给视图的行，滚动加载的行按当前排序插入，大小和修改日期也只为这些行读取
         self.table_view.setSortingEnabled(True)
 
         # 设置表头
@@ -68,6 +89,8 @@ class FileListWidget(QWidget):
         header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)  # 大小列适应内容
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)  # 日期列适应内容
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.ResizeToContents)  # 状态列适应内容
+        # 适应内容的列只按可见的行计算宽度，不逐行测量已提供给视图的一整批行
+        header.setResizeContentsPrecision(0)
 
         layout.addWidget(self.table_view)
 
@@ -86,6 +109,10 @@ class FileListWidget(QWidget):
         self.clear_btn = QPushButton("清空")
         button_layout.addWidget(self.clear_btn)
 
+        self.stop_scan_btn = QPushButton("停止扫描")
+        self.stop_scan_btn.setVisible(False)
+        button_layout.addWidget(self.stop_scan_btn)
+
         layout.addLayout(button_layout)
 
         # 状态标签
@@ -99,18 +126,30 @@ class FileListWidget(QWidget):
         self.add_dir_btn.clicked.connect(self.add_directory)
         self.remove_btn.clicked.connect(self.remove_selected_files)
         self.clear_btn.clicked.connect(self.clear_files)
+        self.stop_scan_btn.clicked.connect(self.stop_scan)
 
         # 表格事件
         self.table_view.doubleClicked.connect(self._on_file_double_clicked)
         self.table_view.clicked.connect(self._on_file_clicked)
+        self.table_view.selectionModel().currentRowChanged.connect(self._on_current_row_changed)
+        self.preview_timer.timeout.connect(self._emit_preview)
         self.table_view.customContextMenuRequested.connect(self._show_context_menu)
 
         # 搜索框事件
-        self.search_input.textChanged.connect(self._filter_files)
+        self.search_input.textChanged.connect(self.filter_timer.start)
+        self.status_filter_combo.currentIndexChanged.connect(self._filter_files)
+        self.filter_timer.timeout.connect(self._filter_files)
+
+        # 过滤状态下文件列表或处理状态变化时重新过滤
+        model = self.file_manager.model
+        model.rowsInserted.connect(self._on_model_changed)
+        model.rowsRemoved.connect(self._on_model_changed)
+        model.dataChanged.connect(self._on_model_changed)
 
         # 文件管理器事件
         self.file_manager.filesAdded.connect(self._update_status_label)
-        self.file_manager.scanComplete.connect(self._update_status_label)
+        self.file_manager.scanProgress.connect(self._on_scan_progress)
+        self.file_manager.scanComplete.connect(self._on_scan_complete)
 
     def add_files(self):
         """添加文件"""
@@ -150,14 +189,36 @@ class FileListWidget(QWidget):
             )
 
             recursive = reply == QMessageBox.StandardButton.Yes
-            count = self.file_manager.scan_directory(dir_path, recursive)
+            self.scan_directory(dir_path, recursive)
+
+    def scan_directory(self, dir_path, recursive=True):
+        """在后台扫描目录，发现的文件会逐批显示在列表中"""
+        self._scan_canceled = False
+        if self.file_manager.scan_directory(dir_path, recursive):
+            self.stop_scan_btn.setVisible(True)
+            self.status_label.setText("正在扫描...")
+
+    def stop_scan(self):
+        """停止正在进行的目录扫描"""
+        self._scan_canceled = True
+        self.file_manager.cancel_scan()
+
+    def _on_scan_progress(self, found):
+        """扫描进度更新"""
+        self.status_label.setText(f"正在扫描... 已发现 {found} 个文件")
+
+    def _on_scan_complete(self, count):
+        """目录扫描完成"""
+        self.stop_scan_btn.setVisible(False)
+        self._update_status_label()
 
-            if count == 0:
-                QMessageBox.information(
-                    self,
-                    "没有文件",
-                    "所选目录中未找到Word文档(.docx文件)。"
-                )
+        if count == 0 and not self._scan_canceled:
+            from PyQt6.QtWidgets import QMessageBox
+            QMessageBox.information(
+                self,
+                "没有文件",
+                "所选目录中未找到Word文档(.docx文件)。"
+            )
 
     def remove_selected_files(self):
         """删除选中的文件"""
@@ -177,26 +238,70 @@ class FileListWidget(QWidget):
 
     def clear_files(self):
         """清空文件列表"""
-        self.file_manager.model.clear()
+        self.file_manager.clear_files()
         self._update_status_label()
 
-    def _filter_files(self, text):
-        """根据搜索文本过滤文件列表"""
-        self.proxy_model.setFilterFixedString(text)
+    def _filter_files(self, *args):
+        """根据搜索文本和处理状态过滤文件列表"""
+        self.filter_timer.stop()
+        self.proxy_model.set_filter(self.search_input.text(), self.status_filter_combo.currentData())
+
+    def _on_model_changed(self, *args):
+        """模型变化时，如有过滤条件则延迟重新过滤"""
+        if self.proxy_model.is_filtering():
+            self.filter_timer.start()
 
     def _update_status_label(self):
         """更新状态标签"""
-        file_count = self.file_manager.model.rowCount()
+        if self.file_manager.is_scanning():
+            # 扫描过程中由扫描进度更新状态
+            return
+
+        file_count = self.file_manager.model.file_count()
         self.status_label.setText(f"{file_count} 个文件")
 
     def _on_file_clicked(self, index):
         """文件点击事件"""
+        self._queue_preview(index)
+
+    def _on_current_row_changed(self, current, previous):
+        """当前行变化（点击或方向键）时请求预览"""
+        self._queue_preview(current)
+
+    def _queue_preview(self, index):
+        """记录待预览的文件并重新开始防抖计时"""
+        if not index.isValid():
+            return
+
         # 获取源模型中的索引
         source_index = self.proxy_model.mapToSource(index)
         file_item = self.file_manager.model.get_file(source_index.row())
 
         if file_item:
-            self.fileSelected.emit(file_item.path)
+            self._preview_path = file_item.path
+            self.preview_timer.start()
+
+    def _emit_preview(self):
+        """防抖结束，发出文件选中信号"""
+        if self._preview_path:
+            self.fileSelected.emit(self._preview_path)
+
+    def get_neighbour_files(self, count=1):
+        """获取当前行前后各count个文件的路径（按当前排序和过滤后的顺序），近的在前"""
+        current = self.table_view.selectionModel().currentIndex()
+        if not current.isValid() or count <= 0:
+            return []
+
+        paths = []
+        row_count = self.proxy_model.rowCount()
+        for offset in range(1, count + 1):
+            for row in (current.row() + offset, current.row() - offset):
+                if 0 <= row < row_count:
+                    source_index = self.proxy_model.mapToSource(self.proxy_model.index(row, 0))
+                    file_item = self.file_manager.model.get_file(source_index.row())
+                    if file_item:
+                        paths.append(file_item.path)
+        return paths
 
     def _on_file_double_clicked(self, index):
         """文件双击事件"""
@@ -281,17 +386,13 @@ class FileListWidget(QWidget):
 
     def get_all_files(self):
         """获取所有文件路径"""
-        files = []
-        for i in range(self.file_manager.model.rowCount()):
-            file_item = self.file_manager.model.get_file(i)
-            if file_item:
-                files.append(file_item.path)
-        return files
+        # 包括尚未加载到视图中的文件
+        return self.file_manager.model.paths()
 
     def update_file_status(self, file_path, is_processed, error=""):
         """更新文件处理状态"""
-        for i in range(self.file_manager.model.rowCount()):
-            file_item = self.file_manager.model.get_file(i)
-            if file_item and file_item.path == file_path:
-                self.file_manager.model.update_file_status(i, is_processed, error)
-                break
+        return self.update_file_statuses([(file_path, is_processed, error)]) > 0
+
+    def update_file_statuses(self, statuses):
+        """批量更新文件处理状态，statuses为(文件路径, 是否成功, 错误信息)列表，是否成功为None表示按规则跳过"""
+        return self.file_manager.model.update_file_statuses(statuses)
@@ -14,6 +14,7 @@ from controllers.document_controller import DocumentController
 from controllers.file_controller import FileController
 from controllers.rule_controller import RuleController
 from controllers.task_controller import TaskController
+from utils.task_scheduler import TaskScheduler
 from views.document_viewer import DocumentViewer
 from views.file_list_widget import FileListWidget
 from views.rule_list_widget import RuleListWidget
@@ -230,6 +231,8 @@ class MainWindow(QMainWindow):
 
         # 规则测试连接
         self.rule_list_widget.ruleSelected.connect(self.document_controller.test_rule_on_document)
+        self.rule_list_widget.regexPreviewRequested.connect(self.document_controller.preview_regex)
+        self.rule_list_widget.corpusTestRequested.connect(self.rule_controller.test_rules_on_corpus)
 
         # 任务菜单和工具栏操作
         self.start_task_action.triggered.connect(self.task_panel.start_processing)
@@ -259,6 +262,8 @@ class MainWindow(QMainWindow):
         # 任务面板与任务控制器的连接
         self.task_panel.startProcessing.connect(self.task_controller.start_processing)
         self.task_panel.stopProcessing.connect(self.task_controller.stop_processing)
+        self.task_panel.pauseProcessing.connect(self.task_controller.pause_processing)
+        self.task_panel.retryProcessing.connect(self.task_controller.retry_failed)
 
     def _update_progress(self, current, total):
         """更新进度信息"""
@@ -325,5 +330,9 @@ class MainWindow(QMainWindow):
                 event.accept()
             else:
                 event.ignore()
+                return
         else:
             event.accept()
+
+        # 停止所有后台工作并等待线程结束
+        TaskScheduler.instance().shutdown()
@@ -5,6 +5,9 @@
 规则对话框 - 创建和编辑提取规则
 """
 
+import re
+
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout,
                              QLabel, QLineEdit, QComboBox, QSpinBox,
                              QCheckBox, QTabWidget,
@@ -12,11 +15,15 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout,
                              QDialogButtonBox, QMessageBox)
 
 from models.extraction_rule import ExtractionRule, ExtractionMode
+from utils.doc_properties import PROPERTY_NAMES
+from utils.path_rules import PATH_SOURCES
 
 
 class ExtractionRuleDialog(QDialog):
     """提取规则对话框"""
 
+    patternChanged = pyqtSignal(str)  # 正在编辑的正则表达式，空字符串表示停止预览
+
     def __init__(self, parent=None, rule=None):
         super().__init__(parent)
 
@@ -127,6 +134,24 @@ class ExtractionRuleDialog(QDialog):
             self._create_table_row_config()
         elif rule_type == ExtractionMode.TABLE_FULL:
             self._create_table_full_config()
+        elif rule_type == ExtractionMode.METADATA:
+            self._create_metadata_config()
+        elif rule_type == ExtractionMode.FILE_PATH:
+            self._create_file_path_config()
+
+        # 只有正则规则需要在文档预览中实时高亮
+        self.patternChanged.emit(self.current_pattern())
+
+    def current_pattern(self):
+        """当前编辑中的正则表达式，非正则规则返回空字符串"""
+        if self.rule_type_combo.currentData() != ExtractionMode.REGEX:
+            return ""
+        return self.pattern_edit.text()
+
+    def showEvent(self, event):
+        """显示时开始预览当前的正则表达式"""
+        super().showEvent(event)
+        self.patternChanged.emit(self.current_pattern())
 
     def _create_regex_config(self):
         """创建正则表达式配置界面"""
@@ -136,6 +161,7 @@ class ExtractionRuleDialog(QDialog):
         self.pattern_edit = QLineEdit()
         self.pattern_edit.setText(self.rule.config.get("pattern", ""))
         self.pattern_edit.setPlaceholderText("输入正则表达式，如: (\\d+)")
+        self.pattern_edit.textChanged.connect(self.patternChanged)
         layout.addRow("匹配模式:", self.pattern_edit)
 
         self.group_spinbox = QSpinBox()
@@ -290,6 +316,69 @@ class ExtractionRuleDialog(QDialog):
 
         self.config_place_holder.addWidget(group)
 
+    def _create_metadata_config(self):
+        """创建文档属性配置界面"""
+        group = QGroupBox("文档属性设置")
+        layout = QFormLayout(group)
+
+        self.property_combo = QComboBox()
+        for name, display_name in PROPERTY_NAMES.items():
+            self.property_combo.addItem(display_name, name)
+        index = self.property_combo.findData(self.rule.config.get("property", "author"))
+        if index >= 0:
+            self.property_combo.setCurrentIndex(index)
+        layout.addRow("属性:", self.property_combo)
+
+        help_label = QLabel("提示: 规则都是文档属性时只读取属性部件，不加载正文，速度快得多")
+        help_label.setStyleSheet("color: gray; font-size: 10px;")
+        layout.addRow("", help_label)
+
+        self.config_place_holder.addWidget(group)
+
+    def _create_file_path_config(self):
+        """创建文件路径配置界面"""
+        group = QGroupBox("文件路径设置")
+        layout = QFormLayout(group)
+
+        self.path_source_combo = QComboBox()
+        for source, display_name in PATH_SOURCES.items():
+            self.path_source_combo.addItem(display_name, source)
+        index = self.path_source_combo.findData(self.rule.config.get("source", "name"))
+        if index >= 0:
+            self.path_source_combo.setCurrentIndex(index)
+        layout.addRow("匹配范围:", self.path_source_combo)
+
+        self.path_pattern_edit = QLineEdit()
+        self.path_pattern_edit.setText(self.rule.config.get("pattern", ""))
+        self.path_pattern_edit.setPlaceholderText("输入正则表达式，如: (\\d{4})号")
+        layout.addRow("匹配模式:", self.path_pattern_edit)
+
+        self.path_group_spinbox = QSpinBox()
+        self.path_group_spinbox.setMinimum(0)
+        self.path_group_spinbox.setMaximum(10)
+        self.path_group_spinbox.setValue(self.rule.config.get("group", 0))
+        layout.addRow("分组索引:", self.path_group_spinbox)
+
+        self.path_template_edit = QLineEdit()
+        self.path_template_edit.setText(self.rule.config.get("template", ""))
+        self.path_template_edit.setPlaceholderText("可选，如: \\2-\\1，设置后忽略分组索引")
+        layout.addRow("输出模板:", self.path_template_edit)
+
+        self.path_required_checkbox = QCheckBox("不匹配时跳过文档")
+        self.path_required_checkbox.setChecked(self.rule.config.get("required", False))
+        layout.addRow("", self.path_required_checkbox)
+
+        help_label = QLabel("提示: 只匹配路径，不打开文档；路径分隔符统一为 /")
+        help_label.setStyleSheet("color: gray; font-size: 10px;")
+        layout.addRow("", help_label)
+
+        self.config_place_holder.addWidget(group)
+
+    def done(self, result):
+        """关闭对话框时停止正则预览"""
+        self.patternChanged.emit("")
+        super().done(result)
+
     def accept(self):
         """接受对话框"""
         # 检查字段名和表头名是否为空
@@ -350,6 +439,28 @@ class ExtractionRuleDialog(QDialog):
             config["table_index"] = self.table_index_spinbox.value()
             config["has_header"] = self.has_header_checkbox.isChecked()
 
+        elif rule_type == ExtractionMode.METADATA:
+            config["property"] = self.property_combo.currentData()
+
+        elif rule_type == ExtractionMode.FILE_PATH:
+            pattern = self.path_pattern_edit.text().strip()
+            if not pattern:
+                QMessageBox.warning(self, "输入错误", "正则表达式不能为空")
+                self.path_pattern_edit.setFocus()
+                return
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                QMessageBox.warning(self, "输入错误", f"正则表达式无效: {e}")
+                self.path_pattern_edit.setFocus()
+                return
+
+            config["source"] = self.path_source_combo.currentData()
+            config["pattern"] = pattern
+            config["group"] = self.path_group_spinbox.value()
+            config["template"] = self.path_template_edit.text().strip()
+            config["required"] = self.path_required_checkbox.isChecked()
+
         # 创建规则对象
         self.result_rule = ExtractionRule(field_name, rule_type, config)
         self.result_rule.header_name = header_name
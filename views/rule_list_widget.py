@@ -20,6 +20,8 @@ class RuleListWidget(QWidget):
 
     ruleSelected = pyqtSignal(ExtractionRule)  # 选中的规则
     ruleListChanged = pyqtSignal(list)  # 规则列表变化
+    corpusTestRequested = pyqtSignal(list)  # 要在文件列表上测试的规则
+    regexPreviewRequested = pyqtSignal(str)  # 编辑中的正则表达式，空字符串表示停止预览
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -47,6 +49,10 @@ class RuleListWidget(QWidget):
         self.test_rule_btn.setEnabled(False)
         header_layout.addWidget(self.test_rule_btn)
 
+        self.corpus_test_btn = QPushButton("语料测试")
+        self.corpus_test_btn.setToolTip("在文件列表的全部或抽样文件上试运行所有启用的规则，统计命中率")
+        header_layout.addWidget(self.corpus_test_btn)
+
         layout.addLayout(header_layout)
 
         # 规则列表
@@ -103,6 +109,7 @@ class RuleListWidget(QWidget):
         self.move_down_btn.clicked.connect(self._move_rule_down)
         self.toggle_btn.clicked.connect(self._toggle_rule)
         self.test_rule_btn.clicked.connect(self._test_rule)
+        self.corpus_test_btn.clicked.connect(lambda: self.corpusTestRequested.emit(self.get_enabled_rules()))
 
         # 列表事件
         self.list_view.clicked.connect(self._on_rule_clicked)
@@ -116,9 +123,15 @@ class RuleListWidget(QWidget):
         self.rule_manager.ruleRemoved.connect(lambda: self._update_status_and_notify())
         self.rule_manager.rulesLoaded.connect(lambda: self._update_status_and_notify())
 
+    def _create_rule_dialog(self, rule=None):
+        """创建规则编辑对话框，编辑正则规则时在文档预览中实时高亮匹配"""
+        dialog = ExtractionRuleDialog(self, rule)
+        dialog.patternChanged.connect(self.regexPreviewRequested)
+        return dialog
+
     def _add_rule(self):
         """添加规则"""
-        dialog = ExtractionRuleDialog(self)
+        dialog = self._create_rule_dialog()
         if dialog.exec() == QDialog.DialogCode.Accepted:
             rule = dialog.get_rule()
             if rule:
@@ -134,7 +147,7 @@ class RuleListWidget(QWidget):
         if not rule:
             return
 
-        dialog = ExtractionRuleDialog(self, rule)
+        dialog = self._create_rule_dialog(rule)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             updated_rule = dialog.get_rule()
             if updated_rule:
@@ -280,6 +293,10 @@ class RuleListWidget(QWidget):
         test_action.triggered.connect(self._test_rule)
         menu.addAction(test_action)
 
+        corpus_test_action = QAction("在文件列表上测试", self)
+        corpus_test_action.triggered.connect(lambda: self.corpusTestRequested.emit([rule]))
+        menu.addAction(corpus_test_action)
+
         # 复制规则
         duplicate_action = QAction("复制规则", self)
         duplicate_action.triggered.connect(lambda: self._duplicate_rule(selected.row()))
@@ -318,7 +335,7 @@ class RuleListWidget(QWidget):
         rule.header_name = field_name
 
         # 显示规则编辑对话框
-        dialog = ExtractionRuleDialog(self, rule)
+        dialog = self._create_rule_dialog(rule)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_rule = dialog.get_rule()
             if new_rule:
@@ -370,7 +387,7 @@ class RuleListWidget(QWidget):
         rule.header_name = field_name
 
         # 显示规则编辑对话框
-        dialog = ExtractionRuleDialog(self, rule)
+        dialog = self._create_rule_dialog(rule)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_rule = dialog.get_rule()
             if new_rule:
@@ -438,6 +455,10 @@ class RuleListWidget(QWidget):
 
         return False
 
+    def set_rule_profiles(self, profiles):
+        """显示最近一次批处理中各规则的耗时和命中统计"""
+        self.rule_manager.model.set_profiles(profiles)
+
     def get_all_rules(self):
         """获取所有规则"""
         return self.rule_manager.model.get_all_rules()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+慢文档报告对话框 - 显示批次中最耗时和最占内存的文档
+"""
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+                             QFileDialog, QMessageBox)
+
+from models.slow_document_report import SlowDocumentReport
+
+
+class SlowDocumentsDialog(QDialog):
+    """慢文档报告对话框"""
+
+    def __init__(self, report, parent=None):
+        super().__init__(parent)
+        self.report = report
+
+        self._init_ui()
+
+    def _init_ui(self):
+        """初始化界面"""
+        self.setWindowTitle("慢文档报告")
+        self.setMinimumSize(900, 420)
+
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel(f"耗时最长和内存增长最多的前 {SlowDocumentReport.TOP_N} 个文档，"
+                                "按总耗时排列"))
+
+        headers = SlowDocumentReport.HEADERS
+        rows = list(self.report.rows())
+        self.table = QTableWidget(len(rows), len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if 0 < column < len(headers) - 2:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                if column == 0:
+                    item.setToolTip(values[-1])
+                self.table.setItem(row, column, item)
+        layout.addWidget(self.table, 1)
+
+        # 按钮布局
+        button_layout = QHBoxLayout()
+
+        save_btn = QPushButton("另存为CSV...")
+        save_btn.clicked.connect(self._save_csv)
+        button_layout.addWidget(save_btn)
+
+        button_layout.addStretch()
+
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(close_btn)
+
+        layout.addLayout(button_layout)
+
+    def _save_csv(self):
+        """保存报告"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "保存慢文档报告", "", "CSV文件 (*.csv)")
+        if not file_path:
+            return
+
+        try:
+            self.report.save_csv(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "保存失败", f"保存报告时出错: {str(e)}")
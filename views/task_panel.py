@@ -5,21 +5,31 @@
 任务面板视图 - 显示和控制任务处理
 """
 
+import os
+
 from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QProgressBar, QFileDialog,
-                             QMessageBox, QCheckBox)
+                             QMessageBox, QCheckBox, QSpinBox, QComboBox)
+
+from utils.profiler import ProfileMode
+from utils.stage_timer import MemoryMode, Stage
+from views.slow_documents_dialog import SlowDocumentsDialog
 
 
 class TaskPanel(QWidget):
     """任务面板视图"""
 
-    startProcessing = pyqtSignal(str, bool, bool)  # 输出文件路径, 追加模式, 跳过文件信息
+    startProcessing = pyqtSignal(str, bool, bool, dict)  # 输出文件路径, 追加模式, 跳过文件信息, 其他处理选项
     stopProcessing = pyqtSignal()
+    pauseProcessing = pyqtSignal(bool)  # True暂停, False继续
+    retryProcessing = pyqtSignal(str, bool, dict)  # 输出文件路径, 跳过文件信息, 其他处理选项
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.is_processing = False
+        self.retry_count = 0
+        self.slow_report = None
 
         self._init_ui()
         self._connect_signals()
@@ -66,10 +76,70 @@ class TaskPanel(QWidget):
         self.skip_file_info_checkbox.setChecked(True)  # 默认勾选
         append_layout.addWidget(self.skip_file_info_checkbox)
 
+        append_layout.addSpacing(20)
+        append_layout.addWidget(QLabel("内存预算:"))
+
+        self.memory_budget_spinbox = QSpinBox()
+        self.memory_budget_spinbox.setRange(0, 1024 * 1024)
+        self.memory_budget_spinbox.setSingleStep(256)
+        self.memory_budget_spinbox.setSuffix(" MB")
+        self.memory_budget_spinbox.setSpecialValueText("不限")
+        self.memory_budget_spinbox.setToolTip("按文件中各部件解压后的大小预测解析所需内存，预计超出预算的文件跳过，"
+                                              "并行提取时同时处理的文件预计内存之和不超过预算")
+        append_layout.addWidget(self.memory_budget_spinbox)
+
+        append_layout.addSpacing(20)
+        append_layout.addWidget(QLabel("内存测量:"))
+
+        self.memory_mode_combo = QComboBox()
+        for mode, name in MemoryMode.NAMES.items():
+            self.memory_mode_combo.addItem(name, mode)
+        self.memory_mode_combo.setCurrentIndex(self.memory_mode_combo.findData(MemoryMode.platform_default()))
+        self.memory_mode_combo.setToolTip("记录每个文件解析和提取期间的内存峰值，用于慢文档报告中的内存排行和结束时的汇总；"
+                                          "常驻内存在Linux上开销可忽略，其它平台上只能采样，tracemalloc会明显拖慢解析")
+        append_layout.addWidget(self.memory_mode_combo)
+
         append_layout.addStretch()
 
         layout.addLayout(append_layout)
 
+        # 并行处理选项
+        parallel_layout = QHBoxLayout()
+
+        self.parallel_checkbox = QCheckBox("并行提取")
+        self.parallel_checkbox.setChecked(False)
+        self.parallel_checkbox.setToolTip("使用多个进程同时处理文件，大文件优先处理，输出顺序保持不变")
+        parallel_layout.addWidget(self.parallel_checkbox)
+
+        parallel_layout.addWidget(QLabel("进程数:"))
+
+        self.workers_spinbox = QSpinBox()
+        self.workers_spinbox.setMinimum(2)
+        self.workers_spinbox.setMaximum(max(2, os.cpu_count() or 2))
+        self.workers_spinbox.setValue(max(2, min(4, os.cpu_count() or 2)))
+        self.workers_spinbox.setEnabled(False)
+        parallel_layout.addWidget(self.workers_spinbox)
+
+        parallel_layout.addSpacing(20)
+        parallel_layout.addWidget(QLabel("性能分析:"))
+
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItem("关闭", None)
+        for mode in (ProfileMode.DETERMINISTIC, ProfileMode.SAMPLING):
+            self.profile_combo.addItem(ProfileMode.NAMES[mode], mode)
+        self.profile_combo.setToolTip("在性能分析器下运行批处理（包括并行提取的子进程），"
+                                      "分析结果保存在输出文件旁")
+        parallel_layout.addWidget(self.profile_combo)
+
+        self.trace_checkbox = QCheckBox("导出时间线")
+        self.trace_checkbox.setToolTip("在输出文件旁保存各进程读取、解析、规则、写入和排队等待的时间线，"
+                                       "可在chrome://tracing或Perfetto中打开")
+        parallel_layout.addWidget(self.trace_checkbox)
+
+        parallel_layout.addStretch()
+
+        layout.addLayout(parallel_layout)
+
         # 进度条
         progress_layout = QHBoxLayout()
 
@@ -86,6 +156,12 @@ class TaskPanel(QWidget):
         self.status_label = QLabel("待处理")
         layout.addWidget(self.status_label)
 
+        # 分阶段耗时，处理完成后显示
+        self.stage_label = QLabel()
+        self.stage_label.setStyleSheet("color: gray;")
+        self.stage_label.setVisible(False)
+        layout.addWidget(self.stage_label)
+
         # 按钮布局
         button_layout = QHBoxLayout()
 
@@ -98,6 +174,23 @@ class TaskPanel(QWidget):
         self.stop_btn.setEnabled(False)
         button_layout.addWidget(self.stop_btn)
 
+        self.pause_btn = QPushButton("暂停")
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.setToolTip("暂时让出计算机资源，已提取的结果保留在内存中，继续后接着处理")
+        self.pause_btn.setEnabled(False)
+        button_layout.addWidget(self.pause_btn)
+
+        self.retry_btn = QPushButton("重试失败文件")
+        self.retry_btn.setToolTip("只重新处理上一批次中失败或被取消的文件，结果写回同一输出文件中原来的位置；"
+                                  "输出文件在处理后被修改过时改为追加到末尾，不会覆盖所做的修改")
+        self.retry_btn.setEnabled(False)
+        button_layout.addWidget(self.retry_btn)
+
+        self.slow_report_btn = QPushButton("慢文档报告")
+        self.slow_report_btn.setToolTip("查看上一批次中耗时最长和内存增长最多的文档及各阶段耗时")
+        self.slow_report_btn.setEnabled(False)
+        button_layout.addWidget(self.slow_report_btn)
+
         button_layout.addStretch()
 
         self.open_output_btn = QPushButton("打开输出文件")
@@ -112,7 +205,11 @@ class TaskPanel(QWidget):
         self.browse_btn.clicked.connect(self._browse_output_file)
         self.start_btn.clicked.connect(self.start_processing)
         self.stop_btn.clicked.connect(self.stop_processing)
+        self.pause_btn.toggled.connect(self._toggle_pause)
+        self.retry_btn.clicked.connect(self.retry_failed)
+        self.slow_report_btn.clicked.connect(self._show_slow_report)
         self.open_output_btn.clicked.connect(self._open_output_file)
+        self.parallel_checkbox.toggled.connect(self.workers_spinbox.setEnabled)
 
     def _browse_output_file(self):
         """浏览输出文件"""
@@ -145,24 +242,137 @@ class TaskPanel(QWidget):
             return
 
         # 确认开始处理
-        self.is_processing = True
-        self.start_btn.setEnabled(False)
-        self.stop_btn.setEnabled(True)
-        self.browse_btn.setEnabled(False)
-        self.append_checkbox.setEnabled(False)
-        self.skip_file_info_checkbox.setEnabled(False)
+        self._set_running_state(True)
 
         # 重置进度条
         self.progress_bar.setValue(0)
         self.status_label.setText("正在处理...")
+        self.set_stage_summary(None)
 
         # 发送开始处理信号
         self.startProcessing.emit(
             output_path,
             self.append_checkbox.isChecked(),
-            self.skip_file_info_checkbox.isChecked()
+            self.skip_file_info_checkbox.isChecked(),
+            self.get_processing_options()
         )
 
+    def retry_failed(self):
+        """重新处理上一批次中失败或被取消的文件"""
+        output_path = self.output_path_label.text()
+        if output_path == "未设置输出文件" or self.is_processing:
+            return
+
+        self._set_running_state(True)
+        self.progress_bar.setValue(0)
+        self.status_label.setText("正在重试失败文件...")
+        self.set_stage_summary(None)
+
+        self.retryProcessing.emit(
+            output_path,
+            self.skip_file_info_checkbox.isChecked(),
+            self.get_processing_options()
+        )
+
+    def set_retry_count(self, count):
+        """设置可重试的文件数"""
+        self.retry_count = count
+        self.retry_btn.setText(f"重试失败文件 ({count})" if count > 0 else "重试失败文件")
+        self.retry_btn.setEnabled(count > 0 and not self.is_processing)
+
+    def set_stage_summary(self, summary):
+        """显示批次的分阶段耗时占比，完整明细（包括每条规则）放在提示中"""
+        if summary is None or summary.task_count == 0 or summary.total <= 0:
+            self.stage_label.setVisible(False)
+            self.stage_label.setToolTip("")
+            return
+
+        total = summary.total
+        groups = sorted(summary.grouped().items(), key=lambda item: item[1], reverse=True)
+        parts = [f"{Stage.display_name(stage)} {seconds / total:.0%}" for stage, seconds in groups]
+        self.stage_label.setText("耗时分布: " + "  ".join(parts))
+
+        lines = [f"{summary.task_count} 个文件，累计 {total:.2f} 秒"]
+        lines += [f"{Stage.display_name(stage)}: {seconds:.3f} 秒 ({seconds / total:.1%})" for stage, seconds in groups]
+        rules = summary.rule_stages()
+        if rules:
+            lines.append("")
+            lines.append("各规则耗时:")
+            lines += [f"  {name}: {seconds:.3f} 秒" for name, seconds in rules]
+        lines.append("")
+        lines.append(f"读取: {summary.bytes_read / 1024 / 1024:.1f} MB")
+        if summary.max_memory_delta:
+            lines.append(f"单文件内存峰值增长: {summary.max_memory_delta / 1024 / 1024:.1f} MB"
+                         f" ({summary.max_memory_file})")
+        if summary.process_peak_rss:
+            lines.append(f"主进程内存峰值: {summary.process_peak_rss / 1024 / 1024:.1f} MB")
+        if summary.path_skipped:
+            lines.append(f"路径不匹配跳过: {summary.path_skipped} 个文件")
+        if summary.over_budget:
+            lines.append(f"超出内存预算跳过: {summary.over_budget} 个文件")
+        if summary.deferred:
+            lines.append(f"因内存预算推迟: {summary.deferred} 个文件")
+        self.stage_label.setToolTip("\n".join(lines))
+        self.stage_label.setVisible(True)
+
+    def set_slow_report(self, report):
+        """设置上一批次的慢文档报告"""
+        self.slow_report = report
+        self.slow_report_btn.setEnabled(bool(report and report.entries) and not self.is_processing)
+
+    def _show_slow_report(self):
+        """显示慢文档报告"""
+        if self.slow_report is None:
+            return
+        SlowDocumentsDialog(self.slow_report, self).exec()
+
+    def _set_running_state(self, running):
+        """根据是否正在处理切换控件状态"""
+        self.is_processing = running
+        self.start_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.browse_btn.setEnabled(not running)
+        self.append_checkbox.setEnabled(not running)
+        self.skip_file_info_checkbox.setEnabled(not running)
+        self.memory_budget_spinbox.setEnabled(not running)
+        self.memory_mode_combo.setEnabled(not running)
+        self.parallel_checkbox.setEnabled(not running)
+        self.workers_spinbox.setEnabled(not running and self.parallel_checkbox.isChecked())
+        self.profile_combo.setEnabled(not running)
+        self.trace_checkbox.setEnabled(not running)
+        self.pause_btn.setEnabled(running)
+        if running:
+            self.retry_btn.setEnabled(False)
+            self.slow_report_btn.setEnabled(False)
+        else:
+            self.retry_btn.setEnabled(self.retry_count > 0)
+            self.slow_report_btn.setEnabled(bool(self.slow_report and self.slow_report.entries))
+
+            # 结束时复位暂停按钮，不发出信号
+            self.pause_btn.blockSignals(True)
+            self.pause_btn.setChecked(False)
+            self.pause_btn.setText("暂停")
+            self.pause_btn.blockSignals(False)
+
+    def _toggle_pause(self, paused):
+        """暂停或继续处理"""
+        if not self.is_processing:
+            return
+
+        self.pause_btn.setText("继续" if paused else "暂停")
+        self.status_label.setText("已暂停" if paused else "正在处理...")
+        self.pauseProcessing.emit(paused)
+
+    def get_processing_options(self):
+        """获取其他处理选项"""
+        return {
+            "max_workers": self.workers_spinbox.value() if self.parallel_checkbox.isChecked() else 1,
+            "profile_mode": self.profile_combo.currentData(),
+            "trace": self.trace_checkbox.isChecked(),
+            "memory_budget": self.memory_budget_spinbox.value() * 1024 * 1024 or None,
+            "memory_mode": self.memory_mode_combo.currentData()
+        }
+
     def stop_processing(self):
         """停止处理任务"""
         if not self.is_processing:
@@ -177,15 +387,11 @@ class TaskPanel(QWidget):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
-            self.is_processing = False
             self.stopProcessing.emit()
             self.status_label.setText("已停止")
 
             # 恢复按钮状态
-            self.start_btn.setEnabled(True)
-            self.stop_btn.setEnabled(False)
-            self.browse_btn.setEnabled(True)
-            self.append_checkbox.setEnabled(True)
+            self._set_running_state(False)
 
     def _open_output_file(self):
         """打开输出文件"""
@@ -219,24 +425,20 @@ class TaskPanel(QWidget):
         # 确保进度计算正确
         percent = min(int((current / total) * 100), 100)
         self.progress_bar.setValue(percent)
-        self.status_label.setText(f"正在处理... {current}/{total} ({percent}%)")
+        state = "已暂停" if self.pause_btn.isChecked() else "正在处理..."
+        self.status_label.setText(f"{state} {current}/{total} ({percent}%)")
 
         # 如果是最后一个任务，确保进度为100%
         if current >= total:
             self.progress_bar.setValue(100)
             self.status_label.setText(f"处理完成: {current}/{total} ({100}%)")
 
-    def processing_completed(self, success_count, total_count):
-        """处理完成"""
+    def processing_completed(self, success_count, total_count, skipped_count=0):
+        """处理完成，按路径规则跳过的文件不计为失败"""
         self.progress_bar.setValue(100)
         self.status_label.setText(f"处理完成: {success_count}/{total_count} 个文件成功")
 
-        self.is_processing = False
-        self.start_btn.setEnabled(True)
-        self.stop_btn.setEnabled(False)
-        self.browse_btn.setEnabled(True)
-        self.append_checkbox.setEnabled(True)
-        self.skip_file_info_checkbox.setEnabled(True)  # 恢复此控件的状态
+        self._set_running_state(False)
 
         QMessageBox.information(
             self,
@@ -244,16 +446,13 @@ class TaskPanel(QWidget):
             f"处理完成\n"
             f"共处理: {total_count} 个文件\n"
             f"成功: {success_count} 个\n"
-            f"失败: {total_count - success_count} 个"
+            f"失败: {total_count - success_count - skipped_count} 个"
+            + (f"\n跳过: {skipped_count} 个" if skipped_count else "")
         )
 
     def processing_failed(self, error):
         """处理失败"""
-        self.is_processing = False
-        self.start_btn.setEnabled(True)
-        self.stop_btn.setEnabled(False)
-        self.browse_btn.setEnabled(True)
-        self.append_checkbox.setEnabled(True)
+        self._set_running_state(False)
 
         self.status_label.setText(f"处理失败: {error}")
 